@@ -0,0 +1,154 @@
+"""
+Clients — Long-lived upstream clients
+
+One registry holds the Gemini, ElevenLabs, Supabase and plain HTTP clients
+for the whole process. It is built in the main.py lifespan so every request
+reuses the same keep-alive connection pools instead of constructing a client
+(and a fresh TCP/TLS handshake) per call.
+
+Tests and benchmarks swap in stand-ins with set_clients(ClientRegistry(...)).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Any, Optional
+
+import httpx
+
+from app.config import Settings, get_settings
+
+logger = logging.getLogger("foodfinder.clients")
+
+try:
+    from google import genai
+    from google.genai import types as genai_types
+except ImportError:
+    genai = None
+    genai_types = None
+
+try:
+    from elevenlabs.client import AsyncElevenLabs
+except ImportError:
+    AsyncElevenLabs = None
+
+try:
+    from supabase import acreate_client
+except ImportError:
+    acreate_client = None
+
+
+class ClientRegistry:
+    """Holds shared upstream clients. Any client may be None if not configured."""
+
+    def __init__(
+        self,
+        gemini: Any = None,
+        elevenlabs: Any = None,
+        supabase: Any = None,
+        http: Optional[httpx.AsyncClient] = None,
+    ) -> None:
+        self.gemini = gemini
+        self.elevenlabs = elevenlabs
+        self.supabase = supabase
+        self.http = http
+        self._owned_http: list[httpx.AsyncClient] = []
+
+    async def aclose(self) -> None:
+        """Close connection pools owned by this registry."""
+        for client in self._owned_http:
+            try:
+                await client.aclose()
+            except Exception:
+                pass
+        self._owned_http.clear()
+        if self.gemini is not None:
+            try:
+                await self.gemini.aio.aclose()
+                self.gemini.close()
+            except Exception:
+                pass
+
+
+def _limits(settings: Settings) -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=settings.http_pool_size,
+        max_keepalive_connections=settings.http_keepalive_connections,
+        keepalive_expiry=settings.http_keepalive_expiry,
+    )
+
+
+async def build_clients(settings: Optional[Settings] = None) -> ClientRegistry:
+    """Create pooled clients for every configured upstream."""
+    settings = settings or get_settings()
+    registry = ClientRegistry()
+
+    registry.http = httpx.AsyncClient(
+        limits=_limits(settings),
+        timeout=settings.http_timeout,
+    )
+    registry._owned_http.append(registry.http)
+
+    if settings.gemini_api_key and genai is not None:
+        registry.gemini = genai.Client(
+            api_key=settings.gemini_api_key,
+            http_options=genai_types.HttpOptions(
+                timeout=int(settings.gemini_timeout * 1000),  # milliseconds
+                async_client_args={"limits": _limits(settings)},
+            ),
+        )
+
+    if settings.elevenlabs_api_key and AsyncElevenLabs is not None:
+        el_http = httpx.AsyncClient(
+            limits=_limits(settings),
+            timeout=settings.elevenlabs_timeout,
+        )
+        registry._owned_http.append(el_http)
+        registry.elevenlabs = AsyncElevenLabs(
+            api_key=settings.elevenlabs_api_key,
+            httpx_client=el_http,
+        )
+
+    url = (settings.supabase_url or "").rstrip("/")
+    key = settings.supabase_service_role_key or settings.supabase_key
+    if url and key and acreate_client is not None:
+        try:
+            registry.supabase = await acreate_client(url, key)
+        except Exception as exc:
+            logger.warning("Supabase client init failed: %s", exc)
+
+    return registry
+
+
+_registry: Optional[ClientRegistry] = None
+_registry_lock = asyncio.Lock()
+
+
+async def init_clients() -> ClientRegistry:
+    """Build the process-wide registry (called from the lifespan)."""
+    global _registry
+    if _registry is None:
+        async with _registry_lock:
+            if _registry is None:
+                _registry = await build_clients()
+    return _registry
+
+
+async def close_clients() -> None:
+    """Close the process-wide registry (called from the lifespan)."""
+    global _registry
+    if _registry is not None:
+        await _registry.aclose()
+        _registry = None
+
+
+async def get_clients() -> ClientRegistry:
+    """Return the registry, building it lazily outside the lifespan (scripts)."""
+    return await init_clients()
+
+
+def set_clients(registry: Optional[ClientRegistry]) -> None:
+    """Install a registry (tests/benchmarks), or None to reset."""
+    global _registry
+    _registry = registry
@@ -11,6 +11,22 @@ from functools import lru_cache
 from typing import Optional
 
 
+def _env_int(name: str, default: int) -> int:
+    """Read an int env var, falling back to default when unset or invalid."""
+    try:
+        return int(os.environ[name])
+    except (KeyError, ValueError):
+        return default
+
+
+def _env_float(name: str, default: float) -> float:
+    """Read a float env var, falling back to default when unset or invalid."""
+    try:
+        return float(os.environ[name])
+    except (KeyError, ValueError):
+        return default
+
+
 @lru_cache
 def get_settings() -> "Settings":
     """Return cached settings instance."""
@@ -26,8 +42,95 @@ class Settings:
     supabase_key: Optional[str] = None
     supabase_service_role_key: Optional[str] = None
     supabase_jwt_secret: Optional[str] = None
+    # JWKS for asymmetric JWTs (default: <SUPABASE_URL>/auth/v1/.well-known/jwks.json);
+    # may be a local file path. Refetch on unknown kid at most every refresh_interval s.
+    supabase_jwks_url: Optional[str] = None
+    jwks_refresh_interval: float = 60.0
+    jwks_max_age: float = 3600.0
     backend_host: str = "0.0.0.0"
     backend_port: int = 8000
+    # uvicorn worker processes (uvicorn reads WEB_CONCURRENCY too); per-process
+    # limits such as the Gemini limiter split their budget across workers
+    web_concurrency: int = 1
+    # Vision cache: in-process LRU entries, TTL (seconds), persistent row budget
+    vision_cache_size: int = 256
+    vision_cache_ttl: float = 7 * 24 * 3600
+    vision_cache_max_rows: int = 50_000
+    # Per-user profile cache: entries, TTL (safety net for updates made outside this service)
+    profile_cache_size: int = 10_000
+    profile_cache_ttl: float = 60.0
+    # Analysis cache L1 (in-process, in front of analysis_cache): entries, TTL, TTL for misses
+    analysis_l1_size: int = 2048
+    analysis_l1_ttl: float = 600.0
+    analysis_l1_negative_ttl: float = 30.0
+    # analysis_cache table lifecycle: per-entry TTL, size budget, background sweeper
+    analysis_cache_ttl: float = 30 * 24 * 3600
+    analysis_cache_max_bytes: int = 512 * 1024 * 1024
+    cache_sweep_interval: float = 300.0  # 0 disables the sweeper
+    cache_sweep_batch: int = 500
+    # Write-behind queue for analysis_cache upserts: on/off, rows per upsert,
+    # max seconds a row waits, max queued rows (oldest dropped beyond)
+    cache_write_behind: bool = True
+    cache_write_batch: int = 50
+    cache_write_interval: float = 0.5
+    cache_write_queue_size: int = 1000
+    # /analyze default mode: "sequential" (vision, then analysis) or "fused" (one call)
+    analyze_mode: str = "sequential"
+    # Canonicalize ingredient names (synonyms, E-numbers, plurals) before cache keys (on/off)
+    ingredient_canon: bool = True
+    # Offline diet rule engine: decide allergy/diet-only profiles without Gemini (on/off)
+    diet_rules: bool = True
+    # Per-ingredient verdict cache (incremental analysis): on/off, L1 entries, TTL (L1 + table)
+    incremental_analysis: bool = True
+    ingredient_cache_size: int = 20_000
+    ingredient_fact_ttl: float = 30 * 24 * 3600
+    # Product fact cache (profile-agnostic properties, scored locally): on/off, L1 entries, TTL
+    product_facts: bool = True
+    product_fact_cache_size: int = 5000
+    product_fact_ttl: float = 30 * 24 * 3600
+    # TTS audio cache: in-memory clips, disk directory (default: system temp), disk byte cap
+    audio_cache_memory_items: int = 64
+    audio_cache_dir: Optional[str] = None
+    audio_cache_max_bytes: int = 200 * 1024 * 1024
+    # Seconds an audio id returned by /analyze stays resolvable
+    audio_handle_ttl: float = 3600.0
+    # Verified-token cache: entries, max TTL (capped by token exp), TTL for rejected tokens
+    auth_cache_size: int = 10_000
+    auth_cache_ttl: float = 300.0
+    auth_negative_ttl: float = 10.0
+    # Max threads for blocking work offloaded from the event loop
+    blocking_pool_size: int = 8
+    # Shared upstream connection pools (see app/clients.py); timeouts in seconds
+    http_pool_size: int = 20
+    http_keepalive_connections: int = 10
+    http_keepalive_expiry: float = 30.0
+    http_timeout: float = 10.0
+    gemini_timeout: float = 60.0
+    elevenlabs_timeout: float = 60.0
+    # Uploads: max bytes per image (enforced while streaming); preprocessing before vision
+    max_upload_bytes: int = 15 * 1024 * 1024
+    image_preprocess: bool = True
+    image_max_edge: int = 1600
+    image_jpeg_quality: int = 85
+    # Gemini admission limiter: max/min requests per second, burst (for the whole
+    # deployment; each of WEB_CONCURRENCY workers gets an equal share), queued
+    # callers, and max seconds a call may wait for admission (incl. 429 retries)
+    gemini_rate_limit: float = 5.0
+    gemini_min_rate: float = 0.2
+    gemini_burst: float = 10.0
+    gemini_max_queue: int = 100
+    gemini_admission_timeout: float = 20.0
+    # Circuit breakers (per upstream, per process): open at this failure rate once
+    # min_calls were seen in the window (s); stay open for open_seconds, then let
+    # half_open_calls probes through
+    breaker_failure_rate: float = 0.5
+    breaker_min_calls: int = 10
+    breaker_window: float = 30.0
+    breaker_open_seconds: float = 15.0
+    breaker_half_open_calls: int = 1
+    # POST /analyze/batch: max images per request, concurrent upstream calls
+    batch_max_images: int = 10
+    batch_concurrency: int = 4
 
     def __init__(self) -> None:
         self.gemini_api_key = os.getenv("GEMINI_API_KEY")
@@ -36,6 +139,9 @@ class Settings:
         self.supabase_key = os.getenv("SUPABASE_KEY") or os.getenv("VITE_SUPABASE_ANON_KEY")
         self.supabase_service_role_key = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
         self.supabase_jwt_secret = os.getenv("SUPABASE_JWT_SECRET")
+        self.supabase_jwks_url = os.getenv("SUPABASE_JWKS_URL") or None
+        self.jwks_refresh_interval = _env_float("JWKS_REFRESH_INTERVAL", self.jwks_refresh_interval)
+        self.jwks_max_age = _env_float("JWKS_MAX_AGE", self.jwks_max_age)
         if host := os.getenv("BACKEND_HOST"):
             self.backend_host = host
         if port := os.getenv("BACKEND_PORT"):
@@ -43,3 +149,62 @@ class Settings:
                 self.backend_port = int(port)
             except ValueError:
                 pass
+        self.web_concurrency = max(1, _env_int("WEB_CONCURRENCY", self.web_concurrency))
+        self.vision_cache_size = _env_int("VISION_CACHE_SIZE", self.vision_cache_size)
+        self.vision_cache_ttl = _env_float("VISION_CACHE_TTL", self.vision_cache_ttl)
+        self.vision_cache_max_rows = _env_int("VISION_CACHE_MAX_ROWS", self.vision_cache_max_rows)
+        self.profile_cache_size = _env_int("PROFILE_CACHE_SIZE", self.profile_cache_size)
+        self.profile_cache_ttl = _env_float("PROFILE_CACHE_TTL", self.profile_cache_ttl)
+        self.analysis_l1_size = _env_int("ANALYSIS_L1_SIZE", self.analysis_l1_size)
+        self.analysis_l1_ttl = _env_float("ANALYSIS_L1_TTL", self.analysis_l1_ttl)
+        self.analysis_l1_negative_ttl = _env_float("ANALYSIS_L1_NEGATIVE_TTL", self.analysis_l1_negative_ttl)
+        self.analysis_cache_ttl = _env_float("ANALYSIS_CACHE_TTL", self.analysis_cache_ttl)
+        self.analysis_cache_max_bytes = _env_int("ANALYSIS_CACHE_MAX_BYTES", self.analysis_cache_max_bytes)
+        self.cache_sweep_interval = _env_float("CACHE_SWEEP_INTERVAL", self.cache_sweep_interval)
+        self.cache_sweep_batch = max(1, _env_int("CACHE_SWEEP_BATCH", self.cache_sweep_batch))
+        self.cache_write_behind = _env_int("CACHE_WRITE_BEHIND", int(self.cache_write_behind)) != 0
+        self.cache_write_batch = max(1, _env_int("CACHE_WRITE_BATCH", self.cache_write_batch))
+        self.cache_write_interval = max(0.01, _env_float("CACHE_WRITE_INTERVAL", self.cache_write_interval))
+        self.cache_write_queue_size = max(1, _env_int("CACHE_WRITE_QUEUE_SIZE", self.cache_write_queue_size))
+        if (mode := (os.getenv("ANALYZE_MODE") or "").strip().lower()) in ("sequential", "fused"):
+            self.analyze_mode = mode
+        self.ingredient_canon = _env_int("INGREDIENT_CANON", int(self.ingredient_canon)) != 0
+        self.diet_rules = _env_int("DIET_RULES", int(self.diet_rules)) != 0
+        self.incremental_analysis = _env_int("INCREMENTAL_ANALYSIS", int(self.incremental_analysis)) != 0
+        self.ingredient_cache_size = _env_int("INGREDIENT_CACHE_SIZE", self.ingredient_cache_size)
+        self.ingredient_fact_ttl = _env_float("INGREDIENT_FACT_TTL", self.ingredient_fact_ttl)
+        self.product_facts = _env_int("PRODUCT_FACTS", int(self.product_facts)) != 0
+        self.product_fact_cache_size = _env_int("PRODUCT_FACT_CACHE_SIZE", self.product_fact_cache_size)
+        self.product_fact_ttl = _env_float("PRODUCT_FACT_TTL", self.product_fact_ttl)
+        self.audio_cache_memory_items = _env_int("AUDIO_CACHE_MEMORY_ITEMS", self.audio_cache_memory_items)
+        self.audio_cache_dir = os.getenv("AUDIO_CACHE_DIR") or None
+        self.audio_cache_max_bytes = _env_int("AUDIO_CACHE_MAX_BYTES", self.audio_cache_max_bytes)
+        self.audio_handle_ttl = _env_float("AUDIO_HANDLE_TTL", self.audio_handle_ttl)
+        self.auth_cache_size = _env_int("AUTH_CACHE_SIZE", self.auth_cache_size)
+        self.auth_cache_ttl = _env_float("AUTH_CACHE_TTL", self.auth_cache_ttl)
+        self.auth_negative_ttl = _env_float("AUTH_NEGATIVE_TTL", self.auth_negative_ttl)
+        self.blocking_pool_size = max(1, _env_int("BLOCKING_POOL_SIZE", self.blocking_pool_size))
+        self.http_pool_size = _env_int("HTTP_POOL_SIZE", self.http_pool_size)
+        self.http_keepalive_connections = _env_int(
+            "HTTP_KEEPALIVE_CONNECTIONS", self.http_keepalive_connections
+        )
+        self.http_keepalive_expiry = _env_float("HTTP_KEEPALIVE_EXPIRY", self.http_keepalive_expiry)
+        self.http_timeout = _env_float("HTTP_TIMEOUT", self.http_timeout)
+        self.gemini_timeout = _env_float("GEMINI_TIMEOUT", self.gemini_timeout)
+        self.elevenlabs_timeout = _env_float("ELEVENLABS_TIMEOUT", self.elevenlabs_timeout)
+        self.max_upload_bytes = max(1, _env_int("MAX_UPLOAD_BYTES", self.max_upload_bytes))
+        self.image_preprocess = _env_int("IMAGE_PREPROCESS", int(self.image_preprocess)) != 0
+        self.image_max_edge = max(64, _env_int("IMAGE_MAX_EDGE", self.image_max_edge))
+        self.image_jpeg_quality = min(95, max(1, _env_int("IMAGE_JPEG_QUALITY", self.image_jpeg_quality)))
+        self.gemini_rate_limit = max(0.01, _env_float("GEMINI_RATE_LIMIT", self.gemini_rate_limit))
+        self.gemini_min_rate = max(0.01, _env_float("GEMINI_MIN_RATE", self.gemini_min_rate))
+        self.gemini_burst = _env_float("GEMINI_BURST", self.gemini_burst)
+        self.gemini_max_queue = _env_int("GEMINI_MAX_QUEUE", self.gemini_max_queue)
+        self.gemini_admission_timeout = _env_float("GEMINI_ADMISSION_TIMEOUT", self.gemini_admission_timeout)
+        self.breaker_failure_rate = _env_float("BREAKER_FAILURE_RATE", self.breaker_failure_rate)
+        self.breaker_min_calls = max(1, _env_int("BREAKER_MIN_CALLS", self.breaker_min_calls))
+        self.breaker_window = _env_float("BREAKER_WINDOW", self.breaker_window)
+        self.breaker_open_seconds = _env_float("BREAKER_OPEN_SECONDS", self.breaker_open_seconds)
+        self.breaker_half_open_calls = max(1, _env_int("BREAKER_HALF_OPEN_CALLS", self.breaker_half_open_calls))
+        self.batch_max_images = _env_int("BATCH_MAX_IMAGES", self.batch_max_images)
+        self.batch_concurrency = max(1, _env_int("BATCH_CONCURRENCY", self.batch_concurrency))
@@ -0,0 +1,76 @@
+"""
+Request body size limit, enforced while the body streams in.
+
+Starlette spools multipart uploads to memory/disk before the endpoint runs,
+so checking len(await image.read()) only rejects an oversized photo after it
+has been received in full. This middleware rejects it up front when
+Content-Length is too large, and otherwise counts bytes as they arrive and
+aborts the request with 413 as soon as the limit is crossed.
+"""
+
+from __future__ import annotations
+
+from typing import Callable, Optional
+
+from fastapi import HTTPException
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.utils import format_size
+
+
+# Content Too Large (constant name varies by Starlette version)
+HTTP_413 = 413
+
+
+def _too_large(limit: int) -> str:
+    return f"Request body too large (max {format_size(limit)})"
+
+
+class BodySizeLimitMiddleware:
+    """413 for request bodies over limit_for(scope) bytes (None = unlimited)."""
+
+    def __init__(self, app: ASGIApp, limit_for: Callable[[Scope], Optional[int]]) -> None:
+        self.app = app
+        self.limit_for = limit_for
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        limit = self.limit_for(scope)
+        if limit is None:
+            await self.app(scope, receive, send)
+            return
+
+        for name, value in scope.get("headers", []):
+            if name == b"content-length":
+                try:
+                    declared = int(value)
+                except ValueError:
+                    break
+                if declared > limit:
+                    response = JSONResponse(
+                        {"detail": _too_large(limit)},
+                        status_code=HTTP_413,
+                    )
+                    await response(scope, receive, send)
+                    return
+                break
+
+        received = 0
+
+        async def limited_receive() -> Message:
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    # Raised inside body parsing; FastAPI re-raises HTTPExceptions as-is
+                    raise HTTPException(
+                        status_code=HTTP_413,
+                        detail=_too_large(limit),
+                    )
+            return message
+
+        await self.app(scope, limited_receive, send)
@@ -0,0 +1,175 @@
+"""
+Circuit breaker — fail fast while an upstream is down.
+
+One breaker per dependency (Gemini, Supabase, ElevenLabs). Outcomes of the
+last `window` seconds are kept; the breaker moves between three states:
+
+  closed:     calls pass; once at least `min_calls` were seen in the window
+              and the failure rate reaches `failure_rate`, it opens
+  open:       calls are refused at once with CircuitOpen (no timeout is
+              waited for) until `open_for` seconds have passed
+  half-open:  up to `half_open_calls` probe calls pass; a successful probe
+              closes the breaker, a failed one opens it again
+
+Only exceptions for which `is_failure(exc)` is true count as failures
+(e.g. a 4xx from the upstream means it is up). State is per process.
+"""
+
+from __future__ import annotations
+
+import time
+from collections import deque
+from typing import Awaitable, Callable, Optional, TypeVar
+
+from app.config import get_settings
+from app.core.exceptions import AppException
+
+T = TypeVar("T")
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}  # gauge values for /metrics
+
+
+class CircuitOpen(AppException):
+    """Call refused: the upstream's breaker is open."""
+
+    def __init__(self, name: str, retry_after: float) -> None:
+        super().__init__(f"{name} is temporarily unavailable", status_code=503)
+        self.name = name
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """Failure-rate circuit breaker with closed, open and half-open states."""
+
+    def __init__(
+        self,
+        name: str,
+        failure_rate: float = 0.5,
+        min_calls: int = 10,
+        window: float = 30.0,
+        open_for: float = 15.0,
+        half_open_calls: int = 1,
+        is_failure: Optional[Callable[[BaseException], bool]] = None,
+    ) -> None:
+        self.name = name
+        self.failure_rate = failure_rate
+        self.min_calls = max(1, min_calls)
+        self.window = window
+        self.open_for = open_for
+        self.half_open_calls = max(1, half_open_calls)
+        self.is_failure = is_failure or (lambda e: True)
+        self._state = CLOSED
+        self._outcomes: deque[tuple[float, bool]] = deque()  # (monotonic time, failed)
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probes = 0
+        self.opened = 0
+        self.short_circuited = 0
+
+    @property
+    def state(self) -> str:
+        if self._state == OPEN and time.monotonic() - self._opened_at >= self.open_for:
+            self._state = HALF_OPEN
+            self._probes = 0
+        return self._state
+
+    def _trim(self, now: float) -> None:
+        while self._outcomes and now - self._outcomes[0][0] > self.window:
+            if self._outcomes.popleft()[1]:
+                self._failures -= 1
+
+    def _open(self, now: float) -> None:
+        self._state = OPEN
+        self._opened_at = now
+        self._outcomes.clear()
+        self._failures = 0
+        self.opened += 1
+
+    def before_call(self) -> None:
+        """Admit a call or raise CircuitOpen; pair every admitted call with record()."""
+        state = self.state
+        if state == CLOSED:
+            return
+        if state == HALF_OPEN and self._probes < self.half_open_calls:
+            self._probes += 1
+            return
+        self.short_circuited += 1
+        retry_after = max(0.0, self._opened_at + self.open_for - time.monotonic())
+        raise CircuitOpen(self.name, retry_after)
+
+    def release(self) -> None:
+        """An admitted call ended without an outcome (cancelled, never sent)."""
+        if self._state == HALF_OPEN:
+            self._probes = max(0, self._probes - 1)
+
+    def record(self, exc: Optional[BaseException] = None) -> None:
+        """
+        Outcome of an admitted call: None for success, else the exception.
+        Exceptions that are not Exception (cancellation) count as neither.
+        """
+        now = time.monotonic()
+        if exc is not None and not isinstance(exc, Exception):
+            self.release()
+            return
+        failed = exc is not None and self.is_failure(exc)
+        if self._state == HALF_OPEN:
+            if failed:
+                self._open(now)
+            else:
+                self._state = CLOSED
+                self._outcomes.clear()
+                self._failures = 0
+            return
+        if self._state == OPEN:
+            return  # a call admitted before the breaker opened
+        self._trim(now)
+        self._outcomes.append((now, failed))
+        self._failures += failed
+        if len(self._outcomes) >= self.min_calls and self._failures / len(self._outcomes) >= self.failure_rate:
+            self._open(now)
+
+    async def call(self, fn: Callable[[], Awaitable[T]]) -> T:
+        """Run fn() through the breaker (CircuitOpen if refused)."""
+        self.before_call()
+        try:
+            result = await fn()
+        except BaseException as e:
+            self.record(e)
+            raise
+        self.record()
+        return result
+
+    def stats(self) -> dict:
+        """State and window counters for /health."""
+        state = self.state
+        self._trim(time.monotonic())
+        calls = len(self._outcomes)
+        return {
+            "state": state,
+            "calls": calls,
+            "failures": self._failures,
+            "failure_rate": round(self._failures / calls, 4) if calls else 0.0,
+            "opened": self.opened,
+            "short_circuited": self.short_circuited,
+            "retry_after": (
+                round(max(0.0, self._opened_at + self.open_for - time.monotonic()), 3)
+                if state == OPEN else 0.0
+            ),
+        }
+
+
+def breaker_from_settings(
+    name: str, is_failure: Optional[Callable[[BaseException], bool]] = None
+) -> CircuitBreaker:
+    """Breaker configured from the BREAKER_* settings."""
+    settings = get_settings()
+    return CircuitBreaker(
+        name,
+        failure_rate=settings.breaker_failure_rate,
+        min_calls=settings.breaker_min_calls,
+        window=settings.breaker_window,
+        open_for=settings.breaker_open_seconds,
+        half_open_calls=settings.breaker_half_open_calls,
+        is_failure=is_failure,
+    )
@@ -0,0 +1,34 @@
+"""
+Bounded thread-pool offload for blocking work.
+
+Everything with a native async client (Gemini, Supabase, ElevenLabs, httpx)
+is awaited directly. Only CPU-heavy or sync-only work goes through here, so
+it never occupies more than BLOCKING_POOL_SIZE threads.
+"""
+
+from __future__ import annotations
+
+import functools
+from typing import Any, Callable, Optional, TypeVar
+
+import anyio
+
+from app.config import get_settings
+
+T = TypeVar("T")
+
+_limiter: Optional[anyio.CapacityLimiter] = None
+
+
+def _get_limiter() -> anyio.CapacityLimiter:
+    global _limiter
+    if _limiter is None:
+        _limiter = anyio.CapacityLimiter(get_settings().blocking_pool_size)
+    return _limiter
+
+
+async def run_blocking(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Run a blocking callable in the bounded worker pool."""
+    if kwargs:
+        func = functools.partial(func, **kwargs)
+    return await anyio.to_thread.run_sync(func, *args, limiter=_get_limiter())
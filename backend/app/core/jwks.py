@@ -0,0 +1,81 @@
+"""
+JWKS key cache for local verification of asymmetric (RS256/ES256) JWTs.
+
+The key set is fetched once and kept for JWKS_MAX_AGE seconds. A token with
+an unknown `kid` triggers a refetch (key rotation), rate-limited to one per
+JWKS_REFRESH_INTERVAL so garbage tokens cannot hammer the endpoint.
+
+The source may be an http(s) URL or a local file (path or file:// URL).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import time
+from pathlib import Path
+from typing import Any, Optional
+from urllib.parse import urlparse
+
+from app.clients import get_clients
+from app.core.concurrency import run_blocking
+
+logger = logging.getLogger("foodfinder.jwks")
+
+
+class JWKSCache:
+    """kid -> PyJWK map, refreshed on rotation or expiry."""
+
+    def __init__(self, url: str, refresh_interval: float = 60.0, max_age: float = 3600.0) -> None:
+        self.url = url
+        self.refresh_interval = refresh_interval
+        self.max_age = max_age
+        self._keys: dict[str, Any] = {}
+        self._fetched_at = 0.0
+        self._attempted_at = 0.0
+        self._lock = asyncio.Lock()
+
+    async def _load_document(self) -> dict:
+        parsed = urlparse(self.url)
+        if parsed.scheme in ("http", "https"):
+            r = await (await get_clients()).http.get(self.url)
+            r.raise_for_status()
+            return r.json()
+        path = Path(parsed.path if parsed.scheme == "file" else self.url)
+        return json.loads(await run_blocking(path.read_text))
+
+    async def refresh(self) -> None:
+        """Fetch the key set and replace the cached keys."""
+        import jwt
+
+        self._attempted_at = time.monotonic()
+        try:
+            doc = await self._load_document()
+        except Exception as e:
+            logger.warning("JWKS fetch failed (%s): %s", self.url, e)
+            return
+        keys: dict[str, Any] = {}
+        for jwk in doc.get("keys", []):
+            try:
+                key = jwt.PyJWK(jwk)
+            except Exception:
+                continue  # unsupported kty/alg — skip, keep the rest
+            keys[jwk.get("kid") or ""] = key
+        self._keys = keys
+        self._fetched_at = time.monotonic()
+
+    async def get_key(self, kid: Optional[str]) -> Optional[Any]:
+        """Signing key for kid, refetching the set when it is stale or kid is new."""
+        kid = kid or ""
+        now = time.monotonic()
+        stale = now - self._fetched_at > self.max_age
+        if kid in self._keys and not stale:
+            return self._keys[kid]
+        async with self._lock:
+            if kid in self._keys and now - self._fetched_at <= self.max_age:
+                return self._keys[kid]
+            # On failure (or inside the interval) the previous keys keep serving
+            if time.monotonic() - self._attempted_at >= self.refresh_interval:
+                await self.refresh()
+        return self._keys.get(kid)
@@ -0,0 +1,215 @@
+"""
+Request stage timing and Prometheus-format metrics (no client library needed).
+
+  stage("vision")             times a block: recorded on the current request
+                              (-> Server-Timing header) and in a histogram
+  observe_upstream(...)       upstream call latency (Gemini, ElevenLabs, ...)
+  count_upstream_error(...)   upstream failures by exception type
+  ServerTimingMiddleware      starts a per-request stage list, adds the
+                              Server-Timing header, records request latency
+  render()                    text exposition of the above for GET /metrics
+  gauge_lines(...)            point-in-time gauges (cache sizes etc.)
+  counter_lines(...)          monotonic counts kept elsewhere (cache hits etc.)
+
+Stages are kept in a contextvar, so work started from a request (including
+tasks it spawns, such as single-flight leaders) is attributed to it.
+"""
+
+from __future__ import annotations
+
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+PREFIX = "foodfinder"
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_stages: ContextVar[Optional[list[tuple[str, float]]]] = ContextVar("request_stages", default=None)
+
+
+def _labels(names: tuple[str, ...], values: tuple[str, ...]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(
+        f'{n}="{str(v).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"'
+        for n, v in zip(names, values)
+    )
+    return "{" + pairs + "}"
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labelnames: tuple[str, ...] = ()) -> None:
+        self.name = f"{PREFIX}_{name}"
+        self.help = help
+        self.labelnames = labelnames
+        self._values: dict[tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for labels, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_labels(self.labelnames, labels)} {value:g}")
+        return lines
+
+
+class Histogram:
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = LATENCY_BUCKETS,
+    ) -> None:
+        self.name = f"{PREFIX}_{name}"
+        self.help = help
+        self.labelnames = labelnames
+        self.buckets = buckets
+        # labels -> (per-bucket counts incl. +Inf, sum)
+        self._values: dict[tuple[str, ...], tuple[list[int], float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels: str) -> None:
+        with self._lock:
+            counts, total = self._values.get(labels) or ([0] * (len(self.buckets) + 1), 0.0)
+            counts[bisect.bisect_left(self.buckets, value)] += 1
+            self._values[labels] = (counts, total + value)
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((k, (list(c), s)) for k, (c, s) in self._values.items())
+        for labels, (counts, total) in items:
+            cumulative = 0
+            for bound, n in zip((*self.buckets, float("inf")), counts):
+                cumulative += n
+                le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                lines.append(
+                    f"{self.name}_bucket{_labels((*self.labelnames, 'le'), (*labels, le))} {cumulative}"
+                )
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {total:.6f}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {cumulative}")
+        return lines
+
+
+REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds", "HTTP request latency.", ("method", "route", "status")
+)
+STAGE_SECONDS = Histogram("stage_duration_seconds", "Time spent per request stage.", ("stage",))
+UPSTREAM_SECONDS = Histogram("upstream_duration_seconds", "Upstream call latency.", ("upstream",))
+UPSTREAM_ERRORS = Counter("upstream_errors_total", "Failed upstream calls.", ("upstream", "kind"))
+
+_METRICS = (REQUEST_SECONDS, STAGE_SECONDS, UPSTREAM_SECONDS, UPSTREAM_ERRORS)
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Time a block as request stage `name`."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        STAGE_SECONDS.observe(elapsed, name)
+        stages = _stages.get()
+        if stages is not None:
+            stages.append((name, elapsed))
+
+
+def observe_upstream(upstream: str, seconds: float) -> None:
+    UPSTREAM_SECONDS.observe(seconds, upstream)
+
+
+def count_upstream_error(upstream: str, exc: BaseException) -> None:
+    UPSTREAM_ERRORS.inc(upstream, type(exc).__name__)
+
+
+def gauge_lines(name: str, help: str, samples: list[tuple[dict, float]]) -> list[str]:
+    """Exposition lines for one gauge family: samples are (labels, value)."""
+    full = f"{PREFIX}_{name}"
+    lines = [f"# HELP {full} {help}", f"# TYPE {full} gauge"]
+    for labels, value in samples:
+        lines.append(f"{full}{_labels(tuple(labels), tuple(labels.values()))} {value:g}")
+    return lines
+
+
+def counter_lines(name: str, help: str, samples: list[tuple[dict, float]]) -> list[str]:
+    """Exposition lines for one counter family (name gets the _total suffix)."""
+    full = f"{PREFIX}_{name}_total"
+    lines = [f"# HELP {full} {help}", f"# TYPE {full} counter"]
+    for labels, value in samples:
+        lines.append(f"{full}{_labels(tuple(labels), tuple(labels.values()))} {value:g}")
+    return lines
+
+
+def render() -> str:
+    lines: list[str] = []
+    for metric in _METRICS:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+def server_timing(stages: list[tuple[str, float]], total: float) -> str:
+    """Server-Timing header value; repeated stages are summed."""
+    merged: dict[str, float] = {}
+    for name, seconds in stages:
+        merged[name] = merged.get(name, 0.0) + seconds
+    parts = [f"{name};dur={seconds * 1000:.1f}" for name, seconds in merged.items()]
+    parts.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(parts)
+
+
+def _route_label(scope: Scope) -> str:
+    """Route template for the request path ("/analyze/audio/{audio_id}"), bounded cardinality."""
+    if scope.get("route") is None:
+        return "unmatched"
+    # Rebuilt from the path: routers included with a prefix keep only their own part in route.path
+    path = scope["path"]
+    for name, value in (scope.get("path_params") or {}).items():
+        head, sep, tail = path.rpartition(str(value))
+        if sep:
+            path = f"{head}{{{name}}}{tail}"
+    return path
+
+
+class ServerTimingMiddleware:
+    """Per-request stage collection, Server-Timing header, request latency histogram."""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        stages: list[tuple[str, float]] = []
+        token = _stages.set(stages)
+        start = time.perf_counter()
+        status = 500
+
+        async def send_with_timing(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = list(message.get("headers", []))
+                value = server_timing(stages, time.perf_counter() - start)
+                headers.append((b"server-timing", value.encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _stages.reset(token)
+            REQUEST_SECONDS.observe(
+                time.perf_counter() - start, scope.get("method", ""), _route_label(scope), str(status)
+            )
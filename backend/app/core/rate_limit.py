@@ -0,0 +1,129 @@
+"""
+Adaptive token bucket with an admission deadline.
+
+Every upstream call takes a token first. Tokens refill at `rate` per second
+up to `burst`; a caller that finds the bucket empty is queued for the time
+its token will take to arrive. When that wait would run past the caller's
+deadline, or too many callers are already queued, it is rejected at once
+with RateLimited instead of piling onto a quota that is already exhausted.
+
+The rate adapts AIMD-style to what the upstream reports:
+  - throttled (429):  rate is multiplied by `decrease` (not below min_rate),
+                      and a retry-after hint pauses admission until it passes
+  - success:          rate grows by `increase` per call (up to max_rate)
+
+State is per process, not shared: the deployment runs one uvicorn worker.
+With WEB_CONCURRENCY > 1 the caller gives each worker an equal share of the
+budget, but each still adapts to the 429s it sees on its own.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import Optional
+
+from app.core.exceptions import AppException
+
+
+class RateLimited(AppException):
+    """Admission refused: the wait for a token would exceed the caller's deadline."""
+
+    def __init__(self, message: str, retry_after: Optional[float] = None) -> None:
+        super().__init__(message, status_code=503)
+        self.retry_after = retry_after
+
+
+class AdaptiveTokenBucket:
+    """Token bucket whose refill rate follows observed throttling."""
+
+    def __init__(
+        self,
+        max_rate: float,
+        burst: float,
+        min_rate: float = 0.1,
+        decrease: float = 0.5,
+        increase: Optional[float] = None,
+        max_queue: int = 100,
+    ) -> None:
+        self.max_rate = max_rate
+        self.min_rate = min(min_rate, max_rate)
+        self.rate = max_rate
+        self.burst = max(1.0, burst)
+        self.decrease = decrease
+        self.increase = increase if increase is not None else max_rate / 20
+        self.max_queue = max_queue
+        self.tokens = self.burst
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self.waiting = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.throttled = 0
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.burst, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, deadline: float) -> None:
+        """Wait for a token; raise RateLimited if it cannot arrive by deadline (monotonic time)."""
+        now = time.monotonic()
+        self._refill(now)
+        # Tokens may go negative: each queued caller holds a reservation
+        self.tokens -= 1
+        wait = max(-self.tokens / self.rate, self._paused_until - now, 0.0)
+        if now + wait > deadline or (wait > 0 and self.waiting >= self.max_queue):
+            self.tokens += 1
+            self.rejected += 1
+            raise RateLimited("Upstream rate limit reached", retry_after=wait)
+        if wait <= 0:
+            self.admitted += 1
+            return
+        self.waiting += 1
+        admitted = False
+        try:
+            await asyncio.sleep(wait)
+            # A throttle reported while we slept may have paused admission further
+            pause = self._paused_until - time.monotonic()
+            if pause > 0:
+                if time.monotonic() + pause > deadline:
+                    self.rejected += 1
+                    raise RateLimited("Upstream rate limit reached", retry_after=pause)
+                await asyncio.sleep(pause)
+            admitted = True
+            self.admitted += 1
+        finally:
+            self.waiting -= 1
+            if not admitted:
+                # Rejected or cancelled while queued: hand the reservation back
+                self.tokens += 1
+
+    def on_success(self) -> None:
+        """Additive increase after an accepted call."""
+        self._refill(time.monotonic())
+        self.rate = min(self.max_rate, self.rate + self.increase)
+
+    def on_throttle(self, retry_after: Optional[float] = None) -> None:
+        """Multiplicative decrease after a 429, plus a pause for the retry-after hint."""
+        now = time.monotonic()
+        self._refill(now)
+        self.throttled += 1
+        self.rate = max(self.min_rate, self.rate * self.decrease)
+        self.tokens = min(self.tokens, 0.0)
+        if retry_after:
+            self._paused_until = max(self._paused_until, now + retry_after)
+
+    def stats(self) -> dict:
+        """Read-only snapshot (safe from a threadpool handler): tokens are projected, not refilled."""
+        now = time.monotonic()
+        tokens = min(self.burst, self.tokens + (now - self._updated) * self.rate)
+        return {
+            "rate": round(self.rate, 3),
+            "max_rate": self.max_rate,
+            "tokens": round(tokens, 2),
+            "waiting": self.waiting,
+            "paused_for": round(max(0.0, self._paused_until - now), 2),
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "throttled": self.throttled,
+        }
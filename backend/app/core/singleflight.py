@@ -0,0 +1,52 @@
+"""
+Single-flight coalescing of concurrent identical calls.
+
+The first caller for a key starts the work; callers that arrive while it is
+in flight await the same result (or exception) instead of repeating it. The
+key is forgotten as soon as the call finishes, so nothing is cached here —
+later callers go back to the regular caches.
+
+The work runs as its own task, so a caller that disconnects (and is
+cancelled) does not cancel the call for the others still waiting on it.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from typing import Awaitable, Callable, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """One in-flight call per key; concurrent callers share its outcome."""
+
+    def __init__(self) -> None:
+        self._calls: dict[Hashable, asyncio.Future] = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        """Await fn() once per key at a time and return its result to every caller."""
+        task = self._calls.get(key)
+        if task is None:
+            self.calls += 1
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            task.add_done_callback(lambda t: self._forget(key, t))
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    def _forget(self, key: Hashable, task: asyncio.Future) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        if not task.cancelled():
+            task.exception()  # mark retrieved even if every caller went away
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": len(self._calls),
+            "calls": self.calls,
+            "coalesced": self.coalesced,
+        }
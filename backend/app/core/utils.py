@@ -8,3 +8,11 @@ def to_title_case(s: str) -> str:
     if not s or not isinstance(s, str):
         return s
     return re.sub(r"\b\w", lambda m: m.group(0).upper(), s.strip().lower())
+
+
+def format_size(n: int) -> str:
+    """Byte count for messages: "15 MB", "1.5 MB", "200 KB", "512 bytes"."""
+    for unit, scale in (("MB", 1024 * 1024), ("KB", 1024)):
+        if n >= scale:
+            return f"{round(n / scale, 1):g} {unit}"
+    return f"{n} bytes"
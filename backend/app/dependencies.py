@@ -4,23 +4,80 @@ Auth Dependencies — Supabase Token Verification
 Extracts user_id from Supabase JWT for profile routes.
 Uses remote verification via Supabase /auth/v1/user (no JWT secret needed).
 Falls back to local JWT verification if SUPABASE_JWT_SECRET is set (faster).
+Asymmetric tokens (RS256/ES256) are verified locally against the project's
+JWKS (fetched once, refreshed on key rotation) instead of calling Supabase.
+
+Verified tokens are cached by sha256(token) until the token's exp claim or
+AUTH_CACHE_TTL, whichever comes first; rejected tokens are cached for
+AUTH_NEGATIVE_TTL. Transient Supabase errors are never cached.
 """
 
 from __future__ import annotations
 
+import hashlib
+import time
 from typing import Optional
 
-import httpx
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 
+from app.clients import get_clients
 from app.config import get_settings
+from app.core.cache import LRUCache
+from app.core.jwks import JWKSCache
+from app.core.metrics import stage
 
 _security = HTTPBearer(auto_error=False)
 
+# sha256(token) -> user_id, or "" for a token that failed verification
+_token_cache: Optional[LRUCache] = None
+_jwks: Optional[JWKSCache] = None
+
+ASYMMETRIC_ALGORITHMS = ("RS256", "RS384", "RS512", "ES256", "ES384", "ES512", "EdDSA")
+
+
+class _TransientAuthError(Exception):
+    """Supabase auth could not be reached; the outcome must not be cached."""
+
+
+def _get_token_cache() -> LRUCache:
+    global _token_cache
+    if _token_cache is None:
+        settings = get_settings()
+        _token_cache = LRUCache(maxsize=settings.auth_cache_size, ttl=settings.auth_cache_ttl)
+    return _token_cache
+
+
+def token_cache_stats() -> dict:
+    """Verified-token cache counters (for /health)."""
+    return _get_token_cache().stats()
+
+
+def _token_exp(token: str) -> Optional[float]:
+    """Unverified exp claim (only used to bound cache lifetime)."""
+    try:
+        import jwt
+
+        exp = jwt.decode(token, options={"verify_signature": False}).get("exp")
+        return float(exp) if exp is not None else None
+    except Exception:
+        return None
+
+
+def _cache_ttl(token: str) -> Optional[float]:
+    """Seconds a verified token may stay cached, or None if it must not be."""
+    ttl = get_settings().auth_cache_ttl
+    exp = _token_exp(token)
+    if exp is not None:
+        ttl = min(ttl, exp - time.time())
+    return ttl if ttl > 0 else None
+
 
-def _verify_via_supabase_api(token: str) -> Optional[str]:
-    """Verify token by calling Supabase /auth/v1/user. Returns user_id or None."""
+async def _verify_via_supabase_api(token: str) -> Optional[str]:
+    """
+    Verify token by calling Supabase /auth/v1/user. Returns user_id or None.
+    Raises _TransientAuthError when Supabase is unreachable or erroring.
+    """
     settings = get_settings()
     url = (settings.supabase_url or "").rstrip("/") + "/auth/v1/user"
     # Auth API expects anon key; fall back to service role if anon not set
@@ -28,20 +85,24 @@ def _verify_via_supabase_api(token: str) -> Optional[str]:
     if not url or not key:
         return None
     try:
-        with httpx.Client(timeout=10.0) as client:
-            r = client.get(
-                url,
-                headers={
-                    "Authorization": f"Bearer {token}",
-                    "apikey": key,
-                },
-            )
-        if r.status_code == 200:
-            data = r.json()
-            uid = data.get("id")
-            return str(uid) if uid else None
-    except Exception:
-        pass
+        client = (await get_clients()).http
+        r = await client.get(
+            url,
+            headers={
+                "Authorization": f"Bearer {token}",
+                "apikey": key,
+            },
+        )
+    except Exception as e:
+        raise _TransientAuthError(str(e))
+    if r.status_code >= 500 or r.status_code == 429:
+        raise _TransientAuthError(f"Supabase auth returned {r.status_code}")
+    if r.status_code == 200:
+        try:
+            uid = r.json().get("id")
+        except Exception:
+            return None
+        return str(uid) if uid else None
     return None
 
 
@@ -68,6 +129,56 @@ def _verify_via_jwt(token: str) -> Optional[str]:
         return None
 
 
+def _get_jwks() -> Optional[JWKSCache]:
+    """JWKS cache for this project, or None if no JWKS source is configured."""
+    global _jwks
+    if _jwks is None:
+        settings = get_settings()
+        url = settings.supabase_jwks_url
+        if not url and settings.supabase_url:
+            url = settings.supabase_url.rstrip("/") + "/auth/v1/.well-known/jwks.json"
+        if not url:
+            return None
+        _jwks = JWKSCache(
+            url,
+            refresh_interval=settings.jwks_refresh_interval,
+            max_age=settings.jwks_max_age,
+        )
+    return _jwks
+
+
+async def _verify_via_jwks(token: str) -> Optional[str]:
+    """Verify an asymmetric token locally against the JWKS. Returns user_id or None."""
+    try:
+        import jwt
+    except ImportError:
+        return None
+    try:
+        header = jwt.get_unverified_header(token)
+    except Exception:
+        return None
+    alg = header.get("alg")
+    if alg not in ASYMMETRIC_ALGORITHMS:
+        return None
+    jwks = _get_jwks()
+    if jwks is None:
+        return None
+    signing_key = await jwks.get_key(header.get("kid"))
+    if signing_key is None:
+        return None
+    try:
+        payload = jwt.decode(
+            token,
+            signing_key.key,
+            audience="authenticated",
+            algorithms=[alg],
+        )
+        sub = payload.get("sub")
+        return str(sub) if sub else None
+    except Exception:
+        return None
+
+
 async def get_optional_user_id(
     credentials: Optional[HTTPAuthorizationCredentials] = Depends(_security),
 ) -> Optional[str]:
@@ -75,12 +186,29 @@ async def get_optional_user_id(
     if not credentials or not credentials.credentials:
         return None
     token = credentials.credentials
-    # Prefer local JWT verification (faster) if secret is set
-    user_id = _verify_via_jwt(token)
+    cache = _get_token_cache()
+    token_key = hashlib.sha256(token.encode()).hexdigest()
+    cached = cache.get(token_key)
+    if cached is not None:
+        return cached or None
+
+    # Prefer local verification (faster): shared secret (HS256), then JWKS
+    with stage("auth"):
+        user_id = _verify_via_jwt(token) or await _verify_via_jwks(token)
+        if not user_id:
+            # Fall back to Supabase API (no JWT secret needed)
+            try:
+                user_id = await _verify_via_supabase_api(token)
+            except _TransientAuthError:
+                return None
+
     if user_id:
-        return user_id
-    # Fall back to Supabase API (no JWT secret needed)
-    return _verify_via_supabase_api(token)
+        ttl = _cache_ttl(token)
+        if ttl is not None:
+            cache.set(token_key, user_id, ttl=ttl)
+    else:
+        cache.set(token_key, "", ttl=get_settings().auth_negative_ttl)
+    return user_id
 
 
 async def get_required_user_id(
@@ -3,10 +3,15 @@ FoodFinder.AI Backend — FastAPI Application
 
 Endpoints:
   GET  /            — Root (alive check)
-  POST /analyze     — Analyze food label image (multipart: image + include_audio)
+  POST /analyze     — Analyze food label image (multipart: image + include_audio [+ mode])
+  POST /analyze/batch — Analyze several label images with one profile (multipart: images[])
+  GET  /analyze/audio/{id} — Stream the TTS summary MP3 (Range supported)
   GET  /user/profile — Get user profile (auth required)
   PUT  /user/profile — Update user profile (auth required)
   GET  /health      — Health check
+  GET  /metrics     — Prometheus metrics (stage/request latency, upstream errors, caches)
+
+Every response carries a Server-Timing header with per-stage durations.
 """
 
 from __future__ import annotations
@@ -59,8 +64,15 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 
+from app.clients import close_clients, init_clients
+from app.config import get_settings
+from app.core.body_limit import BodySizeLimitMiddleware
+from app.core.metrics import ServerTimingMiddleware
+from app.services.cache_maintenance import start_sweeper, stop_sweeper
+from app.services.cache_writer import start_writer, stop_writer
+
 try:
-    from app.routes import analyze, health, user
+    from app.routes import analyze, health, metrics, user
     logger.info("All route modules imported successfully")
 except Exception as exc:
     logger.exception("FATAL — failed to import route modules: %s", exc)
@@ -71,8 +83,22 @@ async def lifespan(app: FastAPI):
     """Startup/shutdown lifecycle."""
     port = os.environ.get("PORT", "?")
     logger.info("App is alive — listening on PORT=%s", port)
+    await init_clients()
+    logger.info("Upstream clients initialised")
+    workers = get_settings().web_concurrency
+    if workers > 1:
+        logger.warning(
+            "WEB_CONCURRENCY=%d: the Gemini limiter and circuit breakers are per process; "
+            "each worker gets 1/%d of GEMINI_RATE_LIMIT and backs off on 429s on its own",
+            workers, workers,
+        )
+    start_sweeper()
+    start_writer()
     yield
     logger.info("Shutting down...")
+    await stop_writer()
+    await stop_sweeper()
+    await close_clients()
 
 
 app = FastAPI(
@@ -83,6 +109,18 @@ app = FastAPI(
     redirect_slashes=False,
 )
 
+# ---------------------------------------------------------------------------
+# Upload size limit — enforced while the body streams in (added before CORS so
+# 413 responses still carry CORS headers)
+# ---------------------------------------------------------------------------
+app.add_middleware(BodySizeLimitMiddleware, limit_for=analyze.upload_limit)
+
+# ---------------------------------------------------------------------------
+# Stage timing — Server-Timing header + request latency histogram (outermost
+# of the two, so rejected uploads are measured too)
+# ---------------------------------------------------------------------------
+app.add_middleware(ServerTimingMiddleware)
+
 # ---------------------------------------------------------------------------
 # CORS — allow all origins (credentials=False so wildcard is valid per spec)
 # ---------------------------------------------------------------------------
@@ -110,5 +148,6 @@ async def root():
 app.include_router(analyze.router, prefix="/analyze", tags=["analyze"])
 app.include_router(user.router)
 app.include_router(health.router, prefix="/health", tags=["health"])
+app.include_router(metrics.router, prefix="/metrics", tags=["health"])
 
 logger.info("All routers registered. App ready.")
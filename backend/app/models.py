@@ -2,7 +2,7 @@
 
 from __future__ import annotations
 
-from typing import Optional
+from typing import Literal, Optional
 
 from pydantic import BaseModel, Field
 
@@ -34,4 +34,91 @@ class AnalyzeResult(BaseModel):
     brand: Optional[str] = None
     ingredients: Optional[list[str]] = None
     confidence: Optional[str] = None
-    audio_base64: Optional[str] = None
+    # Set when include_audio=true: fetch/stream the MP3 from audio_url
+    audio_id: Optional[str] = None
+    audio_url: Optional[str] = None
+
+
+class BatchItemResult(BaseModel):
+    """One image of a batch: either a result or an error."""
+
+    index: int
+    filename: Optional[str] = None
+    status_code: int = 200
+    result: Optional[AnalyzeResult] = None
+    error: Optional[str] = None
+
+
+class BatchAnalyzeResult(BaseModel):
+    items: list[BatchItemResult] = Field(default_factory=list)
+    succeeded: int = 0
+    failed: int = 0
+
+
+# ---------------------------------------------------------------------------
+# Gemini structured output (response_schema) — what the model must return
+# ---------------------------------------------------------------------------
+
+RiskLevel = Literal["Low Risk", "Medium Risk", "High Risk"]
+
+
+class GeminiFlag(BaseModel):
+    ingredient: str
+    risk_level: RiskLevel
+    reasons: list[str]
+    severity: float = Field(ge=0.0, le=1.0)
+
+
+class VisionOutput(BaseModel):
+    product_name: str
+    brand: Optional[str] = None
+    ingredients: list[str]
+    confidence: Literal["high", "medium", "low"]
+
+
+class AnalysisOutput(BaseModel):
+    score: int = Field(ge=0, le=100)
+    risk_classification: RiskLevel
+    flagged_ingredients: list[GeminiFlag]
+    summary: str
+
+
+class LabelOutput(AnalysisOutput, VisionOutput):
+    """Fused mode: product info and analysis in one object."""
+
+
+class IngredientAssessment(BaseModel):
+    ingredient: str
+    flagged: bool
+    category: Optional[Literal["allergy", "diet", "health", "goal"]] = None
+    risk_level: RiskLevel
+    reasons: list[str]
+    severity: float = Field(ge=0.0, le=1.0)
+
+
+class AssessmentOutput(BaseModel):
+    assessments: list[IngredientAssessment]
+
+
+# Profile-agnostic ingredient properties (product fact cache; scored per profile by scoring.py)
+IngredientProperty = Literal[
+    # Allergens (same names as the profile's allergy options)
+    "peanuts", "tree_nuts", "milk", "eggs", "wheat", "soy", "fish", "shellfish",
+    "sesame", "corn", "sulfites",
+    # Diet compatibility
+    "gluten", "not_vegan", "not_vegetarian", "not_halal", "not_kosher", "not_keto", "not_paleo",
+    # Nutrition / health
+    "added_sugar", "high_glycemic", "artificial_sweetener", "high_sodium", "saturated_fat",
+    "trans_fat", "high_cholesterol", "high_purine", "high_phosphorus", "high_potassium",
+    "high_fodmap", "refined_grain", "artificial_color", "preservative", "ultra_processed",
+    "alcohol", "caffeine",
+]
+
+
+class IngredientProperties(BaseModel):
+    ingredient: str
+    properties: list[IngredientProperty]
+
+
+class PropertiesOutput(BaseModel):
+    ingredients: list[IngredientProperties]
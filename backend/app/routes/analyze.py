@@ -1,33 +1,96 @@
 """
 POST /analyze — Food label image analysis.
+POST /analyze/batch — Several label images, one profile, analyzed concurrently.
+GET  /analyze/audio/{audio_id} — MP3 of a result summary (streamed, Range-capable).
 
-Accepts multipart form: image file + include_audio (true/false).
+Accepts multipart form: image file + include_audio (true/false) + optional mode
+("sequential": vision call then analysis call; "fused": one multimodal call
+that returns both — default ANALYZE_MODE).
 Returns AnalyzeResult (score, risk_classification, flagged_ingredients, summary, etc.).
-Uses Gemini for vision + analysis. Caches results by (ingredients, profile) hash.
+Uses Gemini for vision + analysis. Caches vision by image digest and analysis
+by (ingredients, profile) hash. Concurrent requests for the same image digest
+or the same analysis key share one in-flight Gemini call (single-flight).
+Ingredient names are canonicalized (ingredient_canon.py) before cache keys.
+Profiles with only allergies and known diets are scored offline (diet_rules.py);
+other profiles made of known entries are scored locally from cached,
+profile-agnostic product properties (product_facts.py).
+Analysis cache writes are queued off the response path (cache_writer.py).
+Each step is timed as a stage (Server-Timing header, /metrics histograms).
 """
 
 from __future__ import annotations
 
-import base64
+import asyncio
 import json
+import math
+import re
 from typing import Optional
 
-from fastapi import APIRouter, Depends, File, Form, HTTPException, status, UploadFile
+from fastapi import APIRouter, Depends, File, Form, Header, HTTPException, Response, status, UploadFile
+from fastapi.responses import StreamingResponse
+from google.genai import errors as genai_errors
 
+from app.config import get_settings
+from app.core.circuit_breaker import CircuitOpen
+from app.core.metrics import stage
+from app.core.rate_limit import RateLimited
+from app.core.singleflight import SingleFlight
+from app.core.utils import format_size
 from app.dependencies import get_optional_user_id
-from app.models import AnalyzeResult, FlaggedIngredient
-from app.services.gemini_service import analyze_vision, analyze_ingredients
+from app.models import AnalyzeResult, BatchAnalyzeResult, BatchItemResult, FlaggedIngredient
+from app.services.gemini_service import (
+    DEFAULT_MODEL,
+    VISION_PROMPT_VERSION,
+    analyze_label,
+    analyze_vision,
+    analyze_ingredients,
+)
 from app.services.supabase_service import (
     get_user_profile,
     cache_key,
+    profile_hash,
     get_cached_analysis,
-    set_cached_analysis,
+    get_cached_analyses,
+)
+from app.services import (
+    audio_cache,
+    cache_writer,
+    diet_rules,
+    ingredient_cache,
+    ingredient_canon,
+    product_facts,
+)
+from app.services.elevenlabs_service import (
+    get_registered,
+    register_summary,
+    stream_speech,
 )
-from app.services.elevenlabs_service import text_to_speech
+from app.services.image_preprocess import prepare_image, upload_limit as image_upload_limit
+from app.services.vision_cache import image_digest, get_cached_vision, set_cached_vision
 from app.services.allergen_check import check_allergens, merge_allergen_flags
+from app.services.scoring import profile_scorable, score_properties
 
 router = APIRouter()
 
+ANALYZE_MODES = ("sequential", "fused")
+
+# Uploads are read in chunks so the size limit applies before the whole file is in memory
+READ_CHUNK_SIZE = 256 * 1024
+
+# In-flight Gemini work, keyed by vision digest / analysis cache key
+_vision_flight = SingleFlight()
+_analysis_flight = SingleFlight()
+
+
+def upload_limit(scope) -> Optional[int]:
+    """Body size limit for BodySizeLimitMiddleware (POST /analyze routes only)."""
+    return image_upload_limit(scope["path"], scope["method"])
+
+
+def flight_stats() -> dict:
+    """Single-flight counters for /health."""
+    return {"vision": _vision_flight.stats(), "analysis": _analysis_flight.stats()}
+
 
 def _build_result(
     vision: dict,
@@ -36,6 +99,11 @@ def _build_result(
 ) -> dict:
     """Build AnalyzeResult dict from vision + analysis."""
     ingredients_display = vision.get("ingredients_display") or vision.get("ingredients", [])
+    if get_settings().ingredient_canon:
+        # Flags and summary name ingredients as printed on this label, not canonically
+        analysis = ingredient_canon.restore_names(
+            analysis, vision.get("ingredients") or ingredients_display
+        )
     flagged = [
         FlaggedIngredient(
             ingredient=f.get("ingredient", ""),
@@ -46,11 +114,10 @@ def _build_result(
         for f in analysis.get("flagged_ingredients", [])
     ]
     summary = analysis.get("summary", "Analysis complete.")
-    audio_b64: Optional[str] = None
+    audio_id: Optional[str] = None
     if include_audio and summary:
-        audio_bytes = text_to_speech(summary)
-        if audio_bytes:
-            audio_b64 = base64.b64encode(audio_bytes).decode("utf-8")
+        # Audio is not synthesized here — the client streams it from audio_url
+        audio_id = register_summary(summary)
     return {
         "score": analysis.get("score", 100),
         "risk_classification": analysis.get("risk_classification", "Low Risk"),
@@ -62,7 +129,8 @@ def _build_result(
         "brand": vision.get("brand"),
         "ingredients": ingredients_display,
         "confidence": vision.get("confidence"),
-        "audio_base64": audio_b64,
+        "audio_id": audio_id,
+        "audio_url": f"/analyze/audio/{audio_id}" if audio_id else None,
     }
 
 
@@ -81,38 +149,60 @@ def _ensure_list(val) -> list:
     return []
 
 
-@router.post("", response_model=AnalyzeResult)
-@router.post("/", response_model=AnalyzeResult, include_in_schema=False)
-async def analyze(
-    image: UploadFile = File(...),
-    include_audio: str = Form("false"),
-    profile_json: Optional[str] = Form(None),  # Fallback: profile from frontend
-    user_id: Optional[str] = Depends(get_optional_user_id),
-):
-    """
-    Analyze a food label image.
-
-    - **image**: Image file (JPEG/PNG)
-    - **include_audio**: "true" to generate TTS summary
+def _gemini_error(e: Exception, stage: str) -> HTTPException:
+    """Map a Gemini failure to the HTTP error returned to the client."""
+    if isinstance(e, ValueError):
+        return HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+        )
+    if isinstance(e, CircuitOpen):
+        return HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Gemini is temporarily unavailable. Please try again shortly.",
+            headers={"Retry-After": str(max(1, math.ceil(e.retry_after)))},
+        )
+    if isinstance(e, RateLimited) or (isinstance(e, genai_errors.APIError) and e.code == 429):
+        retry_after = getattr(e, "retry_after", None)
+        return HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Gemini API rate limit reached. Please wait a minute and try again.",
+            headers={"Retry-After": str(math.ceil(retry_after or 60))},
+        )
+    return HTTPException(
+        status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+        detail=f"{stage} failed: {e}",
+    )
 
-    Returns score, risk_classification, flagged_ingredients, summary, product info.
-    """
-    include_audio_bool = include_audio.lower() in ("true", "1", "yes")
 
-    # Validate image
+async def _read_image(image: UploadFile) -> tuple[bytes, str]:
+    """Validate and read an uploaded image. Returns (bytes, mime type)."""
     if not image.content_type or not image.content_type.startswith("image/"):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="File must be an image (JPEG, PNG, etc.)",
         )
 
+    max_bytes = get_settings().max_upload_bytes
+    chunks: list[bytes] = []
+    size = 0
     try:
-        image_bytes = await image.read()
+        while chunk := await image.read(READ_CHUNK_SIZE):
+            size += len(chunk)
+            if size > max_bytes:
+                raise HTTPException(
+                    status_code=413,  # Content Too Large (constant name varies by Starlette version)
+                    detail=f"Image too large (max {format_size(max_bytes)})",
+                )
+            chunks.append(chunk)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"Failed to read image: {e}",
         )
+    image_bytes = b"".join(chunks)
 
     if not image_bytes:
         raise HTTPException(
@@ -120,30 +210,12 @@ async def analyze(
             detail="Image file is empty",
         )
 
-    mime = image.content_type or "image/jpeg"
+    return image_bytes, image.content_type or "image/jpeg"
 
-    # 1. Vision extraction (always run — not cached)
-    try:
-        vision = analyze_vision(image_bytes, mime_type=mime)
-    except ValueError as e:
-        raise HTTPException(
-            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-            detail=str(e),
-        )
-    except Exception as e:
-        err_msg = str(e)
-        if "429" in err_msg or "RESOURCE_EXHAUSTED" in err_msg:
-            raise HTTPException(
-                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-                detail="Gemini API rate limit reached. Please wait a minute and try again.",
-            )
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Vision analysis failed: {e}",
-        )
 
-    ingredients = vision.get("ingredients") or vision.get("ingredients_display") or []
-    profile = get_user_profile(user_id)
+async def _resolve_profile(user_id: Optional[str], profile_json: Optional[str]) -> dict:
+    """Stored profile for user_id, merged with the profile sent by the client."""
+    profile = await get_user_profile(user_id)
 
     # Merge with profile from request (fallback when auth/DB fails)
     if profile_json:
@@ -158,49 +230,443 @@ async def analyze(
                         profile = {**profile, key: merged}
         except json.JSONDecodeError:
             pass
+    return profile
 
-    # 2. Check cache (analysis only — keyed by ingredients + profile)
-    key = cache_key(ingredients, profile)
-    cached = get_cached_analysis(key)
-    if cached:
-        # Run deterministic allergen check on cached result too (in case cache was wrong)
-        det_flags = check_allergens(ingredients, profile.get("allergies") or [])
-        cached = merge_allergen_flags(cached, det_flags)
-        return AnalyzeResult(**_build_result(vision, cached, include_audio_bool))
-
-    # 3. Run Gemini analysis
+
+async def _vision_key(image_bytes: bytes) -> str:
+    return await image_digest(image_bytes, f"{DEFAULT_MODEL}:{VISION_PROMPT_VERSION}")
+
+
+async def _get_vision(image_bytes: bytes, mime: str) -> dict:
+    """
+    Vision extraction (cached by image digest + model + prompt version).
+
+    The digest is taken over the upload as received, so a cache hit skips
+    preprocessing; only misses are downscaled/re-encoded before Gemini.
+    """
+    vision_key = await _vision_key(image_bytes)
+
+    async def _load() -> dict:
+        with stage("vision_cache"):
+            vision = await get_cached_vision(vision_key)
+        if vision is None:
+            with stage("preprocess"):
+                payload, payload_mime = await prepare_image(image_bytes, mime)
+            try:
+                with stage("gemini_vision"):
+                    vision = await analyze_vision(payload, mime_type=payload_mime, model=DEFAULT_MODEL)
+            except Exception as e:
+                raise _gemini_error(e, "Vision analysis")
+            await set_cached_vision(vision_key, vision)
+        return vision
+
+    return await _vision_flight.do(vision_key, _load)
+
+
+def _ingredients_of(vision: dict) -> list[str]:
+    """
+    Normalized ingredient list from a vision result: canonical names
+    (ingredient_canon.py) so OCR variants of one label share cache keys.
+    _build_result maps them back to the label's names for display.
+    """
+    ingredients = vision.get("ingredients") or vision.get("ingredients_display") or []
+    if not get_settings().ingredient_canon:
+        return ingredients
+    return ingredient_canon.canonicalize_list(ingredients)
+
+
+def _apply_allergen_check(analysis: dict, ingredients: list[str], profile: dict) -> dict:
+    """Deterministic allergen check — catch allergens Gemini (or the cache) missed."""
+    det_flags = check_allergens(ingredients, profile.get("allergies") or [])
+    return merge_allergen_flags(analysis, det_flags)
+
+
+async def _run_analysis(ingredients: list[str], profile: dict, key: str) -> dict:
+    """Gemini analysis + allergen check, then cache the result under key."""
     try:
-        analysis = analyze_ingredients(ingredients, profile)
-    except ValueError as e:
-        raise HTTPException(
-            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-            detail=str(e),
-        )
+        if get_settings().incremental_analysis:
+            # Per-ingredient verdicts: Gemini sees only ingredients new for this profile
+            analysis = await ingredient_cache.analyze(ingredients, profile)
+        else:
+            with stage("gemini_analysis"):
+                analysis = await analyze_ingredients(ingredients, profile)
     except Exception as e:
-        err_msg = str(e)
-        if "429" in err_msg or "RESOURCE_EXHAUSTED" in err_msg:
-            raise HTTPException(
-                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-                detail="Gemini API rate limit reached. Please wait a minute and try again.",
-            )
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Analysis failed: {e}",
-        )
+        raise _gemini_error(e, "Analysis")
+
+    with stage("allergen_check"):
+        analysis = _apply_allergen_check(analysis, ingredients, profile)
+    await cache_writer.write_analysis(key, _cache_payload(analysis))
+    return analysis
+
+
+def _rule_analysis(ingredients: list[str], profile: dict) -> Optional[dict]:
+    """
+    Offline verdict for allergy/diet-only profiles (None: ask the cache, then Gemini).
+
+    Cheaper than a cache read and never stale against the rule set, so these
+    results are neither looked up in nor written to analysis_cache.
+    """
+    if not get_settings().diet_rules:
+        return None
+    with stage("diet_rules"):
+        analysis = diet_rules.evaluate(ingredients, profile)
+    return analysis and _apply_allergen_check(analysis, ingredients, profile)
+
+
+def _scores_locally(profile: dict) -> bool:
+    """True if the profile is scored from product properties instead of analysis_cache."""
+    return get_settings().product_facts and profile_scorable(profile)
 
-    # 3b. Deterministic allergen check — catch allergens Gemini may have missed
-    allergies = profile.get("allergies") or []
-    det_flags = check_allergens(ingredients, allergies)
-    analysis = merge_allergen_flags(analysis, det_flags)
 
-    # 4. Cache analysis (without audio — audio is generated per-request if requested)
-    cache_payload = {
+async def _product_analysis(ingredients: list[str], profile: dict) -> dict:
+    """
+    Product properties (one Gemini call per product, shared by every profile)
+    scored locally for this profile, + allergen check.
+    """
+    key = product_facts.product_key(ingredients)
+
+    async def _load() -> dict:
+        try:
+            return await product_facts.get_properties(ingredients, key)
+        except Exception as e:
+            raise _gemini_error(e, "Analysis")
+
+    properties = await _analysis_flight.do(("product", key), _load)
+    with stage("local_scoring"):
+        analysis = score_properties(ingredients, properties, profile)
+    return _apply_allergen_check(analysis, ingredients, profile)
+
+
+def _cache_payload(analysis: dict) -> dict:
+    """Cached analysis (without audio — audio is generated per-request if requested)."""
+    return {
         "score": analysis["score"],
         "risk_classification": analysis["risk_classification"],
         "flagged_ingredients": analysis["flagged_ingredients"],
         "summary": analysis["summary"],
     }
-    set_cached_analysis(key, cache_payload)
+
+
+async def _get_analysis(ingredients: list[str], profile: dict, key: str) -> dict:
+    """
+    Rule verdict, else local scoring of product properties, else cached
+    analysis for key, else Gemini — one in-flight computation per key.
+    """
+    analysis = _rule_analysis(ingredients, profile)
+    if analysis is not None:
+        return analysis
+    if _scores_locally(profile):
+        return await _product_analysis(ingredients, profile)
+
+    async def _load() -> dict:
+        with stage("analysis_cache"):
+            cached = await get_cached_analysis(key)
+        if cached:
+            # Run deterministic allergen check on cached result too (in case cache was wrong)
+            return _apply_allergen_check(cached, ingredients, profile)
+        return await _run_analysis(ingredients, profile, key)
+
+    return await _analysis_flight.do(key, _load)
+
+
+async def _get_fused(image_bytes: bytes, mime: str, profile: dict) -> tuple[dict, dict]:
+    """
+    Fused mode: (vision, analysis) from one Gemini call on a vision cache miss.
+
+    The combined response fills both the vision cache and analysis_cache,
+    so later requests hit exactly as if the two calls had been made. When
+    the diet rules decide the extracted ingredients, their verdict is
+    returned instead of Gemini's (and nothing goes to analysis_cache), as
+    on every later scan. On a vision hit this is the sequential path, and so
+    it is for profiles scored locally from product properties: a fused
+    verdict would differ from what every repeat scan returns.
+    """
+    if _scores_locally(profile):
+        with stage("vision"):
+            vision = await _get_vision(image_bytes, mime)
+        ingredients = _ingredients_of(vision)
+        return vision, await _get_analysis(ingredients, profile, cache_key(ingredients, profile))
+
+    vision_key = await _vision_key(image_bytes)
+    with stage("vision_cache"):
+        vision = await get_cached_vision(vision_key)
+    if vision is not None:
+        ingredients = _ingredients_of(vision)
+        return vision, await _get_analysis(ingredients, profile, cache_key(ingredients, profile))
+
+    async def _load() -> tuple[dict, dict]:
+        with stage("preprocess"):
+            payload, payload_mime = await prepare_image(image_bytes, mime)
+        try:
+            with stage("gemini_label"):
+                vision, analysis = await analyze_label(
+                    payload, profile, mime_type=payload_mime, model=DEFAULT_MODEL
+                )
+        except Exception as e:
+            raise _gemini_error(e, "Label analysis")
+        ingredients = _ingredients_of(vision)
+        await set_cached_vision(vision_key, vision)
+        ruled = _rule_analysis(ingredients, profile)
+        if ruled is not None:
+            return vision, ruled
+        analysis = _apply_allergen_check(analysis, ingredients, profile)
+        await cache_writer.write_analysis(cache_key(ingredients, profile), _cache_payload(analysis))
+        return vision, analysis
+
+    # The analysis depends on the profile, so waiters must share image *and* profile
+    return await _vision_flight.do(("fused", vision_key, profile_hash(profile)), _load)
+
+
+@router.post("", response_model=AnalyzeResult)
+@router.post("/", response_model=AnalyzeResult, include_in_schema=False)
+async def analyze(
+    image: UploadFile = File(...),
+    include_audio: str = Form("false"),
+    profile_json: Optional[str] = Form(None),  # Fallback: profile from frontend
+    mode: Optional[str] = Form(None),
+    user_id: Optional[str] = Depends(get_optional_user_id),
+):
+    """
+    Analyze a food label image.
+
+    - **image**: Image file (JPEG/PNG)
+    - **include_audio**: "true" to generate TTS summary
+    - **mode**: "sequential" or "fused" (default: ANALYZE_MODE)
+
+    Returns score, risk_classification, flagged_ingredients, summary, product info.
+    """
+    include_audio_bool = include_audio.lower() in ("true", "1", "yes")
+    mode = (mode or get_settings().analyze_mode).strip().lower()
+    if mode not in ANALYZE_MODES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"mode must be one of: {', '.join(ANALYZE_MODES)}",
+        )
+
+    with stage("read"):
+        image_bytes, mime = await _read_image(image)
+
+    if mode == "fused":
+        # Profile first, then vision + analysis in one round trip on a miss
+        with stage("profile"):
+            profile = await _resolve_profile(user_id, profile_json)
+        with stage("fused"):
+            vision, analysis = await _get_fused(image_bytes, mime, profile)
+        return AnalyzeResult(**_build_result(vision, analysis, include_audio_bool))
+
+    # 1. Vision extraction (cached by image digest + model)
+    with stage("vision"):
+        vision = await _get_vision(image_bytes, mime)
+
+    ingredients = _ingredients_of(vision)
+    with stage("profile"):
+        profile = await _resolve_profile(user_id, profile_json)
+
+    # 2. Check cache (keyed by ingredients + profile), else Gemini analysis
+    #    (+ deterministic allergen check, + cache write); identical concurrent
+    #    requests wait on the same computation
+    key = cache_key(ingredients, profile)
+    with stage("analysis"):
+        analysis = await _get_analysis(ingredients, profile, key)
 
     return AnalyzeResult(**_build_result(vision, analysis, include_audio_bool))
 
+
+@router.post("/batch", response_model=BatchAnalyzeResult)
+async def analyze_batch(
+    images: list[UploadFile] = File(...),
+    include_audio: str = Form("false"),
+    profile_json: Optional[str] = Form(None),
+    user_id: Optional[str] = Depends(get_optional_user_id),
+):
+    """
+    Analyze several food label images against one profile.
+
+    - **images**: Image files (repeat the field, up to BATCH_MAX_IMAGES)
+    - **include_audio**: "true" to generate TTS summaries
+
+    The profile is resolved once, vision and analysis run concurrently
+    (at most BATCH_CONCURRENCY at a time), and the analysis cache is read
+    for every item in a single query. Each item carries its own result or
+    error, so one bad image does not fail the batch.
+    """
+    settings = get_settings()
+    if len(images) > settings.batch_max_images:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Too many images (max {settings.batch_max_images})",
+        )
+
+    include_audio_bool = include_audio.lower() in ("true", "1", "yes")
+    with stage("profile"):
+        profile = await _resolve_profile(user_id, profile_json)
+    limit = asyncio.Semaphore(settings.batch_concurrency)
+    errors: dict[int, HTTPException] = {}
+
+    def _record(i: int, e: Exception) -> None:
+        errors[i] = e if isinstance(e, HTTPException) else HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Analysis failed: {e}",
+        )
+
+    # 1. Vision for every image
+    async def _vision_for(image: UploadFile) -> dict:
+        async with limit:
+            image_bytes, mime = await _read_image(image)
+            return await _get_vision(image_bytes, mime)
+
+    visions: dict[int, dict] = {}
+    for i, outcome in enumerate(
+        await asyncio.gather(*(_vision_for(img) for img in images), return_exceptions=True)
+    ):
+        if isinstance(outcome, Exception):
+            _record(i, outcome)
+        else:
+            visions[i] = outcome
+
+    # 2. Offline verdicts where the rules decide; one cache multi-get for the rest
+    #    (skipped when the profile is scored locally from product properties)
+    ingredients = {i: _ingredients_of(v) for i, v in visions.items()}
+    decided = {
+        i: a for i, ing in ingredients.items() if (a := _rule_analysis(ing, profile)) is not None
+    }
+    keys = {i: cache_key(ing, profile) for i, ing in ingredients.items() if i not in decided}
+    local = _scores_locally(profile)
+    cached: dict[str, dict] = {}
+    if not local:
+        with stage("analysis_cache"):
+            cached = await get_cached_analyses(list(set(keys.values())))
+
+    # 3. Product properties or Gemini analysis for the misses (once per
+    #    distinct key, shared with concurrent /analyze requests for the same key)
+    async def _analysis_for(key: str, ingredients: list[str]) -> dict:
+        async with limit:
+            if local:
+                return await _product_analysis(ingredients, profile)
+            return await _analysis_flight.do(
+                key, lambda: _run_analysis(ingredients, profile, key)
+            )
+
+    pending: dict[str, asyncio.Task] = {}
+    for i, key in keys.items():
+        if key not in cached and key not in pending:
+            pending[key] = asyncio.ensure_future(_analysis_for(key, ingredients[i]))
+    if pending:
+        await asyncio.wait(pending.values())
+
+    # 4. Assemble per-item results
+    def _item(i: int, image: UploadFile) -> BatchItemResult:
+        if i in decided:
+            result = AnalyzeResult(**_build_result(visions[i], decided[i], include_audio_bool))
+            return BatchItemResult(index=i, filename=image.filename, result=result)
+        if i in visions:
+            vision, key = visions[i], keys[i]
+            try:
+                if key in cached:
+                    analysis = _apply_allergen_check(cached[key], ingredients[i], profile)
+                else:
+                    analysis = pending[key].result()
+                result = AnalyzeResult(**_build_result(vision, analysis, include_audio_bool))
+                return BatchItemResult(index=i, filename=image.filename, result=result)
+            except Exception as e:
+                _record(i, e)
+        err = errors[i]
+        return BatchItemResult(
+            index=i,
+            filename=image.filename,
+            status_code=err.status_code,
+            error=str(err.detail),
+        )
+
+    items = [_item(i, img) for i, img in enumerate(images)]
+    succeeded = sum(1 for item in items if item.result is not None)
+    return BatchAnalyzeResult(
+        items=items,
+        succeeded=succeeded,
+        failed=len(items) - succeeded,
+    )
+
+
+_RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def _parse_range(header: str, size: int) -> tuple[int, int]:
+    """Parse a single-range `Range` header into inclusive (start, end). Raises 416."""
+    m = _RANGE_RE.match(header.strip())
+    start, end = (m.group(1), m.group(2)) if m else ("", "")
+    if m and start:
+        first = int(start)
+        last = min(int(end), size - 1) if end else size - 1
+    elif m and end:  # suffix range: last N bytes
+        first, last = max(size - int(end), 0), size - 1
+    else:
+        first, last = 0, -1
+    if first > last or first >= size:
+        raise HTTPException(
+            status_code=416,  # Range Not Satisfiable (constant name varies by Starlette version)
+            detail="Invalid range",
+            headers={"Content-Range": f"bytes */{size}"},
+        )
+    return first, last
+
+
+def _audio_response(audio: bytes, range_header: Optional[str]) -> Response:
+    """Full or partial (206) MP3 response from complete audio bytes."""
+    headers = {"Accept-Ranges": "bytes", "Cache-Control": "private, max-age=3600"}
+    if not range_header:
+        return Response(content=audio, media_type="audio/mpeg", headers=headers)
+    first, last = _parse_range(range_header, len(audio))
+    headers["Content-Range"] = f"bytes {first}-{last}/{len(audio)}"
+    return Response(
+        content=audio[first:last + 1],
+        status_code=status.HTTP_206_PARTIAL_CONTENT,
+        media_type="audio/mpeg",
+        headers=headers,
+    )
+
+
+@router.get("/audio/{audio_id}")
+async def get_audio(
+    audio_id: str,
+    range_header: Optional[str] = Header(None, alias="Range"),
+):
+    """
+    MP3 for a result summary (audio_id from an /analyze response).
+
+    Cached clips are served whole or by byte range. Otherwise the MP3 is
+    streamed chunk by chunk as ElevenLabs produces it and cached once
+    complete; a Range request on an uncached clip gets the same streamed
+    200, so byte ranges (206) are only served from cached clips.
+    """
+    with stage("audio_cache"):
+        audio = await audio_cache.get_audio(audio_id)
+    if audio is not None:
+        return _audio_response(audio, range_header)
+
+    registered = get_registered(audio_id)
+    if registered is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Audio not found or expired",
+        )
+    text, voice_id, model_id, output_format = registered
+
+    # Any Range (browsers send "bytes=0-") gets the full streamed 200; pull
+    # the first chunk before answering so upstream failures become a 503
+    stream = stream_speech(text, voice_id=voice_id, model_id=model_id, output_format=output_format)
+    try:
+        with stage("tts_first_byte"):
+            first = await stream.__anext__()
+    except Exception:
+        await stream.aclose()
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Text-to-speech unavailable",
+        )
+
+    async def _body():
+        yield first
+        async for chunk in stream:
+            yield chunk
+
+    return StreamingResponse(_body(), media_type="audio/mpeg")
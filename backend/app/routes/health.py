@@ -1,12 +1,59 @@
-"""GET /health — Health check."""
+"""GET /health — Health check (plus in-process cache statistics)."""
 
 from fastapi import APIRouter
 
+from app import dependencies
+from app.routes.analyze import flight_stats
+from app.services import (
+    audio_cache,
+    cache_writer,
+    diet_rules,
+    elevenlabs_service,
+    gemini_service,
+    ingredient_cache,
+    ingredient_canon,
+    product_facts,
+    supabase_service,
+    vision_cache,
+)
+
 router = APIRouter()
 
 
+def cache_stats() -> dict:
+    """Statistics of every in-process cache, by name."""
+    return {
+        "analysis_l1": supabase_service.analysis_cache_stats(),
+        "profiles": supabase_service.profile_cache_stats(),
+        "vision": vision_cache.stats(),
+        "ingredients": ingredient_cache.stats(),
+        "products": product_facts.stats(),
+        "audio": audio_cache.stats(),
+        "auth_tokens": dependencies.token_cache_stats(),
+    }
+
+
+def breaker_stats() -> dict:
+    """Circuit breaker state of every upstream, by name."""
+    return {
+        "gemini": gemini_service.breaker_stats(),
+        "supabase": supabase_service.breaker_stats(),
+        "elevenlabs": elevenlabs_service.breaker_stats(),
+    }
+
+
 @router.get("")
 @router.get("/", include_in_schema=False)
-def health():
-    """Health check endpoint."""
-    return {"status": "ok"}
+async def health():
+    """Health check endpoint ("degraded" while an upstream's breaker is not closed)."""
+    breakers = breaker_stats()
+    return {
+        "status": "ok" if all(b["state"] == "closed" for b in breakers.values()) else "degraded",
+        "caches": cache_stats(),
+        "single_flight": flight_stats(),
+        "gemini_limiter": gemini_service.limiter_stats(),
+        "circuit_breakers": breakers,
+        "cache_writer": cache_writer.stats(),
+        "diet_rules": diet_rules.stats(),
+        "canonicalization": ingredient_canon.stats(),
+    }
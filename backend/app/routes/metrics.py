@@ -0,0 +1,81 @@
+"""GET /metrics — Prometheus text exposition (latencies, upstream errors, cache stats)."""
+
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from app.core import metrics
+from app.core.circuit_breaker import STATE_VALUES
+from app.routes.analyze import flight_stats
+from app.routes.health import breaker_stats, cache_stats
+from app.services import cache_writer, diet_rules, gemini_service, ingredient_canon
+
+router = APIRouter()
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Stats that only ever grow, per family; everything else is a gauge
+CACHE_COUNTERS = frozenset({
+    "hits", "misses", "evictions", "expirations", "negative_hits",
+    "memory_hits", "disk_hits", "disk_evictions",
+})
+FLIGHT_COUNTERS = frozenset({"calls", "coalesced"})
+LIMITER_COUNTERS = frozenset({"admitted", "rejected", "throttled"})
+BREAKER_COUNTERS = frozenset({"opened", "short_circuited"})
+WRITER_COUNTERS = frozenset({"queued", "coalesced", "dropped", "written", "failed", "batches"})
+RULES_COUNTERS = frozenset({"decided", "deferred_profile", "deferred_uncertain", "deferred_unknown"})
+CANON_COUNTERS = frozenset({"ingredients", "ingredients_changed", "keys", "keys_changed"})
+
+
+def _flatten(stats: dict, prefix: str = "") -> dict[str, float]:
+    """Numeric leaves of a nested stats dict, keys joined with '_'."""
+    out: dict[str, float] = {}
+    for key, value in stats.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            out.update(_flatten(value, f"{name}_"))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            out[name] = value
+    return out
+
+
+def _families(
+    family: str, label: str, groups: dict[str, dict], counters: frozenset = frozenset()
+) -> list[str]:
+    """
+    One metric family per stat name, labelled by group (cache name, flight
+    name, ...): stats in `counters` as counters, the rest as gauges.
+    """
+    by_stat: dict[str, list[tuple[dict, float]]] = {}
+    for group, stats in groups.items():
+        for stat, value in _flatten(stats).items():
+            by_stat.setdefault(stat, []).append(({label: group}, value))
+    lines: list[str] = []
+    for stat, samples in sorted(by_stat.items()):
+        lines_for = metrics.counter_lines if stat in counters else metrics.gauge_lines
+        lines.extend(lines_for(f"{family}_{stat}", f"{family} {stat}.", samples))
+    return lines
+
+
+@router.get("")
+@router.get("/", include_in_schema=False)
+async def prometheus_metrics():
+    """Metrics in the Prometheus text format."""
+    lines = _families("cache", "cache", cache_stats(), CACHE_COUNTERS)
+    lines += _families("single_flight", "flight", flight_stats(), FLIGHT_COUNTERS)
+    lines += _families(
+        "gemini_limiter", "limiter", {"gemini": gemini_service.limiter_stats()}, LIMITER_COUNTERS
+    )
+    lines += _families(
+        "circuit_breaker",
+        "upstream",
+        {name: {**b, "state": STATE_VALUES[b["state"]]} for name, b in breaker_stats().items()},
+        BREAKER_COUNTERS,
+    )
+    lines += _families(
+        "cache_writer", "table", {"analysis_cache": cache_writer.stats()}, WRITER_COUNTERS
+    )
+    lines += _families("diet_rules", "engine", {"offline": diet_rules.stats()}, RULES_COUNTERS)
+    lines += _families(
+        "canonicalization", "source", {"vision": ingredient_canon.stats()}, CANON_COUNTERS
+    )
+    return PlainTextResponse(metrics.render() + "\n".join(lines) + "\n", media_type=CONTENT_TYPE)
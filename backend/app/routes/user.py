@@ -18,7 +18,7 @@ router = APIRouter(prefix="/user", tags=["user"])
 @router.get("/profile")
 async def get_profile(user_id: str = Depends(get_required_user_id)):
     """Get the authenticated user's dietary profile."""
-    profile = get_user_profile(user_id)
+    profile = await get_user_profile(user_id)
     return {
         "user_id": user_id,
         "allergies": profile.get("allergies", []),
@@ -38,7 +38,7 @@ async def put_profile(
 
     Send JSON body with any of: allergies, dietary_restrictions, health_conditions, health_goals.
     """
-    profile = update_user_profile(
+    profile = await update_user_profile(
         user_id,
         allergies=payload.allergies,
         dietary_restrictions=payload.dietary_restrictions,
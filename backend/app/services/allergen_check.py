@@ -4,11 +4,16 @@ Deterministic allergen check — backup for Gemini.
 Maps allergy types to ingredient substrings. If any ingredient contains
 an allergen keyword, we flag it. Ensures we never miss obvious allergens
 like peanut butter when user has peanut allergy.
+
+Keywords for a profile are compiled once into an Aho-Corasick automaton
+(cached per allergy list), so each ingredient is scanned a single time
+regardless of how many allergies or keywords the profile has.
 """
 
 from __future__ import annotations
 
-from app.core.utils import to_title_case
+from collections import deque
+from functools import lru_cache
 
 # Allergy type -> substrings to match in ingredients (lowercase)
 ALLERGEN_KEYWORDS: dict[str, list[str]] = {
@@ -29,6 +34,92 @@ ALLERGEN_KEYWORDS: dict[str, list[str]] = {
 }
 
 
+# A DFA step (Python dict lookup) costs about this many C substring checks
+_SUBSTRING_COST_RATIO = 2
+
+
+class KeywordMatcher:
+    """
+    Aho-Corasick automaton over allergen keywords (also used by diet_rules.py).
+
+    Each keyword maps to the indices of the allergies it belongs to, so one
+    pass over an ingredient string yields every allergy it triggers. Failure
+    links are folded into a full transition table (a DFA), so the scan is a
+    single dict lookup per character. For short texts against few keywords a
+    flat loop of C-level substring checks is cheaper, so find() picks
+    whichever costs less for the given text.
+    """
+
+    def __init__(self, keywords: dict[str, set[int]]) -> None:
+        goto: list[dict[str, int]] = [{}]
+        out: list[set[int]] = [set()]
+        for kw, labels in keywords.items():
+            node = 0
+            for ch in kw:
+                nxt = goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(goto)
+                    goto[node][ch] = nxt
+                    goto.append({})
+                    out.append(set())
+                node = nxt
+            out[node].update(labels)
+
+        # BFS: failure links, output folding and DFA transitions in one pass
+        fail = [0] * len(goto)
+        delta: list[dict[str, int]] = [dict(goto[0])] + [{} for _ in goto[1:]]
+        queue = deque(goto[0].values())
+        while queue:
+            node = queue.popleft()
+            # Inherit transitions from the failure state, then overlay own edges
+            delta[node] = {**delta[fail[node]], **goto[node]}
+            for ch, nxt in goto[node].items():
+                fail[nxt] = delta[fail[node]].get(ch, 0)
+                out[nxt] |= out[fail[nxt]]
+                queue.append(nxt)
+
+        self._delta = delta
+        self._out = [frozenset(o) for o in out]
+        self._always = self._out[0]  # empty keyword matches everything
+        self._pairs = [(kw, frozenset(labels)) for kw, labels in keywords.items()]
+
+    def find(self, text: str) -> set[int]:
+        """Return labels of every keyword occurring in text."""
+        if len(self._pairs) < len(text) * _SUBSTRING_COST_RATIO:
+            found = set()
+            for kw, labels in self._pairs:
+                if kw in text:
+                    found |= labels
+            return found
+        delta, out = self._delta, self._out
+        found = set(self._always)
+        node = 0
+        for ch in text:
+            node = delta[node].get(ch, 0)
+            if out[node]:
+                found |= out[node]
+        return found
+
+
+def _allergy_keywords(allergy: str) -> list[str]:
+    """Keywords for an allergy; unknown allergies match on their own name."""
+    allergy_lower = allergy.lower().strip().replace(" ", "_")
+    keywords = ALLERGEN_KEYWORDS.get(allergy_lower)
+    if not keywords:
+        keywords = [allergy_lower.replace("_", " ")]
+    return keywords
+
+
+@lru_cache(maxsize=512)
+def _compile(allergies: tuple[str, ...]) -> KeywordMatcher:
+    """Build (once per distinct profile allergy list) the matcher for it."""
+    keywords: dict[str, set[int]] = {}
+    for idx, allergy in enumerate(allergies):
+        for kw in _allergy_keywords(allergy):
+            keywords.setdefault(kw, set()).add(idx)
+    return KeywordMatcher(keywords)
+
+
 def check_allergens(
     ingredients: list[str],
     allergies: list[str],
@@ -40,32 +131,30 @@ def check_allergens(
     if not allergies:
         return []
 
-    ingredients_lower = [i.lower() for i in ingredients if i]
-    flagged = []
+    allergies = tuple(allergies)
+    matcher = _compile(allergies)
+
+    # Scan each ingredient once; bucket hits (display form) by allergy.
+    # Display form = first original spelling, looked up through an index.
+    hits: list[list[str]] = [[] for _ in allergies]
+    display_by_lower: dict[str, str] = {}
+    for ing in ingredients:
+        if not ing:
+            continue
+        ing_lower = ing.lower()
+        display = display_by_lower.setdefault(ing_lower, ing)
+        for idx in matcher.find(ing_lower):
+            hits[idx].append(display)
 
-    for allergy in allergies:
-        allergy_lower = allergy.lower().strip().replace(" ", "_")
-        keywords = ALLERGEN_KEYWORDS.get(allergy_lower)
-
-        if not keywords:
-            # Unknown allergy - use the allergy name itself as keyword
-            keywords = [allergy_lower.replace("_", " ")]
-
-        for ing in ingredients_lower:
-            for kw in keywords:
-                if kw in ing:
-                    # Find display form of ingredient
-                    display = next(
-                        (i for i in ingredients if i.lower() == ing),
-                        to_title_case(ing),
-                    )
-                    flagged.append({
-                        "ingredient": display,
-                        "risk_level": "High Risk",
-                        "reasons": [f"Contains {allergy.replace('_', ' ')} - allergen for your profile"],
-                        "severity": 1.0,
-                    })
-                    break  # Don't flag same ingredient twice for same allergy
+    flagged = []
+    for allergy, matched in zip(allergies, hits):
+        for display in matched:
+            flagged.append({
+                "ingredient": display,
+                "risk_level": "High Risk",
+                "reasons": [f"Contains {allergy.replace('_', ' ')} - allergen for your profile"],
+                "severity": 1.0,
+            })
 
     return flagged
 
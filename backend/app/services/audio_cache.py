@@ -0,0 +1,172 @@
+"""
+Audio Cache — reuse ElevenLabs MP3s for repeated summaries
+
+Keyed by sha256(summary, voice_id, model_id, output_format). Cached analyses
+have identical summaries, so the same audio is served without another TTS call.
+
+  Memory: LRU of AUDIO_CACHE_MEMORY_ITEMS clips
+  Disk:   AUDIO_CACHE_DIR, LRU by access, capped at AUDIO_CACHE_MAX_BYTES
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+
+from app.config import get_settings
+from app.core.cache import LRUCache
+from app.core.concurrency import run_blocking
+
+
+def audio_key(text: str, voice_id: str, model_id: str, output_format: str) -> str:
+    """Cache key for one synthesized clip."""
+    canonical = "\0".join((text, voice_id, model_id, output_format))
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+class DiskAudioCache:
+    """Byte-capped on-disk LRU. Files are <key>.mp3; recency is tracked in memory."""
+
+    def __init__(self, directory: Path, max_bytes: int) -> None:
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self.evictions = 0
+        self._index: OrderedDict[str, int] = OrderedDict()  # key -> size, oldest first
+        self._lock = threading.Lock()
+        self._load()
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.mp3"
+
+    def _load(self) -> None:
+        """Rebuild the index from files left by a previous run (oldest first)."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        entries = []
+        for path in self.directory.glob("*.mp3"):
+            try:
+                st = path.stat()
+            except OSError:
+                continue
+            entries.append((st.st_mtime, path.stem, st.st_size))
+        for _, key, size in sorted(entries):
+            self._index[key] = size
+            self.total_bytes += size
+        self._evict()
+
+    def _evict(self) -> None:
+        while self.total_bytes > self.max_bytes and self._index:
+            key, size = self._index.popitem(last=False)
+            self.total_bytes -= size
+            self.evictions += 1
+            try:
+                self._path(key).unlink()
+            except OSError:
+                pass
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            if key not in self._index:
+                return None
+            self._index.move_to_end(key)
+        try:
+            path = self._path(key)
+            data = path.read_bytes()
+            os.utime(path)  # keep recency across restarts
+            return data
+        except OSError:
+            with self._lock:
+                size = self._index.pop(key, 0)
+                self.total_bytes -= size
+            return None
+
+    def set(self, key: str, data: bytes) -> None:
+        if len(data) > self.max_bytes:
+            return
+        path = self._path(key)
+        tmp = path.with_name(f"{key}.{threading.get_ident()}.tmp")
+        try:
+            tmp.write_bytes(data)
+            tmp.replace(path)  # atomic: readers never see partial files
+        except OSError:
+            return
+        with self._lock:
+            self.total_bytes -= self._index.pop(key, 0)
+            self._index[key] = len(data)
+            self.total_bytes += len(data)
+            self._evict()
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._index),
+            "bytes": self.total_bytes,
+            "max_bytes": self.max_bytes,
+            "evictions": self.evictions,
+        }
+
+
+_memory: Optional[LRUCache] = None
+_disk: Optional[DiskAudioCache] = None
+_init_lock = threading.Lock()
+_counters = {"memory_hits": 0, "disk_hits": 0, "misses": 0}
+
+
+def _tiers() -> tuple[LRUCache, Optional[DiskAudioCache]]:
+    global _memory, _disk
+    if _memory is None:
+        with _init_lock:
+            if _memory is None:
+                settings = get_settings()
+                directory = settings.audio_cache_dir or os.path.join(
+                    tempfile.gettempdir(), "foodfinder-audio"
+                )
+                if settings.audio_cache_max_bytes > 0:
+                    try:
+                        _disk = DiskAudioCache(Path(directory), settings.audio_cache_max_bytes)
+                    except OSError:
+                        _disk = None
+                _memory = LRUCache(maxsize=settings.audio_cache_memory_items)
+    return _memory, _disk
+
+
+async def get_audio(key: str) -> Optional[bytes]:
+    """Look up memory, then disk (promoting disk hits into memory)."""
+    memory, disk = _tiers()
+    data = memory.get(key)
+    if data is not None:
+        _counters["memory_hits"] += 1
+        return data
+    if disk is not None:
+        data = await run_blocking(disk.get, key)
+        if data is not None:
+            _counters["disk_hits"] += 1
+            memory.set(key, data)
+            return data
+    _counters["misses"] += 1
+    return None
+
+
+async def set_audio(key: str, data: bytes) -> None:
+    """Store a clip in both tiers."""
+    memory, disk = _tiers()
+    memory.set(key, data)
+    if disk is not None:
+        await run_blocking(disk.set, key, data)
+
+
+def stats() -> dict:
+    """Hit/miss counters plus per-tier sizes."""
+    memory, disk = _tiers()
+    lookups = sum(_counters.values())
+    hits = _counters["memory_hits"] + _counters["disk_hits"]
+    return {
+        **_counters,
+        "hit_ratio": round(hits / lookups, 4) if lookups else 0.0,
+        "memory": {"entries": len(memory), "maxsize": memory.maxsize},
+        "disk": disk.stats() if disk is not None else None,
+    }
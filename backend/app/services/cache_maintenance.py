@@ -0,0 +1,106 @@
+"""
+Cache Maintenance — background sweeper for the Supabase cache tables
+
+Started from the main.py lifespan. Every CACHE_SWEEP_INTERVAL seconds it:
+  1. flushes buffered analysis_cache hit counts (one RPC)
+  2. evicts analysis_cache rows in batches of CACHE_SWEEP_BATCH: expired,
+     stamped with an old model/prompt version, or least-recently-hit while
+     the table exceeds ANALYSIS_CACHE_MAX_BYTES
+  3. prunes vision_cache to VISION_CACHE_TTL / VISION_CACHE_MAX_ROWS
+  4. deletes expired or version-stale ingredient_facts and product_facts rows
+     in batches
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Optional
+
+from app.config import get_settings
+from app.services import supabase_service
+
+logger = logging.getLogger("foodfinder.cache_maintenance")
+
+# Upper bound on batches per sweep so one run cannot monopolise the database
+MAX_BATCHES_PER_SWEEP = 20
+
+_task: Optional[asyncio.Task] = None
+
+
+async def sweep_once() -> dict:
+    """Run one maintenance pass. Returns what was done."""
+    settings = get_settings()
+    flushed = await supabase_service.flush_cache_hits()
+
+    evicted = 0
+    for _ in range(MAX_BATCHES_PER_SWEEP):
+        removed = await supabase_service.sweep_analysis_cache(
+            batch_size=settings.cache_sweep_batch,
+            max_bytes=settings.analysis_cache_max_bytes,
+        )
+        evicted += removed
+        if removed < settings.cache_sweep_batch:
+            break
+
+    pruned = await supabase_service.prune_vision_cache(
+        max_age=settings.vision_cache_ttl,
+        max_rows=settings.vision_cache_max_rows,
+    )
+
+    facts_pruned = 0
+    for _ in range(MAX_BATCHES_PER_SWEEP):
+        removed = await supabase_service.prune_ingredient_facts(settings.cache_sweep_batch)
+        facts_pruned += removed
+        if removed < settings.cache_sweep_batch:
+            break
+
+    products_pruned = 0
+    for _ in range(MAX_BATCHES_PER_SWEEP):
+        removed = await supabase_service.prune_product_facts(settings.cache_sweep_batch)
+        products_pruned += removed
+        if removed < settings.cache_sweep_batch:
+            break
+
+    return {
+        "hits_flushed": flushed,
+        "analysis_evicted": evicted,
+        "vision_pruned": pruned,
+        "facts_pruned": facts_pruned,
+        "products_pruned": products_pruned,
+    }
+
+
+async def _run(interval: float) -> None:
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            result = await sweep_once()
+            if any(v for k, v in result.items() if k != "hits_flushed"):
+                logger.info("Cache sweep: %s", result)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Cache sweep failed")
+
+
+def start_sweeper() -> None:
+    """Start the background sweeper (no-op if disabled or already running)."""
+    global _task
+    interval = get_settings().cache_sweep_interval
+    if interval <= 0 or (_task is not None and not _task.done()):
+        return
+    _task = asyncio.create_task(_run(interval), name="cache-sweeper")
+
+
+async def stop_sweeper() -> None:
+    """Cancel the sweeper and flush outstanding hit counts."""
+    global _task
+    if _task is not None:
+        _task.cancel()
+        try:
+            await _task
+        except (asyncio.CancelledError, Exception):
+            pass
+        _task = None
+    await supabase_service.flush_cache_hits()
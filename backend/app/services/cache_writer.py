@@ -0,0 +1,126 @@
+"""
+Cache Writer — write-behind queue for analysis_cache upserts
+
+A cache miss used to await its analysis_cache upsert before the response
+went out. write_analysis() now updates the in-process L1 at once and queues
+the row; a background task (started from the main.py lifespan) upserts the
+queue in one request per CACHE_WRITE_BATCH rows, whenever a batch is full
+or every CACHE_WRITE_INTERVAL seconds.
+
+  - the queue is keyed by cache key: a newer result for a pending key
+    replaces the older one (one row written)
+  - at most CACHE_WRITE_QUEUE_SIZE rows wait; under pressure the oldest is
+    dropped (it is still in L1, only the Supabase copy is lost)
+  - a failed batch is not retried: the rows are cache entries and the next
+    miss recomputes them
+  - stop_writer() flushes what is left on shutdown
+
+With CACHE_WRITE_BEHIND=0, or when the writer is not running, writes go
+straight through as before.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import itertools
+import logging
+from typing import Optional
+
+from app.config import get_settings
+from app.services import supabase_service
+
+logger = logging.getLogger("foodfinder.cache_writer")
+
+_task: Optional[asyncio.Task] = None
+_pending: dict[str, dict] = {}  # cache key -> result, oldest first
+_batch_ready: Optional[asyncio.Event] = None
+_counters = {"queued": 0, "coalesced": 0, "dropped": 0, "written": 0, "failed": 0, "batches": 0}
+
+
+def _running() -> bool:
+    return _task is not None and not _task.done()
+
+
+async def write_analysis(key: str, result: dict) -> None:
+    """Cache an analysis result: L1 now, Supabase in the next batch (or now if not running)."""
+    if not _running():
+        await supabase_service.set_cached_analysis(key, result)
+        return
+    supabase_service.set_analysis_l1(key, result)
+    settings = get_settings()
+    if key in _pending:
+        del _pending[key]  # re-inserted below as the newest entry
+        _counters["coalesced"] += 1
+    elif len(_pending) >= settings.cache_write_queue_size:
+        del _pending[next(iter(_pending))]
+        _counters["dropped"] += 1
+    _pending[key] = result
+    _counters["queued"] += 1
+    if len(_pending) >= settings.cache_write_batch:
+        _batch_ready.set()
+
+
+async def flush() -> int:
+    """Upsert every queued row, CACHE_WRITE_BATCH per request. Returns rows written."""
+    batch_size = get_settings().cache_write_batch
+    written = 0
+    while _pending:
+        batch = dict(itertools.islice(_pending.items(), batch_size))
+        count = await supabase_service.upsert_analyses(batch)
+        # Dequeue only after the attempt (a cancelled flush loses nothing), and
+        # keep keys whose result was replaced while the batch was in flight
+        for key, result in batch.items():
+            if _pending.get(key) is result:
+                del _pending[key]
+        _counters["batches"] += 1
+        if count:
+            written += count
+            _counters["written"] += count
+        else:
+            _counters["failed"] += len(batch)
+    return written
+
+
+async def _run(interval: float) -> None:
+    while True:
+        try:
+            await asyncio.wait_for(_batch_ready.wait(), timeout=interval)
+        except asyncio.TimeoutError:
+            pass
+        _batch_ready.clear()
+        try:
+            await flush()
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Cache write flush failed")
+
+
+def start_writer() -> None:
+    """Start the background writer (no-op if disabled or already running)."""
+    global _task, _batch_ready
+    settings = get_settings()
+    if not settings.cache_write_behind or _running():
+        return
+    _batch_ready = asyncio.Event()
+    _task = asyncio.create_task(_run(settings.cache_write_interval), name="cache-writer")
+
+
+async def stop_writer() -> None:
+    """Stop the writer and flush the rows still queued."""
+    global _task
+    if _task is not None:
+        _task.cancel()
+        try:
+            await _task
+        except (asyncio.CancelledError, Exception):
+            pass
+        _task = None
+    written = await flush()
+    if written:
+        logger.info("Cache writer flushed %d rows on shutdown", written)
+
+
+def stats() -> dict:
+    """Queue depth and write counters for /health."""
+    return {"running": _running(), "pending": len(_pending), **_counters}
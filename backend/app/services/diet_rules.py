@@ -0,0 +1,227 @@
+"""
+Diet Rules — Offline verdicts for allergy/diet-only profiles
+
+Allergies and standard dietary restrictions are questions of ingredient
+facts, not judgement: gelatin is never vegan, barley malt is never gluten
+free. For profiles made only of those, this module flags ingredients from a
+local knowledge base (in the style of allergen_check.ALLERGEN_KEYWORDS) and
+scores the product with scoring.combine_flags, so no Gemini call is needed.
+
+evaluate() returns None — and the caller falls back to Gemini — when:
+  - the profile has health conditions or health goals (those need judgement)
+  - a restriction or allergy is not in the knowledge base (keto, paleo, ...)
+  - an ingredient is ambiguous for a restriction (natural flavors for vegan,
+    gelatin for halal, oats for gluten free): confidence is low
+
+Keywords match at the start of a word ("egg" matches "eggs", "egg whites",
+not "nutmeg"); EXEMPT_PHRASES ("cocoa butter", "eggplant", ...) and their
+plurals are rewritten before matching. Keywords are singular so they also
+match canonical names (ingredient_canon.py).
+"""
+
+from __future__ import annotations
+
+import re
+from functools import lru_cache
+from typing import Optional
+
+from app.services.allergen_check import ALLERGEN_KEYWORDS, KeywordMatcher, check_allergens
+from app.services.scoring import combine_flags
+
+# Ingredient families (lowercase word prefixes), combined into diets below
+_MEAT = [
+    "beef", "pork", "chicken", "turkey", "lamb", "mutton", "veal", "venison", "duck",
+    "goose", "bacon", "ham", "lard", "tallow", "suet", "meat", "sausage", "pepperoni",
+    "salami", "prosciutto", "chorizo", "gelatin", "gelatine", "collagen", "bone",
+    "e441", "e542",
+]
+_FISH = [
+    "fish", "anchov", "cod", "tuna", "salmon", "sardine", "mackerel", "trout",
+    "herring", "pollock", "haddock", "tilapia", "bonito", "isinglass",
+]
+_SHELLFISH = [
+    "shrimp", "prawn", "crab", "lobster", "crayfish", "shellfish", "clam", "oyster",
+    "mussel", "scallop", "squid", "octopus", "krill",
+]
+_INSECT = ["carmine", "cochineal", "e120", "shellac", "e904", "confectioner s glaze"]
+_RENNET = ["rennet"]
+_DAIRY = [
+    "milk", "whey", "casein", "caseinate", "lactose", "butter", "buttermilk", "cream",
+    "cheese", "yogurt", "yoghurt", "ghee", "curd", "lactalbumin", "lactoglobulin",
+    "e966",
+]
+_EGG = ["egg", "albumen", "ovalbumin", "lysozyme", "mayonnaise", "meringue", "e1105"]
+_BEE = ["honey", "beeswax", "e901", "royal jelly", "propolis"]
+_GLUTEN = [
+    "wheat", "gluten", "barley", "rye", "malt", "spelt", "semolina", "durum", "farro",
+    "triticale", "bulgur", "couscous", "seitan", "kamut", "einkorn", "emmer", "graham",
+    "brewer s yeast",
+]
+_PORK = ["pork", "bacon", "ham", "lard", "prosciutto", "pepperoni", "chorizo"]
+_ALCOHOL = ["alcohol", "wine", "beer", "rum", "brandy", "liqueur", "liquor", "sake", "mirin"]
+
+# Ambiguous for vegans: plant or animal origin depends on the manufacturer
+_ANIMAL_UNCERTAIN = [
+    "natural flavor", "natural flavour", "mono and diglyceride", "monoglyceride",
+    "diglyceride", "e471", "glycerin", "glycerol", "stearic acid", "vitamin d3",
+    "l cysteine", "enzyme",
+]
+
+# Restriction -> (keywords that violate it, keywords that make the verdict uncertain)
+DIET_KEYWORDS: dict[str, tuple[list[str], list[str]]] = {
+    "vegan": (
+        _MEAT + _FISH + _SHELLFISH + _INSECT + _RENNET + _DAIRY + _EGG + _BEE + ["lanolin", "e913"],
+        _ANIMAL_UNCERTAIN,
+    ),
+    "vegetarian": (
+        _MEAT + _FISH + _SHELLFISH + _INSECT + _RENNET,
+        ["enzyme", "l cysteine", "e471"],
+    ),
+    "gluten_free": (_GLUTEN, ["oat", "modified food starch", "dextrin"]),
+    "dairy_free": (_DAIRY, []),
+    "halal": (
+        _PORK + _ALCOHOL,
+        [k for k in _MEAT if k not in _PORK] + ["vanilla extract", "rennet", "l cysteine", "e471"],
+    ),
+    "kosher": (
+        _PORK + _SHELLFISH,
+        ["gelatin", "gelatine", "carmine", "e120", "rennet", "wine", "grape"],
+    ),
+}
+
+# Harmless phrases containing a keyword above -> what is left to match
+# ("oat milk" is not dairy, but its oats still matter for gluten free)
+EXEMPT_PHRASES: dict[str, str] = {
+    "cocoa butter": "cocoa", "cacao butter": "cacao", "shea butter": "shea",
+    "peanut butter": "peanut", "almond butter": "almond", "cashew butter": "cashew",
+    "nut butter": "nut", "seed butter": "seed", "apple butter": "apple",
+    "butter bean": "bean", "butternut": "squash", "coconut milk": "coconut",
+    "coconut cream": "coconut", "almond milk": "almond", "soy milk": "soy",
+    "oat milk": "oat", "rice milk": "rice", "cashew milk": "cashew",
+    "cream of tartar": "tartaric acid", "eggplant": "aubergine", "honeydew": "melon",
+    "gooseberry": "berry", "crab apple": "apple", "oyster mushroom": "mushroom",
+    "maltodextrin": "", "maltitol": "", "maltose": "",
+    "gluten free oat": "", "gluten free": "", "vegetable rennet": "",
+    "microbial rennet": "", "vegetarian rennet": "", "non dairy": "", "dairy free": "",
+    "lactose free": "", "plant based": "",
+}
+
+# Reason text for keywords that are stems or normalized spellings, not words
+KEYWORD_LABELS: dict[str, str] = {
+    "anchov": "anchovy",
+    "confectioner s glaze": "confectioner's glaze",
+    "brewer s yeast": "brewer's yeast",
+    "l cysteine": "L-cysteine",
+}
+
+DIET_SEVERITY = 0.9
+_E_NUMBER_RE = re.compile(r"e\d{3,4}[a-z]?")
+_NON_WORD_RE = re.compile(r"[^a-z0-9]+")
+_EXEMPT_RE = re.compile(
+    r"(?<![a-z0-9])("
+    + "|".join(sorted(map(re.escape, EXEMPT_PHRASES), key=len, reverse=True))
+    + r")(?:e?s)?(?![a-z0-9])"
+)
+
+_counters = {"decided": 0, "deferred_profile": 0, "deferred_unknown": 0, "deferred_uncertain": 0}
+
+
+def _restriction_key(value: str) -> str:
+    """Profile value to knowledge-base key: "Gluten-free" -> "gluten_free"."""
+    return _NON_WORD_RE.sub("_", value.lower()).strip("_")
+
+
+def _normalize(ingredient: str) -> str:
+    """Lowercase words separated by single spaces, exempt phrases replaced, padded."""
+    text = " " + _NON_WORD_RE.sub(" ", ingredient.lower()).strip() + " "
+    return _EXEMPT_RE.sub(lambda m: EXEMPT_PHRASES[m.group(1)], text)
+
+
+@lru_cache(maxsize=256)
+def _compile(diets: tuple[str, ...]) -> tuple[KeywordMatcher, list[tuple[str, str, bool]]]:
+    """Matcher for a set of restrictions; labels index (diet, keyword, certain) rules."""
+    rules: list[tuple[str, str, bool]] = []
+    keywords: dict[str, set[int]] = {}
+    for diet in diets:
+        violating, uncertain = DIET_KEYWORDS[diet]
+        for kw, certain in [(k, True) for k in violating] + [(k, False) for k in uncertain]:
+            keywords.setdefault(" " + kw, set()).add(len(rules))
+            rules.append((diet, kw, certain))
+    return KeywordMatcher(keywords), rules
+
+
+def _keyword_label(kw: str) -> str:
+    """What a keyword is called in reason text ("anchov" -> "anchovy", "e441" -> "E441")."""
+    if _E_NUMBER_RE.fullmatch(kw):
+        return kw.upper()
+    return KEYWORD_LABELS.get(kw, kw)
+
+
+def _diet_flags(ingredients: list[str], diets: tuple[str, ...]) -> Optional[list[dict]]:
+    """Diet violations per ingredient, or None if any ingredient is ambiguous."""
+    if not diets:
+        return []
+    matcher, rules = _compile(diets)
+    flags: list[dict] = []
+    for ing in ingredients:
+        if not ing:
+            continue
+        hits = [rules[i] for i in sorted(matcher.find(_normalize(ing)))]
+        violated = {diet: kw for diet, kw, certain in hits if certain}
+        if any(not certain and diet not in violated for diet, _, certain in hits):
+            return None
+        if violated:
+            flags.append({
+                "ingredient": ing,
+                "risk_level": "High Risk",
+                "reasons": [
+                    f"Contains {_keyword_label(kw)} - not {diet.replace('_', ' ')}"
+                    for diet, kw in violated.items()
+                ],
+                "severity": DIET_SEVERITY,
+                "category": "diet",
+            })
+    return flags
+
+
+def evaluate(ingredients: list[str], profile: dict) -> Optional[dict]:
+    """
+    Deterministic analysis (score, risk_classification, flagged_ingredients,
+    summary) for a profile of allergies and known diets; None to defer to Gemini.
+    """
+    if profile.get("health_conditions") or profile.get("health_goals"):
+        _counters["deferred_profile"] += 1
+        return None
+    allergies = [a for a in profile.get("allergies") or [] if a]
+    diets = tuple(sorted({_restriction_key(d) for d in profile.get("dietary_restrictions") or [] if d}))
+    if any(_restriction_key(a) not in ALLERGEN_KEYWORDS for a in allergies) or any(
+        d not in DIET_KEYWORDS for d in diets
+    ):
+        _counters["deferred_unknown"] += 1
+        return None
+
+    diet_flags = _diet_flags(ingredients, diets)
+    if diet_flags is None:
+        _counters["deferred_uncertain"] += 1
+        return None
+
+    # One flag per ingredient: allergy first, diet reasons appended
+    by_ingredient: dict[str, dict] = {}
+    for f in check_allergens(ingredients, allergies):
+        f = {**f, "category": "allergy"}
+        existing = by_ingredient.setdefault(f["ingredient"].lower(), f)
+        if existing is not f:
+            existing["reasons"] = existing["reasons"] + f["reasons"]
+    for f in diet_flags:
+        existing = by_ingredient.setdefault(f["ingredient"].lower(), f)
+        if existing is not f:
+            existing["reasons"] = existing["reasons"] + f["reasons"]
+
+    _counters["decided"] += 1
+    return combine_flags(by_ingredient.values())
+
+
+def stats() -> dict:
+    """How many analyses the rules decided, and why the rest went to Gemini."""
+    total = sum(_counters.values())
+    return {**_counters, "decided_ratio": round(_counters["decided"] / total, 4) if total else 0.0}
@@ -1,40 +1,176 @@
-"""ElevenLabs text-to-speech for result summaries."""
+"""
+ElevenLabs text-to-speech for result summaries (async client, cached by summary + voice).
+
+/analyze registers the summary and returns an audio id; the audio itself is
+streamed by GET /analyze/audio/{id} as ElevenLabs produces it. Calls fail
+fast (CircuitOpen) while ElevenLabs keeps failing (app/core/circuit_breaker.py).
+"""
 
 from __future__ import annotations
 
-import os
-from typing import Optional
+import inspect
+import time
+from typing import AsyncIterator, Optional
+
+from app.clients import get_clients
+from app.config import get_settings
+from app.core import metrics
+from app.core.cache import LRUCache
+from app.core.circuit_breaker import CircuitBreaker, breaker_from_settings
+from app.services import audio_cache
 
 try:
-    from elevenlabs.client import ElevenLabs
+    from elevenlabs.client import AsyncElevenLabs
 except ImportError:
-    ElevenLabs = None
+    AsyncElevenLabs = None
 
 # Default voice: Rachel (ElevenLabs preset)
 DEFAULT_VOICE_ID = "21m00Tcm4TlvDq8ikWAM"
+DEFAULT_MODEL_ID = "eleven_multilingual_v2"
+DEFAULT_OUTPUT_FORMAT = "mp3_44100_128"
+
+# audio id -> (text, voice_id, model_id, output_format) awaiting GET /analyze/audio/{id}
+_pending: Optional[LRUCache] = None
+_breaker: Optional[CircuitBreaker] = None
+
+
+def _get_pending() -> LRUCache:
+    global _pending
+    if _pending is None:
+        _pending = LRUCache(maxsize=4096, ttl=get_settings().audio_handle_ttl)
+    return _pending
+
+
+def _get_breaker() -> CircuitBreaker:
+    global _breaker
+    if _breaker is None:
+        # A 4xx (bad key, quota) means ElevenLabs answered
+        _breaker = breaker_from_settings(
+            "ElevenLabs", lambda e: not 400 <= (getattr(e, "status_code", None) or 0) < 500
+        )
+    return _breaker
 
 
-def text_to_speech(
+def breaker_stats() -> dict:
+    """ElevenLabs circuit breaker state for /health."""
+    return _get_breaker().stats()
+
+
+def register_summary(
+    text: str,
+    voice_id: str = DEFAULT_VOICE_ID,
+    model_id: str = DEFAULT_MODEL_ID,
+    output_format: str = DEFAULT_OUTPUT_FORMAT,
+) -> str:
+    """
+    Remember text for later synthesis and return its audio id.
+
+    The id is the audio cache key, so GET /analyze/audio/{id} can serve a
+    cached clip directly or look up the text here and stream it.
+    Pending texts are kept in-process for AUDIO_HANDLE_TTL seconds.
+    """
+    key = audio_cache.audio_key(text, voice_id, model_id, output_format)
+    _get_pending().set(key, (text, voice_id, model_id, output_format))
+    return key
+
+
+def get_registered(audio_id: str) -> Optional[tuple[str, str, str, str]]:
+    """(text, voice_id, model_id, output_format) for a registered audio id."""
+    return _get_pending().get(audio_id)
+
+
+async def text_to_speech(
     text: str,
     api_key: Optional[str] = None,
     voice_id: str = DEFAULT_VOICE_ID,
+    model_id: str = DEFAULT_MODEL_ID,
+    output_format: str = DEFAULT_OUTPUT_FORMAT,
 ) -> Optional[bytes]:
     """Generate audio from text. Returns raw MP3 bytes or None on failure."""
     if not text:
         return None
-    key = api_key or os.getenv("ELEVENLABS_API_KEY")
-    if not key or ElevenLabs is None:
+    key = audio_cache.audio_key(text, voice_id, model_id, output_format)
+    cached = await audio_cache.get_audio(key)
+    if cached is not None:
+        return cached
+    try:
+        chunks = [
+            chunk
+            async for chunk in _convert_stream(text, api_key, voice_id, model_id, output_format)
+        ]
+    except Exception:
+        return None
+    audio = b"".join(chunks)
+    if not audio:
         return None
+    await audio_cache.set_audio(key, audio)
+    return audio
+
+
+async def stream_speech(
+    text: str,
+    voice_id: str = DEFAULT_VOICE_ID,
+    model_id: str = DEFAULT_MODEL_ID,
+    output_format: str = DEFAULT_OUTPUT_FORMAT,
+) -> AsyncIterator[bytes]:
+    """
+    Yield MP3 chunks as ElevenLabs produces them.
+
+    The complete clip is written to the audio cache once the stream finishes,
+    so later requests are served from cache. Raises if synthesis fails.
+    """
+    chunks: list[bytes] = []
+    async for chunk in _convert_stream(text, None, voice_id, model_id, output_format):
+        chunks.append(chunk)
+        yield chunk
+    if chunks:
+        key = audio_cache.audio_key(text, voice_id, model_id, output_format)
+        await audio_cache.set_audio(key, b"".join(chunks))
+
+
+async def _convert_stream(
+    text: str,
+    api_key: Optional[str],
+    voice_id: str,
+    model_id: str,
+    output_format: str,
+) -> AsyncIterator[bytes]:
+    """Call ElevenLabs convert and yield the MP3 chunks."""
+    if api_key and AsyncElevenLabs is not None:
+        client = AsyncElevenLabs(api_key=api_key)
+    else:
+        client = (await get_clients()).elevenlabs
+    if client is None:
+        raise ValueError("ELEVENLABS_API_KEY is not set")
+    breaker = _get_breaker()
+    try:
+        breaker.before_call()
+    except Exception as e:
+        metrics.count_upstream_error("elevenlabs", e)
+        raise
+    start = time.perf_counter()
     try:
-        client = ElevenLabs(api_key=key)
         audio = client.text_to_speech.convert(
             text=text,
             voice_id=voice_id,
-            model_id="eleven_multilingual_v2",
-            output_format="mp3_44100_128",
+            model_id=model_id,
+            output_format=output_format,
         )
-        if hasattr(audio, "__iter__") and not isinstance(audio, (bytes, str)):
-            return b"".join(audio) if audio else None
-        return bytes(audio) if audio else None
-    except Exception:
-        return None
+        # SDK versions differ: async generator of chunks, or awaitable bytes
+        if inspect.isawaitable(audio):
+            audio = await audio
+        if hasattr(audio, "__aiter__"):
+            async for chunk in audio:
+                if chunk:
+                    yield chunk
+        elif audio:
+            yield bytes(audio)
+    except BaseException as e:
+        # GeneratorExit (consumer stopped early) and cancellation only free the slot
+        breaker.record(e)
+        if isinstance(e, Exception):
+            metrics.count_upstream_error("elevenlabs", e)
+        raise
+    breaker.record()
+    # Time to the last chunk (includes the consumer's pace when streaming)
+    metrics.observe_upstream("elevenlabs", time.perf_counter() - start)
@@ -4,40 +4,113 @@ Gemini Service — Vision + Analysis (All-in-One AI)
 Uses Gemini for:
   1. Vision: Extract product name, brand, ingredients from food label image
   2. Analysis: Grade ingredients against user profile → score, conflicts, summary
+  3. Ingredient assessment: per-ingredient verdicts for a profile, cached by
+     ingredient_cache.py and combined locally by scoring.py
+  4. Fused: vision + analysis in one multimodal call when the profile is known
+     up front (one round trip instead of two on a cache miss)
+  5. Product properties: profile-agnostic allergen/diet/nutrition tags per
+     ingredient, cached by product_facts.py and scored locally by scoring.py
 
 No scoring engine — Gemini handles extraction and risk analysis.
+All calls go through the native async client (client.aio), so a slow Gemini
+response never blocks the event loop, and through one adaptive token bucket
+(app/core/rate_limit.py) that backs off on 429s and rejects calls that could
+not be admitted within GEMINI_ADMISSION_TIMEOUT. A circuit breaker
+(app/core/circuit_breaker.py) fails calls fast while Gemini keeps failing.
 """
 
 from __future__ import annotations
 
+import asyncio
+import hashlib
 import json
-import os
+import random
 import re
 import time
-from typing import Optional
+from typing import Optional, get_args
 
 from google import genai
-from google.genai import types
-
+from google.genai import errors, types
+from pydantic import BaseModel
+
+from app.clients import get_clients
+from app.config import get_settings
+from app.core import metrics
+from app.core.circuit_breaker import CircuitBreaker, CircuitOpen, breaker_from_settings
+from app.core.rate_limit import AdaptiveTokenBucket, RateLimited
 from app.core.utils import to_title_case
-
-# Retry config for 429 rate limits
+from app.models import (
+    AnalysisOutput,
+    AssessmentOutput,
+    IngredientProperty,
+    LabelOutput,
+    PropertiesOutput,
+    VisionOutput,
+)
+
+# Retry config for 429 rate limits (attempts per call, base of the jittered backoff)
 MAX_RETRIES = 3
 INITIAL_BACKOFF = 2.0  # seconds
 
 
+# Only these characters change the scanner's state; everything else is skipped in C
+_JSON_SPECIAL_RE = re.compile(r'[{}"\\]')
+_decoder = json.JSONDecoder()
+
+
+def _balanced_end(text: str, start: int) -> int:
+    """Index just past the {...} span opening at start (string-aware), or len(text) if unclosed."""
+    depth = 0
+    in_string = False
+    skip_to = -1  # index after an escaped character
+    for m in _JSON_SPECIAL_RE.finditer(text, start):
+        i = m.start()
+        if i < skip_to:
+            continue
+        ch = text[i]
+        if in_string:
+            if ch == "\\":
+                skip_to = i + 2
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch == "{":
+            depth += 1
+        elif ch == "}":
+            depth -= 1
+            if depth == 0:
+                return i + 1
+    return len(text)
+
+
 def _extract_json(text: str) -> dict:
-    """Extract JSON from Gemini response, handling markdown code blocks."""
+    """
+    JSON object from a Gemini response.
+
+    Structured output returns bare JSON, parsed directly. Otherwise (markdown
+    fences, stray prose) the text is scanned left to right: each top-level
+    "{" is decoded in place, and a candidate that is not valid JSON is
+    skipped as a whole brace-balanced span (inner "{"s are not retried as
+    candidates, though the span is scanned again to find its end).
+    """
     text = text.strip()
-    code_block_pattern = r"```(?:json)?\s*([\s\S]*?)\s*```"
-    matches = re.findall(code_block_pattern, text)
-    if matches:
-        text = matches[0].strip()
-    json_pattern = r"\{[\s\S]*\}"
-    json_matches = re.findall(json_pattern, text)
-    if json_matches:
-        text = max(json_matches, key=len)
-    return json.loads(text)
+    try:
+        data = json.loads(text)
+        if isinstance(data, dict):
+            return data
+    except json.JSONDecodeError:
+        pass
+    pos = text.find("{")
+    while pos != -1:
+        try:
+            data, end = _decoder.raw_decode(text, pos)
+            if isinstance(data, dict):
+                return data
+        except json.JSONDecodeError:
+            end = _balanced_end(text, pos)
+        pos = text.find("{", end)
+    raise ValueError("Gemini response contained no JSON object")
 
 
 VISION_PROMPT = """Analyze this food product image and extract product info in JSON only (no markdown):
@@ -84,51 +157,276 @@ Other rules:
 - risk_classification: "High Risk" if ANY allergy or dietary restriction violated.
 - Return ONLY the JSON object."""
 
+INGREDIENT_PROMPT_TEMPLATE = """Assess each ingredient on its own against the user's profile. Return ONLY valid JSON (no markdown):
+
+Ingredients: {ingredients}
+
+User Profile:
+- Allergies: {allergies}
+- Dietary restrictions (vegan, halal, vegetarian, gluten-free, etc.): {dietary_restrictions}
+- Health conditions (diabetes, hypertension, etc.): {health_conditions}
+- Health goals (weight loss, clean eating, etc.): {health_goals}
+
+Return one entry for EVERY ingredient, copying the ingredient string exactly as given:
+{{
+  "assessments": [
+    {{"ingredient": "exact input string", "flagged": true|false, "category": "allergy"|"diet"|"health"|"goal"|null, "risk_level": "High Risk"|"Medium Risk"|"Low Risk", "reasons": ["reason1"], "severity": 0.0-1.0}}
+  ]
+}}
+
+Rules:
+- flagged is false when the ingredient does not conflict with the profile; category is then null and reasons empty.
+- category is what the ingredient conflicts with: allergy, diet (dietary restriction), health (health condition) or goal (health goal).
+- Treat ingredient DERIVATIVES as allergens. "peanut butter" CONTAINS peanuts. "almond flour" CONTAINS tree nuts. "whey" CONTAINS milk. "egg whites" CONTAINS eggs.
+- Any allergen or dietary restriction violation is "High Risk" with severity at least 0.8.
+- Return ONLY the JSON object."""
+
+PROPERTIES_PROMPT_TEMPLATE = """List the properties of each ingredient of a food product. Return ONLY valid JSON (no markdown):
+
+Ingredients: {ingredients}
+
+Properties (use only these names; an ingredient may have none):
+- Allergens it contains, including derivatives: peanuts, tree_nuts, milk, eggs, wheat, soy, fish, shellfish, sesame, corn, sulfites
+- gluten: contains gluten (wheat, barley, rye, malt, spelt, ...)
+- not_vegan, not_vegetarian: animal-derived (not_vegetarian only for meat, fish, gelatin, animal rennet, insects)
+- not_halal, not_kosher: pork, alcohol or other forbidden sources
+- not_keto, not_paleo: incompatible with a keto / paleo diet
+- added_sugar, high_glycemic, artificial_sweetener, high_sodium, saturated_fat, trans_fat, high_cholesterol
+- high_purine, high_phosphorus, high_potassium, high_fodmap, refined_grain
+- artificial_color, preservative, ultra_processed, alcohol, caffeine
+
+Return one entry for EVERY ingredient, copying the ingredient string exactly as given:
+{{
+  "ingredients": [
+    {{"ingredient": "exact input string", "properties": ["property1", ...]}}
+  ]
+}}
+
+Rules:
+- Treat ingredient DERIVATIVES as allergens. "peanut butter" CONTAINS peanuts. "whey" CONTAINS milk. "egg whites" CONTAINS eggs.
+- Only list a property when it clearly applies to the ingredient itself.
+- Return ONLY the JSON object."""
+
+FUSED_PROMPT_TEMPLATE = """Read this food product label, extract the product info, and analyze its ingredients against the user's profile. Return ONLY valid JSON (no markdown):
+
+User Profile:
+- Allergies: {allergies}
+- Dietary restrictions (vegan, halal, vegetarian, gluten-free, etc.): {dietary_restrictions}
+- Health conditions (diabetes, hypertension, etc.): {health_conditions}
+- Health goals (weight loss, clean eating, etc.): {health_goals}
+
+Return this exact JSON structure:
+{{
+  "product_name": "product name in Title Case",
+  "brand": "brand if visible, else null",
+  "ingredients": ["Ingredient1", "Ingredient2", ...],
+  "confidence": "high|medium|low",
+  "score": 0-100,
+  "risk_classification": "Low Risk" | "Medium Risk" | "High Risk",
+  "flagged_ingredients": [
+    {{"ingredient": "name", "risk_level": "High Risk"|"Medium Risk"|"Low Risk", "reasons": ["reason1"], "severity": 0.0-1.0}}
+  ],
+  "summary": "One sentence summary. For allergies/diet violations: lead with 'Not safe' or 'Not suitable'. Never imply safety when allergens are present."
+}}
+
+Extraction rules:
+- Return at least one ingredient. If unclear, infer from product type. Use Title Case.
+
+CRITICAL ALLERGEN RULES:
+- Treat ingredient DERIVATIVES as allergens. "peanut butter" CONTAINS peanuts. "almond flour" CONTAINS tree nuts. "whey" CONTAINS milk. "egg whites" CONTAINS eggs.
+- One allergen present = product is NOT safe. score must be low (under 30). risk_classification must be "High Risk".
+- summary MUST start with "Not safe for your allergies" when any allergen is present.
+
+Other rules:
+- score: 100 = fully safe, 0 = dangerous. Allergies and dietary violations must drop score significantly.
+- risk_classification: "High Risk" if ANY allergy or dietary restriction violated.
+- Return ONLY the JSON object."""
+
 DEFAULT_MODEL = "gemini-2.0-flash"
 
+# What a flagged ingredient conflicts with (drives the locally built summary)
+FLAG_CATEGORIES = ("allergy", "diet", "health", "goal")
+PROPERTY_NAMES = frozenset(get_args(IngredientProperty))
+
+
+def _prompt_version(prompt: str) -> str:
+    return hashlib.sha256(prompt.encode()).hexdigest()[:12]
+
+
+# Stamped on cached results: editing a prompt makes older cache entries stale
+# Cached vision results and analyses may also come from the fused prompt, so it counts for both
+VISION_PROMPT_VERSION = _prompt_version(VISION_PROMPT + FUSED_PROMPT_TEMPLATE)
+INGREDIENT_PROMPT_VERSION = _prompt_version(INGREDIENT_PROMPT_TEMPLATE)
+PROPERTIES_PROMPT_VERSION = _prompt_version(PROPERTIES_PROMPT_TEMPLATE)
+ANALYSIS_PROMPT_VERSION = _prompt_version(
+    ANALYSIS_PROMPT_TEMPLATE + INGREDIENT_PROMPT_TEMPLATE + FUSED_PROMPT_TEMPLATE
+)
+
+
+async def _get_client(api_key: Optional[str] = None):
+    """Shared pooled client from the registry; a one-off client if a key is passed."""
+    if api_key:
+        return genai.Client(api_key=api_key)
+    client = (await get_clients()).gemini
+    if client is None:
+        raise ValueError("GEMINI_API_KEY is not set")
+    return client
+
+
+_limiter: Optional[AdaptiveTokenBucket] = None
+_breaker: Optional[CircuitBreaker] = None
+
+
+def _json_config(schema) -> Optional[types.GenerateContentConfig]:
+    """Structured output: JSON constrained to the Pydantic model's schema."""
+    if schema is None:
+        return None
+    return types.GenerateContentConfig(
+        response_mime_type="application/json",
+        response_schema=schema,
+    )
 
-def _generate_with_retry(client, model: str, contents):
-    """Call generate_content with retry on 429."""
-    last_err = None
+
+def _response_data(response) -> dict:
+    """Response as a dict: the SDK-parsed schema object, else the text parsed as JSON."""
+    parsed = getattr(response, "parsed", None)
+    if isinstance(parsed, BaseModel):
+        return parsed.model_dump()
+    if not response.text:
+        raise ValueError("Gemini returned empty response")
+    return _extract_json(response.text)
+
+
+def _get_limiter() -> AdaptiveTokenBucket:
+    global _limiter
+    if _limiter is None:
+        settings = get_settings()
+        # Per process: each worker gets an equal share of the deployment's budget
+        workers = settings.web_concurrency
+        _limiter = AdaptiveTokenBucket(
+            max_rate=settings.gemini_rate_limit / workers,
+            burst=settings.gemini_burst / workers,
+            min_rate=settings.gemini_min_rate / workers,
+            max_queue=settings.gemini_max_queue,
+        )
+    return _limiter
+
+
+def limiter_stats() -> dict:
+    """Gemini admission limiter state for /health."""
+    return _get_limiter().stats()
+
+
+def _get_breaker() -> CircuitBreaker:
+    global _breaker
+    if _breaker is None:
+        # A 4xx (bad request, quota) means Gemini answered; the limiter handles 429s
+        _breaker = breaker_from_settings("Gemini", lambda e: not isinstance(e, errors.ClientError))
+    return _breaker
+
+
+def breaker_stats() -> dict:
+    """Gemini circuit breaker state for /health."""
+    return _get_breaker().stats()
+
+
+def _is_rate_limited(e: Exception) -> bool:
+    return isinstance(e, errors.APIError) and e.code == 429
+
+
+def _retry_after(e: errors.APIError) -> Optional[float]:
+    """Seconds to back off from a 429: Retry-After header, else google.rpc.RetryInfo."""
+    headers = getattr(e.response, "headers", None)
+    if headers is not None:
+        try:
+            return float(headers.get("retry-after"))
+        except (TypeError, ValueError):
+            pass
+    details = e.details.get("error", e.details) if isinstance(e.details, dict) else {}
+    for d in details.get("details", []) if isinstance(details, dict) else []:
+        delay = d.get("retryDelay") if isinstance(d, dict) else None
+        if isinstance(delay, str) and delay.endswith("s"):
+            try:
+                return float(delay[:-1])
+            except ValueError:
+                pass
+    return None
+
+
+async def _generate_with_retry(client, model: str, contents, schema=None):
+    """
+    Call generate_content through the circuit breaker and the shared limiter,
+    retrying 429s with jitter.
+
+    Each attempt passes the breaker (CircuitOpen at once while Gemini is
+    failing) and takes a limiter token; a 429 slows the limiter down (and
+    pauses it for any retry-after hint) before the jittered backoff. Raises
+    RateLimited when admission or a retry cannot happen within
+    GEMINI_ADMISSION_TIMEOUT of the first attempt.
+    """
+    limiter = _get_limiter()
+    breaker = _get_breaker()
+    deadline = time.monotonic() + get_settings().gemini_admission_timeout
     for attempt in range(MAX_RETRIES):
         try:
-            response = client.models.generate_content(
+            breaker.before_call()
+        except CircuitOpen as e:
+            metrics.count_upstream_error("gemini", e)
+            raise
+        try:
+            await limiter.acquire(deadline)
+        except BaseException as e:
+            breaker.release()
+            if isinstance(e, RateLimited):
+                metrics.count_upstream_error("gemini", e)
+            raise
+        start = time.perf_counter()
+        try:
+            response = await client.aio.models.generate_content(
                 model=model,
                 contents=contents,
+                config=_json_config(schema),
             )
-            return response
-        except Exception as e:
-            last_err = e
-            err_str = str(e).upper()
-            if "429" in err_str or "RESOURCE_EXHAUSTED" in err_str:
-                if attempt < MAX_RETRIES - 1:
-                    wait = INITIAL_BACKOFF * (2**attempt)
-                    time.sleep(wait)
-                    continue
-            raise
-    raise last_err
-
-
-def analyze_vision(
+        except BaseException as e:
+            breaker.record(e)
+            if not isinstance(e, Exception):
+                raise
+            metrics.observe_upstream("gemini", time.perf_counter() - start)
+            metrics.count_upstream_error("gemini", e)
+            if not _is_rate_limited(e):
+                raise
+            hint = _retry_after(e)
+            limiter.on_throttle(hint)
+            if attempt == MAX_RETRIES - 1:
+                raise
+            # Full jitter around the exponential step so throttled callers spread out
+            backoff = max(hint or 0.0, random.uniform(0.5, 1.5) * INITIAL_BACKOFF * (2**attempt))
+            if time.monotonic() + backoff > deadline:
+                raise RateLimited("Gemini API rate limit reached", retry_after=backoff) from e
+            await asyncio.sleep(backoff)
+            continue
+        breaker.record()
+        metrics.observe_upstream("gemini", time.perf_counter() - start)
+        limiter.on_success()
+        return response
+
+
+async def analyze_vision(
     image_bytes: bytes,
     mime_type: str = "image/jpeg",
     api_key: Optional[str] = None,
     model: str = DEFAULT_MODEL,
 ) -> dict:
     """Extract product info and ingredients from image via Gemini vision."""
-    key = api_key or os.getenv("GEMINI_API_KEY")
-    if not key:
-        raise ValueError("GEMINI_API_KEY is not set")
-
-    client = genai.Client(api_key=key)
+    client = await _get_client(api_key)
     image_part = types.Part.from_bytes(data=image_bytes, mime_type=mime_type)
 
-    response = _generate_with_retry(client, model, [image_part, VISION_PROMPT])
+    response = await _generate_with_retry(client, model, [image_part, VISION_PROMPT], schema=VisionOutput)
+
+    return _normalize_vision(_response_data(response))
 
-    if not response.text:
-        raise ValueError("Gemini returned empty response")
 
-    data = _extract_json(response.text)
+def _normalize_vision(data: dict) -> dict:
     ingredients_raw = data.get("ingredients", [])
     if not isinstance(ingredients_raw, list):
         ingredients_raw = []
@@ -145,7 +443,26 @@ def analyze_vision(
     }
 
 
-def analyze_ingredients(
+def _profile_prompt_args(user_profile: dict) -> dict:
+    profile = user_profile or {}
+    return {
+        "allergies": json.dumps(profile.get("allergies", []) or []),
+        "dietary_restrictions": json.dumps(profile.get("dietary_restrictions", []) or []),
+        "health_conditions": json.dumps(profile.get("health_conditions", []) or []),
+        "health_goals": json.dumps(profile.get("health_goals", []) or []),
+    }
+
+
+def _normalize_flag(f: dict) -> dict:
+    return {
+        "ingredient": to_title_case(f.get("ingredient", "")),
+        "risk_level": f.get("risk_level", "Medium Risk"),
+        "reasons": f.get("reasons", []) if isinstance(f.get("reasons"), list) else [],
+        "severity": float(f.get("severity", 0.5)),
+    }
+
+
+async def analyze_ingredients(
     ingredients: list[str],
     user_profile: dict,
     api_key: Optional[str] = None,
@@ -155,46 +472,25 @@ def analyze_ingredients(
     Grade ingredients against user profile via Gemini.
     Returns score, risk_classification, flagged_ingredients, summary.
     """
-    key = api_key or os.getenv("GEMINI_API_KEY")
-    if not key:
-        raise ValueError("GEMINI_API_KEY is not set")
-
-    profile = user_profile or {}
-    allergies = profile.get("allergies", []) or []
-    dietary = profile.get("dietary_restrictions", []) or []
-    conditions = profile.get("health_conditions", []) or []
-    goals = profile.get("health_goals", []) or []
+    client = await _get_client(api_key)
 
     prompt = ANALYSIS_PROMPT_TEMPLATE.format(
         ingredients=json.dumps(ingredients),
-        allergies=json.dumps(allergies),
-        dietary_restrictions=json.dumps(dietary),
-        health_conditions=json.dumps(conditions),
-        health_goals=json.dumps(goals),
+        **_profile_prompt_args(user_profile),
     )
 
-    client = genai.Client(api_key=key)
-    response = _generate_with_retry(client, model, [prompt])
+    response = await _generate_with_retry(client, model, [prompt], schema=AnalysisOutput)
 
-    if not response.text:
-        raise ValueError("Gemini returned empty response")
+    return _normalize_analysis(_response_data(response))
 
-    data = _extract_json(response.text)
 
+def _normalize_analysis(data: dict) -> dict:
     # Normalize flagged ingredients
     flagged_raw = data.get("flagged_ingredients", [])
     if not isinstance(flagged_raw, list):
         flagged_raw = []
 
-    flagged = []
-    for f in flagged_raw:
-        if isinstance(f, dict):
-            flagged.append({
-                "ingredient": to_title_case(f.get("ingredient", "")),
-                "risk_level": f.get("risk_level", "Medium Risk"),
-                "reasons": f.get("reasons", []) if isinstance(f.get("reasons"), list) else [],
-                "severity": float(f.get("severity", 0.5)),
-            })
+    flagged = [_normalize_flag(f) for f in flagged_raw if isinstance(f, dict)]
 
     return {
         "score": int(data.get("score", 100)),
@@ -202,3 +498,107 @@ def analyze_ingredients(
         "flagged_ingredients": flagged,
         "summary": str(data.get("summary", "Analysis complete.")),
     }
+
+
+async def assess_ingredients(
+    ingredients: list[str],
+    user_profile: dict,
+    api_key: Optional[str] = None,
+    model: str = DEFAULT_MODEL,
+) -> dict[str, Optional[dict]]:
+    """
+    Per-ingredient verdicts against user profile via Gemini.
+
+    Returns {ingredient: flag or None} keyed by the input strings; a flag is a
+    flagged-ingredient dict plus "category" (allergy/diet/health/goal), None
+    means no conflict. Ingredients Gemini skipped are left out, so callers
+    do not cache a verdict that was never given.
+    """
+    if not ingredients:
+        return {}
+    client = await _get_client(api_key)
+
+    prompt = INGREDIENT_PROMPT_TEMPLATE.format(
+        ingredients=json.dumps(ingredients),
+        **_profile_prompt_args(user_profile),
+    )
+
+    response = await _generate_with_retry(client, model, [prompt], schema=AssessmentOutput)
+
+    data = _response_data(response)
+    assessments = data.get("assessments", [])
+    if not isinstance(assessments, list):
+        assessments = []
+
+    by_name = {i.strip().lower(): i for i in ingredients}
+    verdicts: dict[str, Optional[dict]] = {}
+    for a in assessments:
+        if not isinstance(a, dict):
+            continue
+        name = by_name.get(str(a.get("ingredient", "")).strip().lower())
+        if name is None:
+            continue
+        if a.get("flagged"):
+            flag = _normalize_flag({**a, "ingredient": a.get("ingredient") or name})
+            flag["category"] = a.get("category") if a.get("category") in FLAG_CATEGORIES else "health"
+            verdicts[name] = flag
+        else:
+            verdicts[name] = None
+    return verdicts
+
+
+async def extract_properties(
+    ingredients: list[str],
+    api_key: Optional[str] = None,
+    model: str = DEFAULT_MODEL,
+) -> dict[str, list[str]]:
+    """
+    Profile-agnostic properties of each ingredient via Gemini.
+
+    Returns {ingredient: [property, ...]} keyed by the input strings, with
+    unknown property names dropped. Ingredients Gemini skipped are left out.
+    """
+    if not ingredients:
+        return {}
+    client = await _get_client(api_key)
+
+    prompt = PROPERTIES_PROMPT_TEMPLATE.format(ingredients=json.dumps(ingredients))
+    response = await _generate_with_retry(client, model, [prompt], schema=PropertiesOutput)
+
+    data = _response_data(response)
+    entries = data.get("ingredients", [])
+    if not isinstance(entries, list):
+        entries = []
+
+    by_name = {i.strip().lower(): i for i in ingredients}
+    properties: dict[str, list[str]] = {}
+    for e in entries:
+        if not isinstance(e, dict):
+            continue
+        name = by_name.get(str(e.get("ingredient", "")).strip().lower())
+        if name is None:
+            continue
+        tags = e.get("properties") if isinstance(e.get("properties"), list) else []
+        properties[name] = sorted({str(t) for t in tags if str(t) in PROPERTY_NAMES})
+    return properties
+
+
+async def analyze_label(
+    image_bytes: bytes,
+    user_profile: dict,
+    mime_type: str = "image/jpeg",
+    api_key: Optional[str] = None,
+    model: str = DEFAULT_MODEL,
+) -> tuple[dict, dict]:
+    """
+    Fused vision + analysis in one multimodal call.
+    Returns (vision, analysis) shaped like analyze_vision / analyze_ingredients.
+    """
+    client = await _get_client(api_key)
+    image_part = types.Part.from_bytes(data=image_bytes, mime_type=mime_type)
+    prompt = FUSED_PROMPT_TEMPLATE.format(**_profile_prompt_args(user_profile))
+
+    response = await _generate_with_retry(client, model, [image_part, prompt], schema=LabelOutput)
+
+    data = _response_data(response)
+    return _normalize_vision(data), _normalize_analysis(data)
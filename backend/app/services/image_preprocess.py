@@ -0,0 +1,85 @@
+"""
+Image Preprocess — shrink label photos before they are sent to Gemini
+
+Phone photos arrive as 4–12 MB JPEGs; the label text stays legible at a
+fraction of that. Before vision extraction each upload is:
+
+  1. rotated upright from its EXIF orientation
+  2. downscaled to IMAGE_MAX_EDGE pixels on the longest side
+     (JPEGs are decoded at reduced scale directly, which is much cheaper)
+  3. flattened to RGB and re-encoded as JPEG at IMAGE_JPEG_QUALITY,
+     which also drops EXIF metadata (GPS, device info)
+
+Formats Pillow cannot open (e.g. HEIC without a plugin) are passed through
+unchanged, as is everything when Pillow is not installed or
+IMAGE_PREPROCESS=0.
+"""
+
+from __future__ import annotations
+
+import io
+import math
+from typing import Optional
+
+from app.config import get_settings
+from app.core.concurrency import run_blocking
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:
+    Image = None
+    ImageOps = None
+
+OUTPUT_MIME = "image/jpeg"
+
+
+def preprocess_image(
+    data: bytes,
+    mime_type: str,
+    max_edge: int,
+    quality: int,
+) -> tuple[bytes, str]:
+    """Upright, downscaled, EXIF-free JPEG. Returns (bytes, mime type); input unchanged if undecodable."""
+    if Image is None:
+        return data, mime_type
+    try:
+        with Image.open(io.BytesIO(data)) as img:
+            if img.format == "JPEG" and max(img.size) > max_edge:
+                # Let libjpeg decode at 1/2, 1/4 or 1/8 scale, keeping the long edge >= max_edge
+                ratio = max_edge / max(img.size)
+                img.draft("RGB", (math.ceil(img.width * ratio), math.ceil(img.height * ratio)))
+            out = ImageOps.exif_transpose(img)
+            if max(out.size) > max_edge:
+                out.thumbnail((max_edge, max_edge), Image.Resampling.LANCZOS)
+            if out.mode in ("RGBA", "LA", "P"):
+                rgba = out.convert("RGBA")
+                out = Image.new("RGB", rgba.size, (255, 255, 255))
+                out.paste(rgba, mask=rgba.getchannel("A"))
+            elif out.mode != "RGB":
+                out = out.convert("RGB")
+            buf = io.BytesIO()
+            out.save(buf, format="JPEG", quality=quality, optimize=True)
+    except Exception:
+        return data, mime_type
+    return buf.getvalue(), OUTPUT_MIME
+
+
+async def prepare_image(data: bytes, mime_type: str) -> tuple[bytes, str]:
+    """preprocess_image with the configured size/quality, off the event loop."""
+    settings = get_settings()
+    if not settings.image_preprocess or Image is None:
+        return data, mime_type
+    return await run_blocking(
+        preprocess_image, data, mime_type, settings.image_max_edge, settings.image_jpeg_quality
+    )
+
+
+def upload_limit(path: str, method: str) -> Optional[int]:
+    """Max request body bytes for an upload route (None = no limit)."""
+    if method != "POST" or not path.startswith("/analyze"):
+        return None
+    settings = get_settings()
+    if path.rstrip("/").endswith("/batch"):
+        # Every image may be at the limit; allow for multipart framing and form fields
+        return settings.max_upload_bytes * settings.batch_max_images + 64 * 1024
+    return settings.max_upload_bytes + 64 * 1024
@@ -0,0 +1,109 @@
+"""
+Ingredient Cache — reuse per-ingredient verdicts across products
+
+The analysis cache is keyed by the whole ingredient list, so two products
+that share most of their ingredients are two full misses. This cache stores
+one verdict per (normalized ingredient, profile hash): Gemini is asked only
+about ingredients it has not assessed for that profile, and scoring.py
+combines the verdicts into the product result.
+
+  L1: in-process LRU (INGREDIENT_CACHE_SIZE entries, INGREDIENT_FACT_TTL seconds)
+  L2: Supabase ingredient_facts table (same TTL, pruned by the cache sweeper)
+
+A stored fact is {"flag": <flagged ingredient + category> | None}.
+"""
+
+from __future__ import annotations
+
+import re
+from typing import Optional
+
+from app.config import get_settings
+from app.core.metrics import stage
+from app.core.cache import LRUCache
+from app.services import supabase_service
+from app.services.gemini_service import assess_ingredients
+from app.services.scoring import combine_flags
+
+_memory: Optional[LRUCache] = None
+_counters = {"hits": 0, "misses": 0}
+
+_WS_RE = re.compile(r"\s+")
+
+
+def _get_memory() -> LRUCache:
+    global _memory
+    if _memory is None:
+        settings = get_settings()
+        _memory = LRUCache(maxsize=settings.ingredient_cache_size, ttl=settings.ingredient_fact_ttl)
+    return _memory
+
+
+def normalize_ingredient(name: str) -> str:
+    """Fact cache key for an ingredient name: lowercase, single-spaced."""
+    return _WS_RE.sub(" ", str(name)).strip().lower()
+
+
+async def get_facts(ingredients: list[str], profile_hash: str) -> dict[str, dict]:
+    """Facts for the normalized ingredients under profile_hash (L1, then one L2 query). Misses are omitted."""
+    memory = _get_memory()
+    names = list(dict.fromkeys(ingredients))
+    found: dict[str, dict] = {}
+    remaining = []
+    for name in names:
+        fact = memory.get((profile_hash, name))
+        if fact is not None:
+            found[name] = fact
+        else:
+            remaining.append(name)
+    if remaining:
+        stored = await supabase_service.get_ingredient_facts(profile_hash, remaining)
+        for name, fact in stored.items():
+            memory.set((profile_hash, name), fact)
+            found[name] = fact
+    _counters["hits"] += len(found)
+    _counters["misses"] += len(names) - len(found)
+    return found
+
+
+async def set_facts(profile_hash: str, facts: dict[str, dict]) -> None:
+    """Write through to both tiers."""
+    memory = _get_memory()
+    for name, fact in facts.items():
+        memory.set((profile_hash, name), fact)
+    await supabase_service.set_ingredient_facts(
+        profile_hash, facts, ttl=get_settings().ingredient_fact_ttl
+    )
+
+
+async def analyze(ingredients: list[str], profile: dict) -> dict:
+    """
+    Product analysis from per-ingredient verdicts.
+
+    Cached verdicts are reused; Gemini assesses only the rest (one call),
+    and the new verdicts are stored. Raises whatever the Gemini call raises.
+    """
+    names = list(dict.fromkeys(n for n in map(normalize_ingredient, ingredients) if n))
+    phash = supabase_service.profile_hash(profile)
+    with stage("ingredient_cache"):
+        facts = await get_facts(names, phash)
+    unseen = [n for n in names if n not in facts]
+    if unseen:
+        with stage("gemini_assess"):
+            verdicts = await assess_ingredients(unseen, profile)
+        new = {name: {"flag": flag} for name, flag in verdicts.items()}
+        await set_facts(phash, new)
+        facts.update(new)
+    # Ingredients Gemini skipped have no verdict and count as unflagged
+    return combine_flags(facts[n]["flag"] for n in names if n in facts)
+
+
+def stats() -> dict:
+    """Per-ingredient hit/miss counters plus L1 size."""
+    memory = _get_memory()
+    lookups = _counters["hits"] + _counters["misses"]
+    return {
+        **_counters,
+        "hit_ratio": round(_counters["hits"] / lookups, 4) if lookups else 0.0,
+        "memory": {"entries": len(memory), "maxsize": memory.maxsize},
+    }
@@ -0,0 +1,240 @@
+"""
+Ingredient Canon — one spelling per ingredient before cache keys are built
+
+OCR output varies between scans of the same label: "Whey Protein
+Concentrate", "whey protein conc." and "WPC" are one ingredient but three
+cache keys. canonicalize() maps each extracted name to a canonical form:
+
+  1. lowercase; punctuation and parentheses become spaces; "E 330" -> "e330";
+     leading "contains 2% or less of" qualifiers are dropped
+  2. per word: spelling/abbreviation map ("conc" -> "concentrate",
+     "soya" -> "soy", "colour" -> "color"), then plural -> singular
+  3. longest-match phrase lookup in a word trie built from SYNONYMS
+     (abbreviations, chemical names, E-numbers, US color names)
+
+Canonical names feed cache_key, the rule engine and the Gemini analysis.
+Users never see them: restore_names() rewrites flagged ingredients and the
+summary back to the names on the scanned label, and the ingredient list is
+left as extracted. stats() reports how many ingredient names and product
+keys canonicalization changed.
+"""
+
+from __future__ import annotations
+
+import re
+from functools import lru_cache
+
+from app.core.utils import to_title_case
+
+# Word -> replacement (abbreviations and spelling variants), applied before plurals
+WORD_MAP: dict[str, str] = {
+    "conc": "concentrate", "concentr": "concentrate", "iso": "isolate",
+    "hydr": "hydrogenated", "hydrog": "hydrogenated", "veg": "vegetable",
+    "nat": "natural", "art": "artificial", "artif": "artificial", "flav": "flavor",
+    "flavour": "flavor", "flavours": "flavor", "flavoring": "flavor",
+    "flavouring": "flavor", "flavorings": "flavor", "colour": "color",
+    "colours": "color", "coloring": "color", "colouring": "color", "mod": "modified",
+    "pwd": "powder", "pdr": "powder", "powd": "powder", "org": "organic",
+    "enr": "enriched", "soya": "soy", "yoghurt": "yogurt", "sulphite": "sulfite",
+    "sulphites": "sulfite", "sulphur": "sulfur", "fibre": "fiber",
+}
+
+# Phrase -> canonical phrase (keys and values are normalized the same way as input)
+SYNONYMS: dict[str, str] = {
+    # Abbreviations and trade names
+    "wpc": "whey protein concentrate",
+    "wpi": "whey protein isolate",
+    "msg": "monosodium glutamate",
+    "hfcs": "high fructose corn syrup",
+    "tvp": "textured vegetable protein",
+    "bha": "butylated hydroxyanisole",
+    "bht": "butylated hydroxytoluene",
+    "tbhq": "tert butylhydroquinone",
+    "evoo": "extra virgin olive oil",
+    "mct oil": "medium chain triglycerides",
+    "mct": "medium chain triglycerides",
+    # Common / chemical names
+    "sodium chloride": "salt",
+    "sucrose": "sugar",
+    "vitamin c": "ascorbic acid",
+    "vitamin b2": "riboflavin",
+    "baking soda": "sodium bicarbonate",
+    "bicarbonate of soda": "sodium bicarbonate",
+    "cornstarch": "corn starch",
+    "maize starch": "corn starch",
+    "lecithin soy": "soy lecithin",
+    "lecithin sunflower": "sunflower lecithin",
+    "acesulfame potassium": "acesulfame k",
+    "mono diglycerides": "mono and diglycerides",
+    "monoglycerides and diglycerides": "mono and diglycerides",
+    "mono and diglycerides of fatty acids": "mono and diglycerides",
+    # US certified colors
+    "red 40": "allura red", "red no 40": "allura red", "fd c red no 40": "allura red",
+    "yellow 5": "tartrazine", "yellow no 5": "tartrazine", "fd c yellow no 5": "tartrazine",
+    "yellow 6": "sunset yellow", "yellow no 6": "sunset yellow", "fd c yellow no 6": "sunset yellow",
+    "blue 1": "brilliant blue", "blue no 1": "brilliant blue", "fd c blue no 1": "brilliant blue",
+    # E-numbers
+    "e100": "curcumin", "e101": "riboflavin", "e102": "tartrazine", "e110": "sunset yellow",
+    "e120": "carmine", "e129": "allura red", "e133": "brilliant blue",
+    "e150a": "caramel color", "e150d": "caramel color", "e160a": "beta carotene",
+    "e170": "calcium carbonate", "e200": "sorbic acid", "e202": "potassium sorbate",
+    "e211": "sodium benzoate", "e220": "sulfur dioxide", "e250": "sodium nitrite",
+    "e260": "acetic acid", "e270": "lactic acid", "e290": "carbon dioxide",
+    "e296": "malic acid", "e300": "ascorbic acid", "e306": "tocopherols",
+    "e322": "lecithin", "e330": "citric acid", "e331": "sodium citrate",
+    "e339": "sodium phosphate", "e341": "calcium phosphate", "e407": "carrageenan",
+    "e410": "locust bean gum", "e412": "guar gum", "e414": "gum arabic",
+    "e415": "xanthan gum", "e420": "sorbitol", "e422": "glycerol", "e440": "pectin",
+    "e441": "gelatin", "e450": "diphosphates", "e460": "cellulose",
+    "e466": "carboxymethyl cellulose", "e471": "mono and diglycerides",
+    "e476": "polyglycerol polyricinoleate", "e481": "sodium stearoyl lactylate",
+    "e500": "sodium bicarbonate", "e503": "ammonium carbonate", "e542": "bone phosphate",
+    "e621": "monosodium glutamate", "e901": "beeswax", "e904": "shellac",
+    "e913": "lanolin", "e950": "acesulfame k", "e951": "aspartame", "e955": "sucralose",
+    "e960": "steviol glycosides", "e966": "lactitol", "e1105": "lysozyme",
+    "e1422": "acetylated distarch adipate",
+}
+
+# Words ending in s that are not plurals
+_NOT_PLURAL = frozenset({"molasses", "trans", "species", "series", "swiss", "couscous"})
+# Singulars ending in -ie ("brownies" -> "brownie", not "browny")
+_IE_SINGULARS = frozenset({"brownie", "cookie", "calorie", "smoothie", "veggie", "pastie"})
+
+_NON_WORD_RE = re.compile(r"[^a-z0-9]+")
+_E_NUMBER_RE = re.compile(r"\be (\d{3,4}[a-z]?)\b")
+_QUALIFIER_RE = re.compile(r"^(?:contains )?(?:less than (?:\d+ )+of |(?:\d+ )+or less of )")
+
+_counters = {"ingredients": 0, "ingredients_changed": 0, "keys": 0, "keys_changed": 0}
+
+
+def _singular(word: str) -> str:
+    if len(word) <= 3 or word in _NOT_PLURAL or not word.isalpha():
+        return word
+    if word.endswith("ies"):
+        # Short words are -ie plurals ("pies", "ties"); longer ones -y unless listed
+        if len(word) <= 4 or word[:-1] in _IE_SINGULARS:
+            return word[:-1]
+        return word[:-3] + "y"
+    if word.endswith(("sses", "xes", "ches", "shes", "oes")):
+        return word[:-2]
+    if word.endswith("s") and not word.endswith(("ss", "us", "is")):
+        return word[:-1]
+    return word
+
+
+def _words(name: str) -> list[str]:
+    """Steps 1-2: normalized words of a name."""
+    text = _NON_WORD_RE.sub(" ", str(name).lower()).strip()
+    text = _QUALIFIER_RE.sub("", _E_NUMBER_RE.sub(r"e\1", text))
+    return [_singular(WORD_MAP.get(w, w)) for w in text.split()]
+
+
+def _build_trie() -> dict:
+    """Word trie over SYNONYMS; a node's None key holds the canonical words."""
+    root: dict = {}
+    for phrase, canonical in SYNONYMS.items():
+        node = root
+        for word in _words(phrase):
+            node = node.setdefault(word, {})
+        node[None] = _words(canonical)
+    return root
+
+
+_TRIE = _build_trie()
+
+
+@lru_cache(maxsize=65536)
+def canonicalize(name: str) -> str:
+    """Canonical form of one ingredient name ("" if nothing is left)."""
+    words = _words(name)
+    out: list[str] = []
+    i = 0
+    while i < len(words):
+        # Longest synonym phrase starting at word i
+        node, match, end = _TRIE, None, i
+        for j in range(i, len(words)):
+            node = node.get(words[j])
+            if node is None:
+                break
+            if None in node:
+                match, end = node[None], j + 1
+        if match is None:
+            out.append(words[i])
+            i += 1
+        else:
+            out.extend(match)
+            i = end
+    return " ".join(out)
+
+
+def _plain(name: str) -> str:
+    """What the ingredient would have been keyed as without canonicalization."""
+    return " ".join(str(name).lower().split())
+
+
+def canonicalize_list(ingredients: list[str]) -> list[str]:
+    """Canonical, de-duplicated ingredient list (order kept); counts what changed."""
+    canonical = list(dict.fromkeys(c for c in map(canonicalize, ingredients) if c))
+    plain = [_plain(i) for i in ingredients if i]
+    _counters["ingredients"] += len(plain)
+    _counters["ingredients_changed"] += sum(1 for p in plain if canonicalize(p) != p)
+    _counters["keys"] += 1
+    if sorted(canonical) != sorted(set(plain)):
+        _counters["keys_changed"] += 1
+    return canonical
+
+
+def _key(name: str) -> str:
+    return " ".join(str(name).lower().split())
+
+
+def restore_names(analysis: dict, ingredients: list[str]) -> dict:
+    """
+    Analysis with canonical ingredient names (flags, summary) replaced by
+    the names extracted from this scan's label. Names keep the case style
+    they had: lowercase stays lowercase, anything else is title-cased.
+    """
+    originals: dict[str, str] = {}
+    for original in ingredients:
+        if original:
+            originals.setdefault(canonicalize(original), _key(original))
+    renames: dict[str, str] = {}
+    flags = []
+    for f in analysis.get("flagged_ingredients", []):
+        name = f.get("ingredient", "")
+        original = originals.get(_key(name)) or originals.get(canonicalize(name))
+        if original is None or original == _key(name):
+            flags.append(f)
+            continue
+        renames[_key(name)] = original
+        flags.append({**f, "ingredient": original if name.islower() else to_title_case(original)})
+    if not renames:
+        return analysis
+
+    pattern = re.compile(
+        r"(?<![A-Za-z0-9])("
+        + "|".join(sorted(map(re.escape, renames), key=len, reverse=True))
+        + r")(?![A-Za-z0-9])",
+        re.IGNORECASE,
+    )
+
+    def _sub(m: re.Match) -> str:
+        original = renames[_key(m.group(1))]
+        return original if m.group(1).islower() else to_title_case(original)
+
+    summary = analysis.get("summary")
+    return {
+        **analysis,
+        "flagged_ingredients": flags,
+        "summary": pattern.sub(_sub, summary) if isinstance(summary, str) else summary,
+    }
+
+
+def stats() -> dict:
+    """How often canonicalization changed an ingredient name / a product key."""
+    return {
+        **_counters,
+        "keys_changed_ratio": (
+            round(_counters["keys_changed"] / _counters["keys"], 4) if _counters["keys"] else 0.0
+        ),
+    }
@@ -0,0 +1,89 @@
+"""
+Product Facts — profile-agnostic property vectors, scored locally per profile
+
+analysis_cache is keyed by ingredients × profile, so every new profile is a
+miss even for a well-known product. This cache stores what does not depend
+on the profile: for each ingredient of a product, its allergens, diet
+incompatibilities and nutrition flags (gemini_service.extract_properties,
+one call per product). scoring.score_properties then maps the properties
+and any profile to a result in microseconds.
+
+  L1: in-process LRU (PRODUCT_FACT_CACHE_SIZE entries, PRODUCT_FACT_TTL seconds)
+  L2: Supabase product_facts table (same TTL, pruned by the cache sweeper)
+
+Keyed by sha256(model + prompt version + sorted normalized ingredients).
+A fact is {"properties": {normalized ingredient: [property, ...]}}.
+"""
+
+from __future__ import annotations
+
+import hashlib
+from typing import Optional
+
+from app.config import get_settings
+from app.core.cache import LRUCache
+from app.core.metrics import stage
+from app.services import supabase_service
+from app.services.gemini_service import DEFAULT_MODEL, PROPERTIES_PROMPT_VERSION, extract_properties
+from app.services.ingredient_cache import normalize_ingredient
+
+_memory: Optional[LRUCache] = None
+_counters = {"hits": 0, "misses": 0}
+
+
+def _get_memory() -> LRUCache:
+    global _memory
+    if _memory is None:
+        settings = get_settings()
+        _memory = LRUCache(maxsize=settings.product_fact_cache_size, ttl=settings.product_fact_ttl)
+    return _memory
+
+
+def _names(ingredients: list[str]) -> list[str]:
+    return list(dict.fromkeys(n for n in map(normalize_ingredient, ingredients) if n))
+
+
+def product_key(ingredients: list[str]) -> str:
+    """Cache key for a product's ingredient list under the current model + prompt."""
+    canonical = "|".join(sorted(_names(ingredients)))
+    return hashlib.sha256(
+        f"{DEFAULT_MODEL}:{PROPERTIES_PROMPT_VERSION}\0{canonical}".encode()
+    ).hexdigest()
+
+
+async def get_properties(ingredients: list[str], key: Optional[str] = None) -> dict[str, list[str]]:
+    """
+    {normalized ingredient: [property, ...]} for a product: L1, then L2,
+    else one Gemini call whose result is written to both tiers. Raises
+    whatever the Gemini call raises.
+    """
+    key = key or product_key(ingredients)
+    memory = _get_memory()
+    with stage("product_facts"):
+        facts = memory.get(key)
+        if facts is None:
+            facts = await supabase_service.get_product_facts(key)
+            if facts is not None:
+                memory.set(key, facts)
+    if facts is not None:
+        _counters["hits"] += 1
+        return facts["properties"]
+
+    _counters["misses"] += 1
+    with stage("gemini_properties"):
+        properties = await extract_properties(_names(ingredients))
+    facts = {"properties": properties}
+    memory.set(key, facts)
+    await supabase_service.set_product_facts(key, facts, ttl=get_settings().product_fact_ttl)
+    return properties
+
+
+def stats() -> dict:
+    """Product hit/miss counters plus L1 size."""
+    memory = _get_memory()
+    lookups = _counters["hits"] + _counters["misses"]
+    return {
+        **_counters,
+        "hit_ratio": round(_counters["hits"] / lookups, 4) if lookups else 0.0,
+        "memory": {"entries": len(memory), "maxsize": memory.maxsize},
+    }
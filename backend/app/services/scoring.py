@@ -0,0 +1,251 @@
+"""
+Scoring — Combine per-ingredient flags into a product result
+
+Used when an analysis is assembled from cached ingredient verdicts instead
+of one whole-product Gemini call. Produces the same shape as
+gemini_service.analyze_ingredients: score, risk_classification,
+flagged_ingredients, summary.
+
+score_properties() turns a product's profile-agnostic ingredient properties
+(product_facts.py) into flags for a given profile, using the tables below,
+so a known product is scored for any new profile without Gemini.
+
+  score:  100 minus a penalty per flag (risk level weight × severity),
+          capped at 20 for allergy/diet violations and 40 for other High Risk
+  class:  High if any allergy/diet violation or High Risk flag,
+          Medium if any Medium Risk flag or score < 70, else Low
+"""
+
+from __future__ import annotations
+
+import re
+from typing import Iterable, Optional
+
+# Penalty (score points) for a flag of severity 1.0 at each risk level
+LEVEL_PENALTY = {"High Risk": 60.0, "Medium Risk": 25.0, "Low Risk": 8.0}
+VIOLATION_CATEGORIES = ("allergy", "diet")
+VIOLATION_SCORE_CAP = 20
+HIGH_RISK_SCORE_CAP = 40
+MEDIUM_RISK_BELOW = 70
+
+RISK_ORDER = {"Low Risk": 0, "Medium Risk": 1, "High Risk": 2}
+CATEGORY_ORDER = {"allergy": 0, "diet": 1, "health": 2, "goal": 3}
+ALLERGY_SEVERITY = 1.0
+DIET_SEVERITY = 0.9
+
+# Allergy -> property (same names as the profile's allergy options)
+ALLERGY_PROPERTIES = {
+    a: a for a in (
+        "peanuts", "tree_nuts", "milk", "eggs", "wheat", "soy", "fish", "shellfish",
+        "sesame", "corn", "sulfites",
+    )
+}
+
+# Dietary restriction -> properties that violate it
+DIET_PROPERTIES: dict[str, tuple[str, ...]] = {
+    "vegan": ("not_vegan", "not_vegetarian"),
+    "vegetarian": ("not_vegetarian",),
+    "gluten_free": ("gluten", "wheat"),
+    "dairy_free": ("milk",),
+    "halal": ("not_halal", "alcohol"),
+    "kosher": ("not_kosher",),
+    "keto": ("not_keto", "added_sugar"),
+    "paleo": ("not_paleo",),
+    "low_sodium": ("high_sodium",),
+}
+
+# Health condition / goal -> {property: (risk level, severity)}
+CONDITION_PROPERTIES: dict[str, dict[str, tuple[str, float]]] = {
+    "diabetes": {
+        "added_sugar": ("High Risk", 0.8),
+        "high_glycemic": ("Medium Risk", 0.6),
+        "refined_grain": ("Low Risk", 0.4),
+    },
+    "hypertension": {"high_sodium": ("High Risk", 0.8), "caffeine": ("Low Risk", 0.3)},
+    "celiac_disease": {"gluten": ("High Risk", 1.0), "wheat": ("High Risk", 1.0)},
+    "ibs": {
+        "high_fodmap": ("Medium Risk", 0.6),
+        "artificial_sweetener": ("Medium Risk", 0.5),
+        "caffeine": ("Low Risk", 0.3),
+    },
+    "kidney_disease": {
+        "high_sodium": ("High Risk", 0.7),
+        "high_phosphorus": ("High Risk", 0.7),
+        "high_potassium": ("Medium Risk", 0.6),
+    },
+    "heart_disease": {
+        "trans_fat": ("High Risk", 0.9),
+        "saturated_fat": ("Medium Risk", 0.6),
+        "high_sodium": ("Medium Risk", 0.6),
+        "high_cholesterol": ("Medium Risk", 0.5),
+    },
+    "gout": {
+        "high_purine": ("High Risk", 0.8),
+        "alcohol": ("High Risk", 0.7),
+        "added_sugar": ("Medium Risk", 0.4),
+    },
+}
+GOAL_PROPERTIES: dict[str, dict[str, tuple[str, float]]] = {
+    "weight_loss": {
+        "added_sugar": ("Medium Risk", 0.6),
+        "refined_grain": ("Low Risk", 0.4),
+        "ultra_processed": ("Low Risk", 0.3),
+    },
+    "muscle_gain": {"added_sugar": ("Low Risk", 0.3)},
+    "clean_eating": {
+        "artificial_color": ("Medium Risk", 0.5),
+        "artificial_sweetener": ("Medium Risk", 0.5),
+        "preservative": ("Low Risk", 0.4),
+        "ultra_processed": ("Medium Risk", 0.5),
+    },
+    "low_sugar": {"added_sugar": ("Medium Risk", 0.7), "high_glycemic": ("Low Risk", 0.4)},
+    "high_protein": {},
+    "heart_health": {
+        "trans_fat": ("High Risk", 0.8),
+        "saturated_fat": ("Medium Risk", 0.5),
+        "high_sodium": ("Medium Risk", 0.5),
+    },
+    "gut_health": {
+        "artificial_sweetener": ("Medium Risk", 0.5),
+        "ultra_processed": ("Low Risk", 0.3),
+    },
+}
+
+_KEY_RE = re.compile(r"[^a-z0-9]+")
+
+
+def _names(flags: list[dict]) -> str:
+    return ", ".join(f["ingredient"] for f in flags)
+
+
+def _summary(flags: list[dict]) -> str:
+    allergy = [f for f in flags if f.get("category") == "allergy"]
+    diet = [f for f in flags if f.get("category") == "diet"]
+    high = [f for f in flags if f["risk_level"] == "High Risk"]
+    if allergy:
+        return f"Not safe for your allergies. Contains: {_names(allergy)}. Avoid this product."
+    if diet:
+        return f"Not suitable for your diet. Contains: {_names(diet)}."
+    if high:
+        return f"Not recommended for your health profile. Contains: {_names(high)}."
+    if flags:
+        return f"Mostly fine for your profile, but watch: {_names(flags)}."
+    return "No conflicts found with your profile."
+
+
+def combine_flags(flags: Iterable[Optional[dict]]) -> dict:
+    """Score and classify a product from its per-ingredient flags (None = no conflict)."""
+    flagged: list[dict] = []
+    seen: set[str] = set()
+    for f in flags:
+        if not f or f["ingredient"].lower() in seen:
+            continue
+        seen.add(f["ingredient"].lower())
+        flagged.append(f)
+
+    penalty = sum(
+        LEVEL_PENALTY.get(f["risk_level"], LEVEL_PENALTY["Medium Risk"]) * f["severity"]
+        for f in flagged
+    )
+    score = max(0, round(100 - penalty))
+    violation = any(f.get("category") in VIOLATION_CATEGORIES for f in flagged)
+    high = any(f["risk_level"] == "High Risk" for f in flagged)
+    if violation:
+        score = min(score, VIOLATION_SCORE_CAP)
+    elif high:
+        score = min(score, HIGH_RISK_SCORE_CAP)
+
+    if violation or high:
+        risk = "High Risk"
+    elif score < MEDIUM_RISK_BELOW or any(f["risk_level"] == "Medium Risk" for f in flagged):
+        risk = "Medium Risk"
+    else:
+        risk = "Low Risk"
+
+    return {
+        "score": score,
+        "risk_classification": risk,
+        "flagged_ingredients": [
+            {k: f[k] for k in ("ingredient", "risk_level", "reasons", "severity")}
+            for f in sorted(flagged, key=lambda f: -f["severity"])
+        ],
+        "summary": _summary(flagged),
+    }
+
+
+def _profile_key(value: str) -> str:
+    """Profile entry to table key: "Gluten-free" -> "gluten_free"."""
+    return _KEY_RE.sub("_", str(value).lower()).strip("_")
+
+
+def _label(value: str) -> str:
+    return value.replace("_", " ")
+
+
+def _profile_rules(profile: dict) -> Optional[dict[str, list[tuple[str, str, float, str]]]]:
+    """
+    Property -> [(category, risk level, severity, reason)] for a profile, or
+    None when an entry is not in the tables (Gemini has to judge it).
+    """
+    rules: dict[str, list[tuple[str, str, float, str]]] = {}
+    for allergy in map(_profile_key, profile.get("allergies") or []):
+        if allergy not in ALLERGY_PROPERTIES:
+            return None
+        reason = f"Contains {_label(allergy)} - allergen for your profile"
+        rules.setdefault(ALLERGY_PROPERTIES[allergy], []).append(
+            ("allergy", "High Risk", ALLERGY_SEVERITY, reason)
+        )
+    for diet in map(_profile_key, profile.get("dietary_restrictions") or []):
+        if diet not in DIET_PROPERTIES:
+            return None
+        for prop in DIET_PROPERTIES[diet]:
+            rules.setdefault(prop, []).append(
+                ("diet", "High Risk", DIET_SEVERITY, f"Not {_label(diet)}")
+            )
+    for field, table, category, template in (
+        ("health_conditions", CONDITION_PROPERTIES, "health", "{prop} - a concern with {entry}"),
+        ("health_goals", GOAL_PROPERTIES, "goal", "{prop} - works against your {entry} goal"),
+    ):
+        for entry in map(_profile_key, profile.get(field) or []):
+            if entry not in table:
+                return None
+            for prop, (level, severity) in table[entry].items():
+                reason = template.format(prop=_label(prop).capitalize(), entry=_label(entry))
+                rules.setdefault(prop, []).append((category, level, severity, reason))
+    return rules
+
+
+def profile_scorable(profile: dict) -> bool:
+    """True if score_properties can score this profile without Gemini."""
+    return _profile_rules(profile) is not None
+
+
+def score_properties(
+    ingredients: list[str],
+    properties: dict[str, list[str]],
+    profile: dict,
+) -> Optional[dict]:
+    """
+    Product result for a profile from per-ingredient properties
+    ({normalized ingredient: [property, ...]}); None if the profile has
+    entries the tables do not cover.
+    """
+    rules = _profile_rules(profile)
+    if rules is None:
+        return None
+    flags: list[dict] = []
+    for ing in ingredients:
+        name = " ".join(ing.lower().split())  # ingredient_cache.normalize_ingredient
+        conflicts = [c for prop in properties.get(name, ()) for c in rules.get(prop, ())]
+        if not conflicts:
+            continue
+        # One flag per ingredient: the most serious conflict sets level and category
+        top = max(conflicts, key=lambda c: (RISK_ORDER[c[1]], c[2], -CATEGORY_ORDER[c[0]]))
+        flags.append({
+            "ingredient": ing,
+            "risk_level": top[1],
+            "reasons": list(dict.fromkeys(c[3] for c in conflicts)),
+            "severity": max(c[2] for c in conflicts),
+            "category": min((c[0] for c in conflicts), key=CATEGORY_ORDER.get),
+        })
+    return combine_flags(flags)
@@ -2,20 +2,63 @@
 Supabase Service — User Profiles & Analysis Cache
 
 - User profiles: allergies, dietary_restrictions, health_conditions, health_goals
-- Analysis cache: cache full analysis results by (ingredients_hash, profile_hash)
+  (in-process cache per user, PROFILE_CACHE_TTL; updates write through)
+- Analysis cache: cache full analysis results by (ingredients_hash, profile_hash),
+  with an in-process L1 (LRU + TTL, negative caching for misses) in front of the table.
+  Rows carry a TTL (expires_at) and model/prompt version stamps; reads ignore
+  expired or stale rows, hits are counted in memory and flushed in bulk, and
+  cache_maintenance.py sweeps the table in the background. Writes from
+  /analyze are queued and batched by cache_writer.py.
+- Vision cache: persistent tier for vision extraction, keyed by image digest
+- Ingredient facts: persistent tier for per-ingredient verdicts, keyed by
+  (ingredient, profile hash, model, prompt version)
+
+Every query runs through a circuit breaker (app/core/circuit_breaker.py):
+during an outage reads and writes fall back at once instead of each
+waiting out the HTTP timeout.
 """
 
 from __future__ import annotations
 
 import hashlib
 import json
+from datetime import datetime, timedelta, timezone
 from typing import Any, Optional
 
+from postgrest.exceptions import APIError
+
 from app.config import get_settings
+from app.core import metrics
+from app.core.cache import LRUCache
+from app.core.circuit_breaker import CircuitBreaker, breaker_from_settings
 from app.database import get_supabase_client
+from app.services.gemini_service import (
+    ANALYSIS_PROMPT_VERSION,
+    DEFAULT_MODEL,
+    INGREDIENT_PROMPT_VERSION,
+    PROPERTIES_PROMPT_VERSION,
+)
 
 TABLE_PROFILES = "user_profiles"
 TABLE_CACHE = "analysis_cache"
+TABLE_VISION_CACHE = "vision_cache"
+TABLE_INGREDIENT_FACTS = "ingredient_facts"
+TABLE_PRODUCT_FACTS = "product_facts"
+
+# user_id -> normalized profile (short TTL guards against out-of-band updates)
+_profile_cache: Optional[LRUCache] = None
+
+# Analysis cache L1: key -> result, or _L1_MISS for a recent confirmed miss
+_analysis_l1: Optional[LRUCache] = None
+_analysis_l1_negative_hits = 0
+_L1_MISS = object()
+_L1_ABSENT = object()
+
+# Fails Supabase calls fast while the database is down (see _execute)
+_breaker: Optional[CircuitBreaker] = None
+
+# cache_key -> hits not yet flushed to analysis_cache.hit_count
+_pending_hits: dict[str, int] = {}
 
 EMPTY_PROFILE = {
     "allergies": [],
@@ -25,12 +68,40 @@ EMPTY_PROFILE = {
 }
 
 
-def _get_client():
-    return get_supabase_client()
+async def _get_client():
+    return await get_supabase_client()
+
+
+def _is_outage(e: BaseException) -> bool:
+    """Transport errors, timeouts and server-side failures; a query error means the database answered."""
+    if isinstance(e, APIError):
+        return str(e.code or "").startswith(("5", "08"))  # HTTP 5xx, SQLSTATE 08xxx/5xxxx
+    return True
+
+
+def _get_breaker() -> CircuitBreaker:
+    global _breaker
+    if _breaker is None:
+        _breaker = breaker_from_settings("Supabase", _is_outage)
+    return _breaker
+
+
+def breaker_stats() -> dict:
+    """Supabase circuit breaker state for /health."""
+    return _get_breaker().stats()
 
 
-def _profile_hash(profile: dict) -> str:
-    """Hash user profile for cache key."""
+async def _execute(query) -> Any:
+    """
+    Run a query builder through the circuit breaker. While Supabase is
+    failing this raises CircuitOpen at once, and the caller's fallback
+    (empty profile, cache miss, skipped write) applies without a timeout.
+    """
+    return await _get_breaker().call(query.execute)
+
+
+def profile_hash(profile: dict) -> str:
+    """Hash user profile (analysis cache key, ingredient fact cache key)."""
     canonical = json.dumps({
         "allergies": sorted(profile.get("allergies", []) or []),
         "dietary_restrictions": sorted(profile.get("dietary_restrictions", []) or []),
@@ -48,7 +119,7 @@ def _ingredients_hash(ingredients: list[str]) -> str:
 
 def cache_key(ingredients: list[str], profile: dict) -> str:
     """Composite cache key for analysis."""
-    return f"{_ingredients_hash(ingredients)}_{_profile_hash(profile)}"
+    return f"{_ingredients_hash(ingredients)}_{profile_hash(profile)}"
 
 
 def _to_list(val) -> list:
@@ -66,36 +137,71 @@ def _to_list(val) -> list:
     return []
 
 
-def get_user_profile(user_id: Optional[str]) -> dict:
-    """Fetch user profile. Returns EMPTY_PROFILE if not found."""
+def _get_profile_cache() -> LRUCache:
+    global _profile_cache
+    if _profile_cache is None:
+        settings = get_settings()
+        _profile_cache = LRUCache(maxsize=settings.profile_cache_size, ttl=settings.profile_cache_ttl)
+    return _profile_cache
+
+
+def _copy_profile(profile: dict) -> dict:
+    """Callers get their own lists, so the cached profile is never mutated."""
+    return {k: list(v) for k, v in profile.items()}
+
+
+def _profile_from_row(row: dict) -> dict:
+    return {
+        "allergies": _to_list(row.get("allergies")),
+        "dietary_restrictions": _to_list(row.get("dietary_restrictions")),
+        "health_conditions": _to_list(row.get("health_conditions")),
+        "health_goals": _to_list(row.get("health_goals")),
+    }
+
+
+def invalidate_user_profile(user_id: str) -> None:
+    """Drop a cached profile (e.g. after an out-of-band update)."""
+    _get_profile_cache().delete(user_id)
+
+
+def profile_cache_stats() -> dict:
+    """Profile cache counters for /health."""
+    return _get_profile_cache().stats()
+
+
+async def get_user_profile(user_id: Optional[str]) -> dict:
+    """Fetch user profile (cached per user for PROFILE_CACHE_TTL). Returns EMPTY_PROFILE if not found."""
     if not user_id:
         return EMPTY_PROFILE.copy()
+    cache = _get_profile_cache()
+    cached = cache.get(user_id)
+    if cached is not None:
+        return _copy_profile(cached)
     try:
-        client = _get_client()
-        r = client.table(TABLE_PROFILES).select(
+        client = await _get_client()
+        r = await _execute(client.table(TABLE_PROFILES).select(
             "allergies, dietary_restrictions, health_conditions, health_goals"
-        ).eq("user_id", user_id).execute()
+        ).eq("user_id", user_id))
         if not r.data or len(r.data) == 0:
-            return EMPTY_PROFILE.copy()
-        row = r.data[0]
-        return {
-            "allergies": _to_list(row.get("allergies")),
-            "dietary_restrictions": _to_list(row.get("dietary_restrictions")),
-            "health_conditions": _to_list(row.get("health_conditions")),
-            "health_goals": _to_list(row.get("health_goals")),
-        }
-    except Exception:
+            profile = EMPTY_PROFILE.copy()
+        else:
+            profile = _profile_from_row(r.data[0])
+    except Exception as e:
+        metrics.count_upstream_error("supabase", e)
+        # Not cached: the next request retries the read
         return EMPTY_PROFILE.copy()
+    cache.set(user_id, profile)
+    return _copy_profile(profile)
 
 
-def update_user_profile(
+async def update_user_profile(
     user_id: str,
     allergies: list[str] | None = None,
     dietary_restrictions: list[str] | None = None,
     health_conditions: list[str] | None = None,
     health_goals: list[str] | None = None,
 ) -> dict:
-    """Upsert user profile."""
+    """Upsert user profile (write-through to the profile cache)."""
     payload = {}
     if allergies is not None:
         payload["allergies"] = [str(x).strip().lower() for x in allergies if x]
@@ -107,44 +213,381 @@ def update_user_profile(
         payload["health_goals"] = [str(x).strip().lower() for x in health_goals if x]
 
     if not payload:
-        return get_user_profile(user_id)
+        return await get_user_profile(user_id)
 
+    # Whatever happens below, the old cached copy is no longer trustworthy
+    invalidate_user_profile(user_id)
     try:
-        client = _get_client()
+        client = await _get_client()
         doc = {"user_id": user_id, **payload}
-        r = client.table(TABLE_PROFILES).upsert(doc, on_conflict="user_id").execute()
+        r = await _execute(client.table(TABLE_PROFILES).upsert(doc, on_conflict="user_id"))
         if r.data and len(r.data) > 0:
-            row = r.data[0]
-            return {
-                "allergies": _to_list(row.get("allergies")),
-                "dietary_restrictions": _to_list(row.get("dietary_restrictions")),
-                "health_conditions": _to_list(row.get("health_conditions")),
-                "health_goals": _to_list(row.get("health_goals")),
-            }
-        return get_user_profile(user_id)
-    except Exception:
-        return get_user_profile(user_id)
-
-
-def get_cached_analysis(key: str) -> Optional[dict]:
-    """Get cached analysis result."""
-    try:
-        client = _get_client()
-        r = client.table(TABLE_CACHE).select("result").eq("cache_key", key).execute()
+            profile = _profile_from_row(r.data[0])
+            _get_profile_cache().set(user_id, profile)
+            return _copy_profile(profile)
+        return await get_user_profile(user_id)
+    except Exception as e:
+        metrics.count_upstream_error("supabase", e)
+        return await get_user_profile(user_id)
+
+
+def _get_analysis_l1() -> LRUCache:
+    global _analysis_l1
+    if _analysis_l1 is None:
+        settings = get_settings()
+        _analysis_l1 = LRUCache(maxsize=settings.analysis_l1_size, ttl=settings.analysis_l1_ttl)
+    return _analysis_l1
+
+
+def _l1_lookup(key: str) -> tuple[bool, Optional[dict]]:
+    """(found, result) from L1. found with result None = cached miss."""
+    global _analysis_l1_negative_hits
+    entry = _get_analysis_l1().get(key, _L1_ABSENT)
+    if entry is _L1_ABSENT:
+        return False, None
+    if entry is _L1_MISS:
+        _analysis_l1_negative_hits += 1
+        return True, None
+    return True, entry
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _record_hit(key: str) -> None:
+    _pending_hits[key] = _pending_hits.get(key, 0) + 1
+
+
+def _fresh_analysis_rows(query):
+    """Restrict an analysis_cache query to unexpired rows of the current model/prompt."""
+    return (
+        query.eq("model_version", DEFAULT_MODEL)
+        .eq("prompt_version", ANALYSIS_PROMPT_VERSION)
+        .gt("expires_at", _now().isoformat())
+    )
+
+
+def _l1_store_miss(key: str) -> None:
+    _get_analysis_l1().set(key, _L1_MISS, ttl=get_settings().analysis_l1_negative_ttl)
+
+
+def analysis_cache_stats() -> dict:
+    """L1 counters (hits include negative hits) for /health."""
+    return {**_get_analysis_l1().stats(), "negative_hits": _analysis_l1_negative_hits}
+
+
+async def get_cached_analysis(key: str) -> Optional[dict]:
+    """Get cached analysis result (L1 in-process, then Supabase)."""
+    found, result = _l1_lookup(key)
+    if found:
+        if result is not None:
+            _record_hit(key)
+        return result
+    try:
+        client = await _get_client()
+        r = await _execute(_fresh_analysis_rows(
+            client.table(TABLE_CACHE).select("result").eq("cache_key", key)
+        ))
+        if r.data and len(r.data) > 0 and r.data[0].get("result"):
+            result = r.data[0]["result"]
+            _get_analysis_l1().set(key, result)
+            _record_hit(key)
+            return result
+        _l1_store_miss(key)
+    except Exception as e:
+        metrics.count_upstream_error("supabase", e)
+    return None
+
+
+async def get_cached_analyses(keys: list[str]) -> dict[str, dict]:
+    """Get cached analysis results for many keys in one query. Misses are omitted."""
+    results: dict[str, dict] = {}
+    remaining = []
+    for key in keys:
+        found, result = _l1_lookup(key)
+        if not found:
+            remaining.append(key)
+        elif result is not None:
+            results[key] = result
+            _record_hit(key)
+    if not remaining:
+        return results
+    try:
+        client = await _get_client()
+        r = await _execute(_fresh_analysis_rows(
+            client.table(TABLE_CACHE).select("cache_key, result").in_("cache_key", remaining)
+        ))
+        l1 = _get_analysis_l1()
+        for row in r.data or []:
+            if row.get("result"):
+                results[row["cache_key"]] = row["result"]
+                l1.set(row["cache_key"], row["result"])
+                _record_hit(row["cache_key"])
+        for key in remaining:
+            if key not in results:
+                _l1_store_miss(key)
+    except Exception as e:
+        metrics.count_upstream_error("supabase", e)
+    return results
+
+
+def set_analysis_l1(key: str, result: dict) -> None:
+    """Cache an analysis result in L1 only (cache_writer.py queues the table write)."""
+    _get_analysis_l1().set(key, result)
+
+
+def _analysis_row(key: str, result: dict, now: datetime, ttl: float) -> dict:
+    # created_at and hit_count are left out: column defaults on insert, and a
+    # rewrite of an existing key keeps its age and accumulated hits
+    return {
+        "cache_key": key,
+        "result": result,
+        "last_hit_at": now.isoformat(),
+        "expires_at": (now + timedelta(seconds=ttl)).isoformat(),
+        "model_version": DEFAULT_MODEL,
+        "prompt_version": ANALYSIS_PROMPT_VERSION,
+    }
+
+
+async def set_cached_analysis(key: str, result: dict, ttl: Optional[float] = None) -> None:
+    """Cache analysis result (write-through: L1 + Supabase). ttl defaults to ANALYSIS_CACHE_TTL."""
+    await set_cached_analyses({key: result}, ttl)
+
+
+async def set_cached_analyses(results: dict[str, dict], ttl: Optional[float] = None) -> int:
+    """Cache many analysis results (L1 + one Supabase upsert). Returns rows written."""
+    for key, result in results.items():
+        set_analysis_l1(key, result)
+    return await upsert_analyses(results, ttl)
+
+
+async def upsert_analyses(results: dict[str, dict], ttl: Optional[float] = None) -> int:
+    """
+    Write analysis results to the table only, in one upsert. ttl defaults
+    to ANALYSIS_CACHE_TTL. Returns rows written (0 on failure).
+    """
+    if not results:
+        return 0
+    now = _now()
+    ttl = get_settings().analysis_cache_ttl if ttl is None else ttl
+    try:
+        client = await _get_client()
+        await _execute(client.table(TABLE_CACHE).upsert(
+            [_analysis_row(key, result, now, ttl) for key, result in results.items()],
+            on_conflict="cache_key",
+        ))
+    except Exception as e:
+        metrics.count_upstream_error("supabase", e)
+        return 0
+    return len(results)
+
+
+async def flush_cache_hits() -> int:
+    """Write buffered hit counts to analysis_cache in one RPC. Returns keys flushed."""
+    global _pending_hits
+    if not _pending_hits:
+        return 0
+    hits, _pending_hits = _pending_hits, {}
+    try:
+        client = await _get_client()
+        await _execute(client.rpc(
+            "touch_analysis_cache",
+            {"keys": list(hits), "counts": list(hits.values())},
+        ))
+    except Exception as e:
+        metrics.count_upstream_error("supabase", e)
+        # Put them back (merged with any new hits) for the next flush
+        for key, n in hits.items():
+            _pending_hits[key] = _pending_hits.get(key, 0) + n
+        return 0
+    return len(hits)
+
+
+async def sweep_analysis_cache(batch_size: int, max_bytes: int) -> int:
+    """Evict one batch of expired/stale/over-budget rows. Returns rows removed."""
+    try:
+        client = await _get_client()
+        r = await _execute(client.rpc(
+            "sweep_analysis_cache",
+            {
+                "batch_size": int(batch_size),
+                "max_bytes": int(max_bytes),
+                "current_model": DEFAULT_MODEL,
+                "current_prompt": ANALYSIS_PROMPT_VERSION,
+            },
+        ))
+        return int(r.data or 0)
+    except Exception as e:
+        metrics.count_upstream_error("supabase", e)
+        return 0
+
+
+async def get_cached_vision(key: str, max_age: float) -> Optional[dict]:
+    """Get cached vision result no older than max_age seconds."""
+    try:
+        client = await _get_client()
+        cutoff = (datetime.now(timezone.utc) - timedelta(seconds=max_age)).isoformat()
+        r = await _execute(
+            client.table(TABLE_VISION_CACHE)
+            .select("result")
+            .eq("cache_key", key)
+            .gte("created_at", cutoff)
+        )
         if r.data and len(r.data) > 0:
             return r.data[0].get("result")
-    except Exception:
-        pass
+    except Exception as e:
+        metrics.count_upstream_error("supabase", e)
     return None
 
 
-def set_cached_analysis(key: str, result: dict) -> None:
-    """Cache analysis result."""
+async def set_cached_vision(key: str, result: dict) -> None:
+    """Cache vision result (refreshes created_at on overwrite)."""
     try:
-        client = _get_client()
-        client.table(TABLE_CACHE).upsert(
-            {"cache_key": key, "result": result},
+        client = await _get_client()
+        await _execute(client.table(TABLE_VISION_CACHE).upsert(
+            {
+                "cache_key": key,
+                "result": result,
+                "created_at": datetime.now(timezone.utc).isoformat(),
+            },
             on_conflict="cache_key",
-        ).execute()
-    except Exception:
-        pass
+        ))
+    except Exception as e:
+        metrics.count_upstream_error("supabase", e)
+
+
+async def prune_vision_cache(max_age: float, max_rows: int) -> int:
+    """Evict expired and over-budget vision cache rows. Returns rows removed."""
+    try:
+        client = await _get_client()
+        r = await _execute(client.rpc(
+            "prune_vision_cache",
+            {"max_age_seconds": int(max_age), "max_rows": int(max_rows)},
+        ))
+        return int(r.data or 0)
+    except Exception as e:
+        metrics.count_upstream_error("supabase", e)
+        return 0
+
+
+async def get_ingredient_facts(profile_hash: str, ingredients: list[str]) -> dict[str, dict]:
+    """Unexpired facts for (ingredient, profile_hash) under the current model/prompt. Misses are omitted."""
+    if not ingredients:
+        return {}
+    try:
+        client = await _get_client()
+        r = await _execute(
+            client.table(TABLE_INGREDIENT_FACTS)
+            .select("ingredient, fact")
+            .eq("profile_hash", profile_hash)
+            .eq("model_version", DEFAULT_MODEL)
+            .eq("prompt_version", INGREDIENT_PROMPT_VERSION)
+            .gt("expires_at", _now().isoformat())
+            .in_("ingredient", ingredients)
+        )
+        return {row["ingredient"]: row["fact"] for row in r.data or [] if row.get("fact") is not None}
+    except Exception as e:
+        metrics.count_upstream_error("supabase", e)
+        return {}
+
+
+async def set_ingredient_facts(profile_hash: str, facts: dict[str, dict], ttl: float) -> None:
+    """Upsert facts for many ingredients in one request."""
+    if not facts:
+        return
+    now = _now()
+    expires_at = (now + timedelta(seconds=ttl)).isoformat()
+    rows = [
+        {
+            "ingredient": ingredient,
+            "profile_hash": profile_hash,
+            "model_version": DEFAULT_MODEL,
+            "prompt_version": INGREDIENT_PROMPT_VERSION,
+            "fact": fact,
+            "created_at": now.isoformat(),
+            "expires_at": expires_at,
+        }
+        for ingredient, fact in facts.items()
+    ]
+    try:
+        client = await _get_client()
+        await _execute(client.table(TABLE_INGREDIENT_FACTS).upsert(
+            rows,
+            on_conflict="ingredient,profile_hash,model_version,prompt_version",
+        ))
+    except Exception as e:
+        metrics.count_upstream_error("supabase", e)
+
+
+async def prune_ingredient_facts(batch_size: int) -> int:
+    """Delete one batch of expired or version-stale facts. Returns rows removed."""
+    try:
+        client = await _get_client()
+        r = await _execute(client.rpc(
+            "prune_ingredient_facts",
+            {
+                "batch_size": int(batch_size),
+                "current_model": DEFAULT_MODEL,
+                "current_prompt": INGREDIENT_PROMPT_VERSION,
+            },
+        ))
+        return int(r.data or 0)
+    except Exception as e:
+        metrics.count_upstream_error("supabase", e)
+        return 0
+
+
+async def get_product_facts(key: str) -> Optional[dict]:
+    """Unexpired profile-agnostic facts for a product key, or None."""
+    try:
+        client = await _get_client()
+        r = await _execute(
+            client.table(TABLE_PRODUCT_FACTS)
+            .select("facts")
+            .eq("cache_key", key)
+            .gt("expires_at", _now().isoformat())
+        )
+        if r.data:
+            return r.data[0].get("facts")
+    except Exception as e:
+        metrics.count_upstream_error("supabase", e)
+    return None
+
+
+async def set_product_facts(key: str, facts: dict, ttl: float) -> None:
+    """Upsert a product's facts, stamped with the current model/prompt version."""
+    now = _now()
+    try:
+        client = await _get_client()
+        await _execute(client.table(TABLE_PRODUCT_FACTS).upsert(
+            {
+                "cache_key": key,
+                "model_version": DEFAULT_MODEL,
+                "prompt_version": PROPERTIES_PROMPT_VERSION,
+                "facts": facts,
+                "created_at": now.isoformat(),
+                "expires_at": (now + timedelta(seconds=ttl)).isoformat(),
+            },
+            on_conflict="cache_key",
+        ))
+    except Exception as e:
+        metrics.count_upstream_error("supabase", e)
+
+
+async def prune_product_facts(batch_size: int) -> int:
+    """Delete one batch of expired or version-stale product facts. Returns rows removed."""
+    try:
+        client = await _get_client()
+        r = await _execute(client.rpc(
+            "prune_product_facts",
+            {
+                "batch_size": int(batch_size),
+                "current_model": DEFAULT_MODEL,
+                "current_prompt": PROPERTIES_PROMPT_VERSION,
+            },
+        ))
+        return int(r.data or 0)
+    except Exception as e:
+        metrics.count_upstream_error("supabase", e)
+        return 0
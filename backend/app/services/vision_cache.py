@@ -0,0 +1,68 @@
+"""
+Vision Cache — skip Gemini vision for repeat label photos
+
+Content-addressed by sha256(model/prompt version + image bytes), so client
+retries and shared product photos reuse the earlier extraction.
+
+  L1: in-process LRU (VISION_CACHE_SIZE entries, VISION_CACHE_TTL seconds)
+  L2: Supabase vision_cache table (same TTL, pruned to VISION_CACHE_MAX_ROWS
+      by the cache sweeper in cache_maintenance.py)
+"""
+
+from __future__ import annotations
+
+import hashlib
+from typing import Optional
+
+from app.config import get_settings
+from app.core.cache import LRUCache
+from app.core.concurrency import run_blocking
+from app.services import supabase_service
+
+_memory: Optional[LRUCache] = None
+
+
+def _get_memory() -> LRUCache:
+    global _memory
+    if _memory is None:
+        settings = get_settings()
+        _memory = LRUCache(maxsize=settings.vision_cache_size, ttl=settings.vision_cache_ttl)
+    return _memory
+
+
+def _digest(image_bytes: bytes, model_version: str) -> str:
+    h = hashlib.sha256()
+    h.update(model_version.encode())
+    h.update(b"\0")
+    h.update(image_bytes)
+    return h.hexdigest()
+
+
+async def image_digest(image_bytes: bytes, model_version: str) -> str:
+    """Cache key for an uploaded image under a given vision model + prompt version."""
+    # Multi-MB photos: hash off the event loop (hashlib releases the GIL)
+    return await run_blocking(_digest, image_bytes, model_version)
+
+
+async def get_cached_vision(key: str) -> Optional[dict]:
+    """Look up L1 then L2. L2 hits are promoted into L1."""
+    memory = _get_memory()
+    vision = memory.get(key)
+    if vision is not None:
+        return vision
+    vision = await supabase_service.get_cached_vision(key, max_age=get_settings().vision_cache_ttl)
+    if vision:
+        memory.set(key, vision)
+        return vision
+    return None
+
+
+async def set_cached_vision(key: str, vision: dict) -> None:
+    """Write through to both tiers."""
+    _get_memory().set(key, vision)
+    await supabase_service.set_cached_vision(key, vision)
+
+
+def stats() -> dict:
+    """L1 counters."""
+    return _get_memory().stats()
@@ -0,0 +1,77 @@
+"""
+Micro-benchmark: compiled allergen matcher vs the previous nested-loop scan.
+
+    cd backend && python -m benchmarks.bench_allergen_check
+"""
+
+from __future__ import annotations
+
+import random
+import timeit
+
+from app.core.utils import to_title_case
+from app.services.allergen_check import ALLERGEN_KEYWORDS, check_allergens
+
+
+def check_allergens_naive(ingredients: list[str], allergies: list[str]) -> list[dict]:
+    """Previous implementation: allergies x ingredients x keywords substring checks."""
+    if not allergies:
+        return []
+    ingredients_lower = [i.lower() for i in ingredients if i]
+    flagged = []
+    for allergy in allergies:
+        allergy_lower = allergy.lower().strip().replace(" ", "_")
+        keywords = ALLERGEN_KEYWORDS.get(allergy_lower)
+        if not keywords:
+            keywords = [allergy_lower.replace("_", " ")]
+        for ing in ingredients_lower:
+            for kw in keywords:
+                if kw in ing:
+                    display = next(
+                        (i for i in ingredients if i.lower() == ing),
+                        to_title_case(ing),
+                    )
+                    flagged.append({
+                        "ingredient": display,
+                        "risk_level": "High Risk",
+                        "reasons": [f"Contains {allergy.replace('_', ' ')} - allergen for your profile"],
+                        "severity": 1.0,
+                    })
+                    break
+    return flagged
+
+
+FILLER = [
+    "Sugar", "Salt", "Water", "Enriched Flour", "Natural Flavors", "Citric Acid",
+    "Palm Oil", "Dextrose", "Maltodextrin", "Soy Lecithin", "Whey Powder",
+    "Peanut Butter", "Almond Flour", "Corn Syrup", "Sodium Benzoate", "Egg Whites",
+]
+
+
+def _ingredients(n: int, rng: random.Random) -> list[str]:
+    return [f"{rng.choice(FILLER)} {rng.choice(FILLER)}" for _ in range(n)]
+
+
+def main() -> None:
+    rng = random.Random(42)
+    standard = list(ALLERGEN_KEYWORDS)
+    custom = [f"custom additive {i}" for i in range(40)]
+    cases = [
+        ("10 ingredients, 3 allergies", _ingredients(10, rng), ["peanuts", "milk", "eggs"]),
+        ("40 ingredients, all standard", _ingredients(40, rng), standard),
+        ("120 ingredients, standard + 40 custom", _ingredients(120, rng), standard + custom),
+    ]
+    print(f"{'case':42} {'naive µs':>10} {'compiled µs':>12} {'speedup':>8}")
+    for label, ingredients, allergies in cases:
+        assert check_allergens(ingredients, allergies) == check_allergens_naive(ingredients, allergies)
+        number = 200
+        naive = timeit.timeit(lambda: check_allergens_naive(ingredients, allergies), number=number)
+        compiled = timeit.timeit(lambda: check_allergens(ingredients, allergies), number=number)
+        print(
+            f"{label:42} {naive / number * 1e6:10.1f} {compiled / number * 1e6:12.1f}"
+            f" {naive / compiled:7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,304 @@
+"""
+End-to-end benchmark: the FastAPI app in-process, upstreams replaced by fakes.
+
+    cd backend && python -m benchmarks.bench_e2e
+    cd backend && python -m benchmarks.bench_e2e --concurrency 1,16,64 --requests 300 \\
+        --gemini-latency 0.8 --gemini-429 0.05 --compare benchmarks/results/<earlier>.json
+
+Requests go through httpx's ASGI transport, so the whole stack (middleware,
+auth, caches, single-flight, limiter) runs, but no sockets or real APIs are
+involved. Gemini, Supabase and ElevenLabs are the fakes from benchmarks/fakes.py
+with the latency / 429 rates given on the command line.
+
+Scenarios (each run at every concurrency level):
+  analyze_miss        POST /analyze, new image every request (vision + analysis miss)
+  analyze_hit         POST /analyze, images seen before (served from caches)
+  analyze_audio_miss  POST /analyze include_audio=true + GET the audio, new images
+  analyze_audio_hit   same, for images (and clips) seen before
+  profile_miss        GET /user/profile, new user every request (token + profile miss)
+  profile_hit         GET /user/profile, users seen before
+
+Reports throughput and p50/p95/p99 latency per scenario and writes the run
+to benchmarks/results/e2e-<timestamp>.json (or --out). --compare prints the
+change against an earlier result file.
+
+The Gemini admission limiter is raised to GEMINI_RATE_LIMIT=1000 unless set,
+so upstream quota is modelled by --gemini-429 rather than the local cap.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Awaitable, Callable
+
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+JWT_SECRET = "bench-secret-for-local-hs256-tokens-only"
+SCENARIOS = (
+    "analyze_miss",
+    "analyze_hit",
+    "analyze_audio_miss",
+    "analyze_audio_hit",
+    "profile_miss",
+    "profile_hit",
+)
+WARM_SET = 20
+PROFILE = json.dumps({"allergies": ["peanuts", "milk"], "health_conditions": ["diabetes"]})
+
+
+def _parse_args() -> argparse.Namespace:
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("--concurrency", default="1,8,32", help="comma-separated levels")
+    p.add_argument("--requests", type=int, default=200, help="requests per scenario and level")
+    p.add_argument("--scenarios", default=",".join(SCENARIOS))
+    p.add_argument("--gemini-latency", type=float, default=0.4)
+    p.add_argument("--gemini-jitter", type=float, default=0.1)
+    p.add_argument("--gemini-429", type=float, default=0.0, help="fraction of calls failing with 429")
+    p.add_argument("--supabase-latency", type=float, default=0.02)
+    p.add_argument("--supabase-jitter", type=float, default=0.005)
+    p.add_argument("--supabase-429", type=float, default=0.0)
+    p.add_argument("--tts-latency", type=float, default=0.25, help="time to first audio byte")
+    p.add_argument("--tts-jitter", type=float, default=0.05)
+    p.add_argument("--tts-429", type=float, default=0.0)
+    p.add_argument("--out", type=Path, default=None)
+    p.add_argument("--compare", type=Path, default=None, help="earlier result JSON to diff against")
+    return p.parse_args()
+
+
+def _percentile(sorted_values: list[float], q: float) -> float:
+    """Nearest-rank percentile of an ascending list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, min(len(sorted_values), round(q / 100 * len(sorted_values) + 0.5)))
+    return sorted_values[rank - 1]
+
+
+async def _run(
+    name: str,
+    concurrency: int,
+    total: int,
+    op: Callable[[int], Awaitable[int]],
+) -> dict:
+    """Run op(0..total-1) with `concurrency` workers; op returns the HTTP status."""
+    latencies: list[float] = []
+    statuses: dict[str, int] = {}
+    next_i = 0
+
+    async def worker() -> None:
+        nonlocal next_i
+        while next_i < total:
+            i = next_i
+            next_i += 1
+            start = time.perf_counter()
+            try:
+                code = await op(i)
+            except Exception as e:  # transport-level failure
+                code = type(e).__name__
+            latencies.append(time.perf_counter() - start)
+            statuses[str(code)] = statuses.get(str(code), 0) + 1
+
+    wall = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    wall = time.perf_counter() - wall
+    latencies.sort()
+    ok = sum(n for code, n in statuses.items() if code.startswith("2"))
+    return {
+        "scenario": name,
+        "concurrency": concurrency,
+        "requests": total,
+        "ok": ok,
+        "statuses": statuses,
+        "wall_s": round(wall, 3),
+        "throughput_rps": round(total / wall, 2) if wall else 0.0,
+        "mean_ms": round(sum(latencies) / len(latencies) * 1000, 2) if latencies else 0.0,
+        "p50_ms": round(_percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(_percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(_percentile(latencies, 99) * 1000, 2),
+        "max_ms": round(latencies[-1] * 1000, 2) if latencies else 0.0,
+    }
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return "unknown"
+
+
+def _print_table(results: list[dict]) -> None:
+    print(
+        f"\n{'scenario':20} {'conc':>5} {'ok/req':>9} {'req/s':>9} "
+        f"{'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}"
+    )
+    for r in results:
+        print(
+            f"{r['scenario']:20} {r['concurrency']:5} {r['ok']:>4}/{r['requests']:<4} "
+            f"{r['throughput_rps']:9.1f} {r['p50_ms']:9.1f} {r['p95_ms']:9.1f} {r['p99_ms']:9.1f}"
+        )
+
+
+def _print_compare(results: list[dict], baseline_path: Path) -> None:
+    baseline = json.loads(baseline_path.read_text())
+    before = {(r["scenario"], r["concurrency"]): r for r in baseline.get("results", [])}
+    print(f"\nvs {baseline_path} ({baseline.get('meta', {}).get('commit', '?')}):")
+    print(f"{'scenario':20} {'conc':>5} {'req/s Δ':>9} {'p50 Δ':>8} {'p95 Δ':>8} {'p99 Δ':>8}")
+
+    def pct(new: float, old: float) -> str:
+        return f"{(new - old) / old * 100:+7.1f}%" if old else "    n/a"
+
+    for r in results:
+        b = before.get((r["scenario"], r["concurrency"]))
+        if b is None:
+            continue
+        print(
+            f"{r['scenario']:20} {r['concurrency']:5} {pct(r['throughput_rps'], b['throughput_rps']):>9} "
+            f"{pct(r['p50_ms'], b['p50_ms']):>8} {pct(r['p95_ms'], b['p95_ms']):>8} "
+            f"{pct(r['p99_ms'], b['p99_ms']):>8}"
+        )
+
+
+async def _main(args: argparse.Namespace) -> int:
+    # Settings are read once, so the environment must be ready before app imports
+    os.environ["SUPABASE_JWT_SECRET"] = JWT_SECRET
+    os.environ.setdefault("AUDIO_CACHE_DIR", tempfile.mkdtemp(prefix="bench-audio-"))
+    os.environ.setdefault("CACHE_SWEEP_INTERVAL", "0")
+    os.environ.setdefault("GEMINI_RATE_LIMIT", "1000")
+    os.environ.setdefault("GEMINI_BURST", "1000")
+
+    import httpx
+    import jwt
+
+    from app.clients import ClientRegistry, set_clients
+    from app.main import app
+    from app.services import cache_writer
+    from benchmarks.fakes import FakeElevenLabs, FakeGemini, FakeSupabase, Upstream
+
+    logging.getLogger().setLevel(logging.WARNING)
+
+    gemini_up = Upstream(args.gemini_latency, args.gemini_jitter, args.gemini_429)
+    supabase_up = Upstream(args.supabase_latency, args.supabase_jitter, args.supabase_429)
+    tts_up = Upstream(args.tts_latency, args.tts_jitter, args.tts_429)
+    supabase = FakeSupabase(supabase_up)
+    http = httpx.AsyncClient()
+    set_clients(ClientRegistry(
+        gemini=FakeGemini(gemini_up),
+        elevenlabs=FakeElevenLabs(tts_up),
+        supabase=supabase,
+        http=http,
+    ))
+
+    def token(user: str) -> str:
+        return jwt.encode(
+            {"sub": user, "aud": "authenticated", "exp": int(time.time()) + 3600},
+            JWT_SECRET,
+            algorithm="HS256",
+        )
+
+    # ASGITransport does not run the lifespan; start the cache writer as it would
+    cache_writer.start_writer()
+    transport = httpx.ASGITransport(app=app)
+    client = httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120)
+    run_id = f"{time.time_ns()}"
+
+    def image(tag: str) -> bytes:
+        return f"bench-image-{tag}".encode() * 64
+
+    async def analyze(img: bytes, audio: bool) -> int:
+        r = await client.post(
+            "/analyze",
+            files={"image": ("label.jpg", img, "image/jpeg")},
+            data={"profile_json": PROFILE, "include_audio": "true" if audio else "false"},
+        )
+        if r.status_code == 200 and audio and r.json().get("audio_url"):
+            a = await client.get(r.json()["audio_url"])
+            return a.status_code
+        return r.status_code
+
+    async def profile(user: str) -> int:
+        r = await client.get("/user/profile", headers={"Authorization": f"Bearer {tokens[user]}"})
+        return r.status_code
+
+    levels = [int(c) for c in args.concurrency.split(",") if c.strip()]
+    selected = [s for s in args.scenarios.split(",") if s in SCENARIOS]
+    tokens: dict[str, str] = {}
+    results = []
+    try:
+        # Warm sets for the hit paths (not measured)
+        warm = [image(f"warm-{run_id}-{i}") for i in range(WARM_SET)]
+        warm_users = [f"warm-user-{run_id}-{i}" for i in range(WARM_SET)]
+        tokens.update({u: token(u) for u in warm_users})
+        for img in warm:
+            await analyze(img, audio=True)
+        for u in warm_users:
+            await profile(u)
+
+        for level in levels:
+            miss_users = [f"user-{run_id}-{level}-{i}" for i in range(args.requests)]
+            if "profile_miss" in selected:
+                tokens.update({u: token(u) for u in miss_users})
+            ops: dict[str, Callable[[int], Awaitable[int]]] = {
+                "analyze_miss": lambda i, lv=level: analyze(image(f"miss-{run_id}-{lv}-{i}"), False),
+                "analyze_hit": lambda i: analyze(warm[i % WARM_SET], False),
+                "analyze_audio_miss": lambda i, lv=level: analyze(image(f"audio-{run_id}-{lv}-{i}"), True),
+                "analyze_audio_hit": lambda i: analyze(warm[i % WARM_SET], True),
+                "profile_miss": lambda i: profile(miss_users[i]),
+                "profile_hit": lambda i: profile(warm_users[i % WARM_SET]),
+            }
+            for name in selected:
+                result = await _run(name, level, args.requests, ops[name])
+                results.append(result)
+                print(
+                    f"  {name:20} c={level:<4} {result['throughput_rps']:8.1f} req/s  "
+                    f"p50 {result['p50_ms']:.1f} ms  p99 {result['p99_ms']:.1f} ms",
+                    file=sys.stderr,
+                )
+    finally:
+        await cache_writer.stop_writer()
+        await client.aclose()
+        await http.aclose()
+        set_clients(None)
+
+    _print_table(results)
+
+    out = args.out or RESULTS_DIR / f"e2e-{datetime.now(timezone.utc):%Y%m%dT%H%M%SZ}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    payload = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "args": {k: (str(v) if isinstance(v, Path) else v) for k, v in vars(args).items()},
+        },
+        "upstreams": {
+            "gemini": gemini_up.stats(),
+            "supabase": supabase.stats(),
+            "elevenlabs": tts_up.stats(),
+        },
+        "results": results,
+    }
+    out.write_text(json.dumps(payload, indent=2))
+    print(f"\nSaved {out}")
+
+    if args.compare:
+        _print_compare(results, args.compare)
+    return 0
+
+
+def main() -> None:
+    sys.exit(asyncio.run(_main(_parse_args())))
+
+
+if __name__ == "__main__":
+    main()
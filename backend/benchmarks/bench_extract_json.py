@@ -0,0 +1,64 @@
+"""
+Micro-benchmark: Gemini response JSON extraction, previous regex version vs
+the direct parse + brace-balanced scanner, as responses grow.
+
+    cd backend && python -m benchmarks.bench_extract_json
+"""
+
+from __future__ import annotations
+
+import json
+import re
+import timeit
+
+from app.services.gemini_service import _extract_json
+
+
+def extract_json_regex(text: str) -> dict:
+    """Previous implementation: code-fence regex, then greedy findall + max(len)."""
+    text = text.strip()
+    matches = re.findall(r"```(?:json)?\s*([\s\S]*?)\s*```", text)
+    if matches:
+        text = matches[0].strip()
+    json_matches = re.findall(r"\{[\s\S]*\}", text)
+    if json_matches:
+        text = max(json_matches, key=len)
+    return json.loads(text)
+
+
+def _response(n_flags: int) -> dict:
+    return {
+        "score": 25,
+        "risk_classification": "High Risk",
+        "flagged_ingredients": [
+            {
+                "ingredient": f"Ingredient {i}",
+                "risk_level": "Medium Risk",
+                "reasons": [f"Reason {i} with {{braces}} and \"quotes\""],
+                "severity": 0.5,
+            }
+            for i in range(n_flags)
+        ],
+        "summary": "Not safe for your allergies.",
+    }
+
+
+def main() -> None:
+    print(f"{'response':34} {'bytes':>8} {'regex µs':>10} {'scanner µs':>11}")
+    for n in (5, 50, 500):
+        body = json.dumps(_response(n))
+        for label, text in (
+            (f"{n} flags, bare JSON", body),
+            (f"{n} flags, fenced + prose", f"Here you go:\n```json\n{body}\n```\nHope this helps!"),
+        ):
+            assert _extract_json(text) == extract_json_regex(text)
+            number = 200
+            old = timeit.timeit(lambda: extract_json_regex(text), number=number)
+            new = timeit.timeit(lambda: _extract_json(text), number=number)
+            print(
+                f"{label:34} {len(text):8} {old / number * 1e6:10.1f} {new / number * 1e6:11.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
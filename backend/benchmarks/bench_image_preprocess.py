@@ -0,0 +1,85 @@
+"""
+Benchmark: label photo preprocessing — payload size and latency before/after.
+
+    cd backend && python -m benchmarks.bench_image_preprocess [--uplink-mbps 20]
+
+Synthesizes phone-camera-sized JPEGs (noise + text-like stripes, EXIF
+orientation set), runs preprocess_image at the configured IMAGE_MAX_EDGE /
+IMAGE_JPEG_QUALITY, and reports bytes, preprocessing time and the estimated
+upload time to Gemini at the given uplink bandwidth.
+"""
+
+from __future__ import annotations
+
+import argparse
+import io
+import statistics
+import time
+
+from PIL import Image, ImageDraw
+
+from app.config import get_settings
+from app.services.image_preprocess import preprocess_image
+
+SIZES = [
+    ("12 MP (4032x3024)", (4032, 3024)),
+    ("8 MP (3264x2448)", (3264, 2448)),
+    ("3 MP (2048x1536)", (2048, 1536)),
+    ("already small (1200x900)", (1200, 900)),
+]
+
+
+def _photo(size: tuple[int, int], quality: int = 92) -> bytes:
+    """Noisy 'photo' with dark text-like stripes and EXIF orientation 6."""
+    img = Image.merge(
+        "RGB",
+        [Image.effect_noise(size, sigma).point(lambda v: v * 0.6 + 80) for sigma in (40, 50, 60)],
+    )
+    draw = ImageDraw.Draw(img)
+    for y in range(0, size[1], 48):
+        for x in range(0, size[0], 160):
+            draw.rectangle((x, y, x + 120, y + 18), fill=(20, 20, 20))
+    exif = Image.Exif()
+    exif[0x0112] = 6  # rotate 90° CW on display
+    buf = io.BytesIO()
+    img.save(buf, format="JPEG", quality=quality, exif=exif)
+    return buf.getvalue()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--uplink-mbps", type=float, default=20.0)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+    settings = get_settings()
+    bytes_per_s = args.uplink_mbps * 1e6 / 8
+
+    print(
+        f"max_edge={settings.image_max_edge} quality={settings.image_jpeg_quality} "
+        f"uplink={args.uplink_mbps:g} Mbit/s\n"
+    )
+    print(
+        f"{'image':26} {'before KB':>10} {'after KB':>9} {'ratio':>6} "
+        f"{'prep ms':>8} {'upload ms before':>17} {'after (incl prep)':>18}"
+    )
+    for label, size in SIZES:
+        data = _photo(size)
+        timings = []
+        for _ in range(args.runs):
+            start = time.perf_counter()
+            out, _ = preprocess_image(
+                data, "image/jpeg", settings.image_max_edge, settings.image_jpeg_quality
+            )
+            timings.append(time.perf_counter() - start)
+        prep = statistics.median(timings)
+        before_upload = len(data) / bytes_per_s
+        after_upload = len(out) / bytes_per_s
+        print(
+            f"{label:26} {len(data) / 1024:10.0f} {len(out) / 1024:9.0f} "
+            f"{len(data) / len(out):5.1f}x {prep * 1000:8.1f} "
+            f"{before_upload * 1000:17.0f} {(after_upload + prep) * 1000:18.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
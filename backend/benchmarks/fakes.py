@@ -0,0 +1,367 @@
+"""
+In-process fakes for the upstream clients, for benchmarks.
+
+Each fake mimics the slice of the real SDK the backend uses, sleeps for a
+configurable latency (mean ± uniform jitter) and can inject rate-limit
+failures at a given rate:
+
+  FakeGemini      client.aio.models.generate_content (structured output,
+                  deterministic products per image), 429 as genai ClientError
+  FakeSupabase    table(...).select/eq/gt/gte/lt/in_/upsert/delete + rpc(...),
+                  in-memory tables, 429 as an exception from execute()
+  FakeElevenLabs  text_to_speech.convert -> async chunk stream, 429 before the
+                  first chunk
+
+Install them with app.clients.set_clients(ClientRegistry(...)).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import copy
+import hashlib
+import itertools
+import json
+import random
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Optional
+
+from google.genai import errors
+
+
+@dataclass
+class Upstream:
+    """Latency and failure model for one fake upstream."""
+
+    latency: float = 0.0
+    jitter: float = 0.0
+    error_rate: float = 0.0
+    calls: int = 0
+    errors: int = 0
+    rng: random.Random = field(default_factory=lambda: random.Random(7))
+
+    async def call(self) -> bool:
+        """Sleep for one call; True if this call should fail with a 429."""
+        self.calls += 1
+        delay = self.latency + self.rng.uniform(-self.jitter, self.jitter)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if self.error_rate and self.rng.random() < self.error_rate:
+            self.errors += 1
+            return True
+        return False
+
+    def stats(self) -> dict:
+        return {"calls": self.calls, "injected_429": self.errors}
+
+
+# ---------------------------------------------------------------------------
+# Gemini
+# ---------------------------------------------------------------------------
+
+COMMON_INGREDIENTS = [
+    "sugar", "salt", "water", "wheat flour", "palm oil", "natural flavors",
+    "citric acid", "soy lecithin", "whey powder", "peanut butter", "corn syrup",
+    "milk chocolate", "egg whites", "almond flour", "sodium benzoate", "oats",
+    "honey", "rice flour", "cocoa butter", "vanilla extract",
+]
+_TRIGGERS = {"peanut": "allergy", "almond": "allergy", "milk": "allergy", "whey": "allergy",
+             "egg": "allergy", "sugar": "health", "corn syrup": "health", "palm oil": "goal"}
+_PROPERTIES = {"peanut": ["peanuts"], "almond": ["tree_nuts"], "milk": ["milk", "not_vegan"],
+               "whey": ["milk", "not_vegan"], "egg": ["eggs", "not_vegan"], "wheat": ["wheat", "gluten"],
+               "sugar": ["added_sugar"], "corn syrup": ["added_sugar", "corn"],
+               "palm oil": ["saturated_fat"], "honey": ["added_sugar", "not_vegan"]}
+
+
+def product_for(image_bytes: bytes) -> dict:
+    """Deterministic product for an image: 8 common ingredients plus one unique additive."""
+    h = int.from_bytes(hashlib.sha256(image_bytes).digest()[:8], "big")
+    rng = random.Random(h)
+    ingredients = rng.sample(COMMON_INGREDIENTS, 8) + [f"additive e{h % 1_000_000}"]
+    return {
+        "product_name": f"Product {h % 10_000}",
+        "brand": "Bench Foods",
+        "ingredients": [i.title() for i in ingredients],
+        "confidence": "high",
+    }
+
+
+def _flag_for(ingredient: str) -> Optional[dict]:
+    name = ingredient.lower()
+    for trigger, category in _TRIGGERS.items():
+        if trigger in name:
+            high = category == "allergy"
+            return {
+                "ingredient": ingredient,
+                "risk_level": "High Risk" if high else "Medium Risk",
+                "reasons": [f"Conflicts with your {category} profile"],
+                "severity": 0.9 if high else 0.5,
+                "category": category,
+            }
+    return None
+
+
+def _analysis_for(ingredients: list[str]) -> dict:
+    flags = [f for f in map(_flag_for, ingredients) if f]
+    high = any(f["risk_level"] == "High Risk" for f in flags)
+    return {
+        "score": 20 if high else max(40, 100 - 15 * len(flags)),
+        "risk_classification": "High Risk" if high else ("Medium Risk" if flags else "Low Risk"),
+        "flagged_ingredients": [{k: v for k, v in f.items() if k != "category"} for f in flags],
+        "summary": "Not safe for your allergies." if high else "Analysis complete.",
+    }
+
+
+def _prompt_ingredients(prompt: str) -> list[str]:
+    for line in prompt.splitlines():
+        if line.startswith("Ingredients: "):
+            return json.loads(line[len("Ingredients: "):])
+    return []
+
+
+class _GeminiResponse:
+    def __init__(self, data: dict, schema: Any) -> None:
+        self.text = json.dumps(data)
+        self.parsed = schema.model_validate(data) if schema is not None else None
+
+
+class _GeminiModels:
+    def __init__(self, upstream: Upstream) -> None:
+        self.upstream = upstream
+
+    async def generate_content(self, model: str, contents: list, config: Any = None) -> _GeminiResponse:
+        if await self.upstream.call():
+            raise errors.ClientError(
+                429, {"error": {"code": 429, "message": "Quota exceeded", "status": "RESOURCE_EXHAUSTED"}}
+            )
+        schema = getattr(config, "response_schema", None)
+        name = getattr(schema, "__name__", "")
+        image = next((c.inline_data.data for c in contents if getattr(c, "inline_data", None)), None)
+        prompt = next((c for c in contents if isinstance(c, str)), "")
+        if name == "VisionOutput":
+            data = product_for(image or b"")
+        elif name == "LabelOutput":
+            vision = product_for(image or b"")
+            data = {**vision, **_analysis_for(vision["ingredients"])}
+        elif name == "PropertiesOutput":
+            data = {"ingredients": [
+                {"ingredient": i, "properties": sorted({p for t, ps in _PROPERTIES.items() if t in i for p in ps})}
+                for i in _prompt_ingredients(prompt)
+            ]}
+        elif name == "AssessmentOutput":
+            data = {"assessments": []}
+            for ingredient in _prompt_ingredients(prompt):
+                flag = _flag_for(ingredient)
+                data["assessments"].append(
+                    {**flag, "flagged": True} if flag else {
+                        "ingredient": ingredient, "flagged": False, "category": None,
+                        "risk_level": "Low Risk", "reasons": [], "severity": 0.0,
+                    }
+                )
+        else:
+            data = _analysis_for(_prompt_ingredients(prompt))
+        return _GeminiResponse(data, schema)
+
+    async def aclose(self) -> None:
+        pass
+
+
+class FakeGemini:
+    """Stands in for genai.Client."""
+
+    def __init__(self, upstream: Upstream) -> None:
+        self.upstream = upstream
+        self.aio = _GeminiAio(_GeminiModels(upstream))
+
+    def close(self) -> None:
+        pass
+
+
+class _GeminiAio:
+    def __init__(self, models: _GeminiModels) -> None:
+        self.models = models
+
+    async def aclose(self) -> None:
+        pass
+
+
+# ---------------------------------------------------------------------------
+# Supabase
+# ---------------------------------------------------------------------------
+
+PRIMARY_KEYS = {
+    "user_profiles": ("user_id",),
+    "analysis_cache": ("cache_key",),
+    "vision_cache": ("cache_key",),
+    "ingredient_facts": ("ingredient", "profile_hash", "model_version", "prompt_version"),
+    "product_facts": ("cache_key",),
+}
+
+
+class _Result:
+    def __init__(self, data: Any) -> None:
+        self.data = data
+
+
+class _Query:
+    def __init__(self, db: "FakeSupabase", table: str) -> None:
+        self.db = db
+        self.table = table
+        self.columns: Optional[list[str]] = None
+        self.filters: list[tuple[str, str, Any]] = []
+        self.op = "select"
+        self.rows: list[dict] = []
+
+    def select(self, columns: str = "*") -> "_Query":
+        self.columns = None if columns == "*" else [c.strip() for c in columns.split(",")]
+        return self
+
+    def upsert(self, rows: Any, on_conflict: str = "") -> "_Query":
+        self.op = "upsert"
+        self.rows = rows if isinstance(rows, list) else [rows]
+        return self
+
+    def delete(self) -> "_Query":
+        self.op = "delete"
+        return self
+
+    def _filter(self, op: str, column: str, value: Any) -> "_Query":
+        self.filters.append((op, column, value))
+        return self
+
+    def eq(self, column: str, value: Any) -> "_Query":
+        return self._filter("eq", column, value)
+
+    def gt(self, column: str, value: Any) -> "_Query":
+        return self._filter("gt", column, value)
+
+    def gte(self, column: str, value: Any) -> "_Query":
+        return self._filter("gte", column, value)
+
+    def lt(self, column: str, value: Any) -> "_Query":
+        return self._filter("lt", column, value)
+
+    def in_(self, column: str, values: list) -> "_Query":
+        return self._filter("in", column, list(values))
+
+    def _matches(self, row: dict) -> bool:
+        for op, column, value in self.filters:
+            v = row.get(column)
+            if op == "eq" and v != value:
+                return False
+            if op == "in" and v not in value:
+                return False
+            if op in ("gt", "gte", "lt") and v is None:
+                return False
+            if op == "gt" and not v > value:
+                return False
+            if op == "gte" and not v >= value:
+                return False
+            if op == "lt" and not v < value:
+                return False
+        return True
+
+    def _candidates(self, rows: dict) -> list[dict]:
+        """Rows to test: primary-key lookups when every key column is pinned, else a scan."""
+        pk = PRIMARY_KEYS.get(self.table, ())
+        pinned: dict[str, list] = {}
+        for op, column, value in self.filters:
+            if column in pk and op in ("eq", "in"):
+                pinned[column] = [value] if op == "eq" else value
+        if pk and len(pinned) == len(pk):
+            keys = itertools.product(*(pinned[c] for c in pk))
+            return [rows[k] for k in keys if k in rows]
+        return list(rows.values())
+
+    async def execute(self) -> _Result:
+        if await self.db.upstream.call():
+            raise RuntimeError("429 Too Many Requests")
+        rows = self.db.tables.setdefault(self.table, {})
+        pk = PRIMARY_KEYS.get(self.table, ("id",))
+        if self.op == "upsert":
+            out = []
+            for row in self.rows:
+                key = tuple(row.get(c) for c in pk)
+                merged = {**rows.get(key, {}), **copy.deepcopy(row)}
+                rows[key] = merged
+                out.append(copy.deepcopy(merged))
+            return _Result(out)
+        matched = [r for r in self._candidates(rows) if self._matches(r)]
+        if self.op == "delete":
+            for r in matched:
+                rows.pop(tuple(r.get(c) for c in pk), None)
+            return _Result(matched)
+        return _Result([
+            copy.deepcopy({c: r.get(c) for c in self.columns} if self.columns else r)
+            for r in matched
+        ])
+
+
+class _Rpc:
+    def __init__(self, db: "FakeSupabase", name: str, params: dict) -> None:
+        self.db = db
+        self.name = name
+        self.params = params
+
+    async def execute(self) -> _Result:
+        if await self.db.upstream.call():
+            raise RuntimeError("429 Too Many Requests")
+        self.db.rpc_calls[self.name] = self.db.rpc_calls.get(self.name, 0) + 1
+        return _Result(0)
+
+
+class FakeSupabase:
+    """Stands in for the supabase AsyncClient (tables live in memory)."""
+
+    def __init__(self, upstream: Upstream) -> None:
+        self.upstream = upstream
+        self.tables: dict[str, dict[tuple, dict]] = {}
+        self.rpc_calls: dict[str, int] = {}
+
+    def table(self, name: str) -> _Query:
+        return _Query(self, name)
+
+    def rpc(self, name: str, params: Optional[dict] = None) -> _Rpc:
+        return _Rpc(self, name, params or {})
+
+    def stats(self) -> dict:
+        return {
+            **self.upstream.stats(),
+            "rows": {name: len(rows) for name, rows in self.tables.items()},
+            "rpc_calls": dict(self.rpc_calls),
+        }
+
+
+# ---------------------------------------------------------------------------
+# ElevenLabs
+# ---------------------------------------------------------------------------
+
+class _TextToSpeech:
+    def __init__(self, upstream: Upstream, chunks: int, chunk_bytes: int, chunk_interval: float) -> None:
+        self.upstream = upstream
+        self.chunks = chunks
+        self.chunk_bytes = chunk_bytes
+        self.chunk_interval = chunk_interval
+
+    async def convert(self, text: str, voice_id: str, model_id: str, output_format: str) -> AsyncIterator[bytes]:
+        if await self.upstream.call():  # latency = time to first byte
+            raise RuntimeError("status_code: 429, body: too_many_concurrent_requests")
+        seed = hashlib.sha256(text.encode()).digest()
+        for _ in range(self.chunks):
+            yield (seed * (self.chunk_bytes // len(seed) + 1))[: self.chunk_bytes]
+            if self.chunk_interval:
+                await asyncio.sleep(self.chunk_interval)
+
+
+class FakeElevenLabs:
+    """Stands in for AsyncElevenLabs."""
+
+    def __init__(
+        self,
+        upstream: Upstream,
+        chunks: int = 8,
+        chunk_bytes: int = 4096,
+        chunk_interval: float = 0.01,
+    ) -> None:
+        self.upstream = upstream
+        self.text_to_speech = _TextToSpeech(upstream, chunks, chunk_bytes, chunk_interval)
@@ -8,5 +8,4 @@ create table if not exists analysis_cache (
   created_at timestamptz not null default now()
 );
 
--- Optional: index for cleanup of old entries (if you add TTL later)
--- create index idx_analysis_cache_created_at on analysis_cache(created_at);
+-- TTL, version stamping, hit counting and cleanup indexes: see 004_analysis_cache_lifecycle.sql
@@ -0,0 +1,39 @@
+-- Vision cache: keyed by sha256(model + image bytes)
+-- Run in Supabase SQL Editor
+-- Backend uses service role; no RLS needed for cache
+
+create table if not exists vision_cache (
+  cache_key text primary key,
+  result jsonb not null,
+  created_at timestamptz not null default now()
+);
+
+create index if not exists idx_vision_cache_created_at on vision_cache(created_at);
+
+-- Drop expired rows, then the oldest rows beyond max_rows.
+-- Called periodically by the backend via rpc('prune_vision_cache', ...).
+create or replace function prune_vision_cache(max_age_seconds integer, max_rows integer)
+returns integer
+language plpgsql
+as $$
+declare
+  removed integer := 0;
+  n integer;
+begin
+  delete from vision_cache
+  where created_at < now() - make_interval(secs => max_age_seconds);
+  get diagnostics n = row_count;
+  removed := removed + n;
+
+  delete from vision_cache
+  where cache_key in (
+    select cache_key from vision_cache
+    order by created_at desc
+    offset max_rows
+  );
+  get diagnostics n = row_count;
+  removed := removed + n;
+
+  return removed;
+end;
+$$;
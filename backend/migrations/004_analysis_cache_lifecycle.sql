@@ -0,0 +1,82 @@
+-- Analysis cache lifecycle: TTL, model/prompt version stamping, hit counting,
+-- size accounting, and batched eviction.
+-- Run in Supabase SQL Editor (after 002_analysis_cache.sql)
+
+alter table analysis_cache
+  add column if not exists last_hit_at timestamptz not null default now(),
+  add column if not exists hit_count integer not null default 0,
+  add column if not exists expires_at timestamptz,
+  add column if not exists model_version text,
+  add column if not exists prompt_version text,
+  add column if not exists size_bytes integer generated always as (octet_length(result::text)) stored;
+
+create index if not exists idx_analysis_cache_created_at on analysis_cache(created_at);
+create index if not exists idx_analysis_cache_last_hit_at on analysis_cache(last_hit_at);
+create index if not exists idx_analysis_cache_expires_at on analysis_cache(expires_at);
+
+-- Rows written before this migration have no version stamp; the backend
+-- never reads them and the sweeper removes them.
+
+-- Record hits flushed in bulk by the backend (keys[i] was hit counts[i] times).
+create or replace function touch_analysis_cache(keys text[], counts integer[])
+returns void
+language sql
+as $$
+  update analysis_cache c
+  set hit_count = c.hit_count + t.n,
+      last_hit_at = now()
+  from unnest(keys, counts) as t(k, n)
+  where c.cache_key = t.k;
+$$;
+
+-- Delete up to batch_size rows: first expired or version-stale rows, then
+-- least-recently-hit rows while the table exceeds max_bytes.
+-- Returns rows removed; callers repeat while it equals batch_size.
+create or replace function sweep_analysis_cache(
+  batch_size integer,
+  max_bytes bigint,
+  current_model text,
+  current_prompt text
+)
+returns integer
+language plpgsql
+as $$
+declare
+  removed integer := 0;
+  n integer;
+  excess bigint;
+begin
+  delete from analysis_cache
+  where cache_key in (
+    select cache_key from analysis_cache
+    where expires_at is null
+       or expires_at < now()
+       or model_version is distinct from current_model
+       or prompt_version is distinct from current_prompt
+    limit batch_size
+  );
+  get diagnostics n = row_count;
+  removed := removed + n;
+
+  if removed < batch_size then
+    select coalesce(sum(size_bytes), 0) - max_bytes into excess from analysis_cache;
+    if excess > 0 then
+      delete from analysis_cache
+      where cache_key in (
+        select cache_key from (
+          select cache_key, size_bytes,
+                 sum(size_bytes) over (order by last_hit_at, cache_key) as running
+          from analysis_cache
+        ) ranked
+        where running - size_bytes < excess
+        order by running
+        limit batch_size - removed
+      );
+      get diagnostics n = row_count;
+      removed := removed + n;
+    end if;
+  end if;
+
+  return removed;
+end;
+$$;
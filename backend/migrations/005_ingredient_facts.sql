@@ -0,0 +1,45 @@
+-- Ingredient facts: per-ingredient verdicts for a profile, reused across products
+-- Run in Supabase SQL Editor
+-- Backend uses service role; no RLS needed for cache
+
+create table if not exists ingredient_facts (
+  ingredient text not null,
+  profile_hash text not null,
+  model_version text not null,
+  prompt_version text not null,
+  fact jsonb not null,
+  created_at timestamptz not null default now(),
+  expires_at timestamptz not null,
+  primary key (ingredient, profile_hash, model_version, prompt_version)
+);
+
+-- Lookups are (profile_hash, model, prompt, ingredient in [...])
+create index if not exists idx_ingredient_facts_profile
+  on ingredient_facts(profile_hash, model_version, prompt_version, ingredient);
+create index if not exists idx_ingredient_facts_expires_at on ingredient_facts(expires_at);
+
+-- Delete up to batch_size expired or version-stale rows. Returns rows removed;
+-- callers repeat while it equals batch_size.
+create or replace function prune_ingredient_facts(
+  batch_size integer,
+  current_model text,
+  current_prompt text
+)
+returns integer
+language plpgsql
+as $$
+declare
+  n integer;
+begin
+  delete from ingredient_facts
+  where ctid in (
+    select ctid from ingredient_facts
+    where expires_at < now()
+       or model_version <> current_model
+       or prompt_version <> current_prompt
+    limit batch_size
+  );
+  get diagnostics n = row_count;
+  return n;
+end;
+$$;
@@ -0,0 +1,40 @@
+-- Product facts: profile-agnostic ingredient properties per product, scored locally per profile
+-- Run in Supabase SQL Editor
+-- Backend uses service role; no RLS needed for cache
+
+create table if not exists product_facts (
+  cache_key text primary key,
+  model_version text not null,
+  prompt_version text not null,
+  facts jsonb not null,
+  created_at timestamptz not null default now(),
+  expires_at timestamptz not null
+);
+
+create index if not exists idx_product_facts_expires_at on product_facts(expires_at);
+
+-- Delete up to batch_size expired or version-stale rows. Returns rows removed;
+-- callers repeat while it equals batch_size.
+create or replace function prune_product_facts(
+  batch_size integer,
+  current_model text,
+  current_prompt text
+)
+returns integer
+language plpgsql
+as $$
+declare
+  n integer;
+begin
+  delete from product_facts
+  where ctid in (
+    select ctid from product_facts
+    where expires_at < now()
+       or model_version <> current_model
+       or prompt_version <> current_prompt
+    limit batch_size
+  );
+  get diagnostics n = row_count;
+  return n;
+end;
+$$;
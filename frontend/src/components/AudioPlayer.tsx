@@ -1,21 +1,22 @@
 import { useState, useRef, useCallback } from 'react';
 import { Play, Pause, Volume2 } from 'lucide-react';
+import { API_BASE_URL } from '@/utils/constants';
 
 interface AudioPlayerProps {
-  /** base64-encoded audio (MP3). */
-  audioBase64: string;
+  /** API path of the summary audio (AnalyzeResult.audio_url). */
+  audioUrl: string;
 }
 
 /**
- * Plays base64-encoded audio from the ElevenLabs TTS response.
+ * Plays the ElevenLabs TTS summary, streamed from the backend audio endpoint.
  */
-export function AudioPlayer({ audioBase64 }: AudioPlayerProps) {
+export function AudioPlayer({ audioUrl }: AudioPlayerProps) {
   const audioRef = useRef<HTMLAudioElement | null>(null);
   const [playing, setPlaying] = useState(false);
 
   const toggle = useCallback(() => {
     if (!audioRef.current) {
-      const audio = new Audio(`data:audio/mpeg;base64,${audioBase64}`);
+      const audio = new Audio(`${API_BASE_URL}${audioUrl}`);
       audio.addEventListener('ended', () => setPlaying(false));
       audioRef.current = audio;
     }
@@ -27,7 +28,7 @@ export function AudioPlayer({ audioBase64 }: AudioPlayerProps) {
       audioRef.current.play();
       setPlaying(true);
     }
-  }, [audioBase64, playing]);
+  }, [audioUrl, playing]);
 
   return (
     <button
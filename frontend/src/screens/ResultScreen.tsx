@@ -142,9 +142,9 @@ export default function ResultScreen() {
         </div>
 
         {/* Audio player */}
-        {result.audio_base64 && (
+        {result.audio_url && (
           <div className="mt-6 flex justify-center">
-            <AudioPlayer audioBase64={result.audio_base64} />
+            <AudioPlayer audioUrl={result.audio_url} />
           </div>
         )}
 
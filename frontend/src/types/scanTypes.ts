@@ -25,5 +25,8 @@ export interface AnalyzeResult {
   ingredients?: string[];
   /** Vision extraction confidence: high | medium | low */
   confidence?: string;
-  audio_base64?: string | null;
+  /** Id of the TTS summary audio (present when include_audio was requested) */
+  audio_id?: string | null;
+  /** API path that streams the MP3, e.g. /analyze/audio/{audio_id} */
+  audio_url?: string | null;
 }